@@ -0,0 +1,345 @@
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from astrbot import logger
+
+
+class HyperLogLog:
+    """基数估计，用固定 2^p 字节估算不重复成员数，p=10 时误差约 3%"""
+
+    __slots__ = ("p", "m", "registers")
+
+    def __init__(self, p: int = 10, registers: Optional[bytes] = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers or self.m)
+
+    def add(self, item: str):
+        h = int.from_bytes(
+            hashlib.blake2b(item.encode(), digest_size=8).digest(), "big"
+        )
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        # 小基数时改用线性计数
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def dumps(self) -> str:
+        return base64.b64encode(bytes(self.registers)).decode()
+
+    @classmethod
+    def loads(cls, data: str, p: int = 10) -> "HyperLogLog":
+        registers = base64.b64decode(data)
+        if len(registers) != 1 << p:
+            return cls(p)
+        return cls(p, registers)
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频项统计，最多保留 k 个计数器。
+    表满时新成员顶替计数最小的一项并继承其计数（记为误差上界），
+    真实频次超过 总数/k 的成员一定在表中。
+    最小项用惰性小根堆查找：计数只增不减，堆中每个成员一项，
+    弹出的项计数已过期时按当前计数放回，每次顶替摊还 O(log k)。
+    """
+
+    __slots__ = ("k", "counters", "_heap")
+
+    def __init__(self, k: int = 50):
+        self.k = max(1, k)
+        # key -> [计数, 误差上界, 显示名]
+        self.counters: Dict[str, list] = {}
+        # [(计数, key)]，计数可能小于当前值；为 None 时下次顶替前重建
+        self._heap: Optional[List[Tuple[int, str]]] = []
+
+    def load(self, counters: Dict[str, list]):
+        """整体替换计数器（从文件恢复时使用）"""
+        self.counters = counters
+        self._heap = None
+
+    def _pop_min(self) -> str:
+        heap = self._heap
+        if heap is None:
+            heap = self._heap = [(c[0], key) for key, c in self.counters.items()]
+            heapq.heapify(heap)
+        while True:
+            count, key = heap[0]
+            current = self.counters[key][0]
+            if current == count:
+                heapq.heappop(heap)
+                return key
+            heapq.heapreplace(heap, (current, key))
+
+    def add(self, key: str, label: str = "", n: int = 1):
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += n
+            if label:
+                counter[2] = label
+            return
+        if len(self.counters) < self.k:
+            self.counters[key] = [n, 0, label]
+        else:
+            floor = self.counters.pop(self._pop_min())[0]
+            self.counters[key] = [floor + n, floor, label]
+        if self._heap is not None:
+            heapq.heappush(self._heap, (self.counters[key][0], key))
+
+    def merge(self, other: "SpaceSaving"):
+        for key, (count, error, label) in other.counters.items():
+            counter = self.counters.setdefault(key, [0, 0, label])
+            counter[0] += count
+            counter[1] += error
+            counter[2] = counter[2] or label
+        if len(self.counters) > self.k:
+            ranked = sorted(self.counters.items(), key=lambda kv: -kv[1][0])
+            self.counters = dict(ranked[: self.k])
+        self._heap = None
+
+    def top(self, n: int) -> List[Tuple[str, int, int, str]]:
+        """按计数降序返回 (key, 计数, 误差上界, 显示名)"""
+        ranked = sorted(self.counters.items(), key=lambda kv: -kv[1][0])
+        return [(key, c, e, label) for key, (c, e, label) in ranked[:n]]
+
+
+class DayActivity:
+    """单个群单日的统计"""
+
+    __slots__ = ("total", "users", "talkers")
+
+    def __init__(self, top_k: int):
+        self.total = 0
+        self.users = HyperLogLog()
+        self.talkers = SpaceSaving(top_k)
+
+    def copy_state(self) -> tuple:
+        """在事件循环上复制状态，序列化交给 state_to_dict 在线程中完成"""
+        return (
+            self.total,
+            bytes(self.users.registers),
+            [(key, c[:]) for key, c in self.talkers.counters.items()],
+        )
+
+    @staticmethod
+    def state_to_dict(state: tuple) -> dict:
+        total, registers, talkers = state
+        return {
+            "total": total,
+            "users": base64.b64encode(registers).decode(),
+            "talkers": dict(talkers),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, top_k: int) -> "DayActivity":
+        day = cls(top_k)
+        day.total = data.get("total", 0)
+        day.users = HyperLogLog.loads(data.get("users", ""))
+        day.talkers.load(
+            {key: list(value) for key, value in data.get("talkers", {}).items()}
+        )
+        return day
+
+
+class GroupActivity:
+    """单个群的统计：按小时的消息数与按天的消息数、活跃人数、话唠榜"""
+
+    __slots__ = ("hours", "days")
+
+    def __init__(self):
+        # 小时序号（时间戳 // 3600）-> 消息数
+        self.hours: Dict[int, int] = {}
+        # 本地日期 YYYY-MM-DD -> 当日统计
+        self.days: Dict[str, DayActivity] = {}
+
+
+class ActivityStats:
+    """
+    流式群活跃统计。
+    每条群消息只做 O(1) 的计数更新：按小时分桶的消息数、按天的 HyperLogLog 活跃人数估计、
+    按天的 Space-Saving 话唠榜。内存按 群数 × 保留天数 × (约1KB + k 个计数器) 封顶，
+    定时整体写盘，查询完全基于本地数据，不调用任何接口。
+    """
+
+    def __init__(
+        self,
+        json_path: str,
+        retention_days: int = 7,
+        top_k: int = 50,
+        flush_interval: float = 300,
+    ):
+        """
+        :param retention_days: 按天统计的保留天数
+        :param top_k: 每天话唠榜保留的计数器数量
+        :param flush_interval: 写盘间隔（秒）
+        """
+        self.path = json_path
+        self.configure(retention_days, top_k, flush_interval)
+        self._groups: Dict[str, GroupActivity] = {}
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._load()
+
+    def configure(self, retention_days: int, top_k: int, flush_interval: float):
+        self.retention_days = max(1, retention_days)
+        self.top_k = max(1, top_k)
+        self.flush_interval = max(1, flush_interval)
+
+    @staticmethod
+    def _day(ts: float) -> str:
+        return time.strftime("%Y-%m-%d", time.localtime(ts))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for group_id, raw in data.items():
+                group = GroupActivity()
+                group.hours = {int(h): c for h, c in raw.get("hours", {}).items()}
+                group.days = {
+                    day: DayActivity.from_dict(d, self.top_k)
+                    for day, d in raw.get("days", {}).items()
+                }
+                self._groups[group_id] = group
+        except Exception as e:
+            logger.error(f"加载群活跃统计失败: {e}")
+
+    def observe(self, group_id: str, user_id: str, name: str = "", ts: float = 0):
+        """记录一条群消息"""
+        ts = ts or time.time()
+        group = self._groups.get(group_id)
+        if group is None:
+            group = self._groups[group_id] = GroupActivity()
+        hour = int(ts // 3600)
+        group.hours[hour] = group.hours.get(hour, 0) + 1
+        day_key = self._day(ts)
+        day = group.days.get(day_key)
+        if day is None:
+            day = group.days[day_key] = DayActivity(self.top_k)
+            self._expire(group, ts)
+        day.total += 1
+        day.users.add(user_id)
+        day.talkers.add(user_id, name)
+        self._dirty = True
+
+    def _expire(self, group: GroupActivity, now: float):
+        # 每个群每天只在第一条消息时清理一次过期桶
+        oldest_hour = int(now // 3600) - self.retention_days * 24
+        group.hours = {h: c for h, c in group.hours.items() if h > oldest_hour}
+        days = sorted(group.days)
+        for day in days[: max(0, len(days) - self.retention_days)]:
+            del group.days[day]
+
+    def summary(self, group_id: str, days: int = 7, top_n: int = 10) -> Optional[dict]:
+        """
+        汇总最近若干天的统计，没有数据时返回 None。
+        返回 daily（[(日期, 消息数, 活跃人数)]）、total、users（去重活跃人数）、
+        talkers（话唠榜）与 peak_hour（消息最多的时段）。
+        """
+        group = self._groups.get(group_id)
+        if group is None or not group.days:
+            return None
+        now = time.time()
+        wanted = [self._day(now - i * 86400) for i in range(max(1, days))]
+        users = HyperLogLog()
+        talkers = SpaceSaving(self.top_k)
+        daily = []
+        for day_key in wanted:
+            day = group.days.get(day_key)
+            if day is None:
+                daily.append((day_key, 0, 0))
+                continue
+            daily.append((day_key, day.total, day.users.count()))
+            users.merge(day.users)
+            talkers.merge(day.talkers)
+
+        by_hour = [0] * 24
+        oldest_hour = int(now // 3600) - len(wanted) * 24
+        for hour, count in group.hours.items():
+            if hour > oldest_hour:
+                by_hour[time.localtime(hour * 3600).tm_hour] += count
+        return {
+            "daily": daily,
+            "total": sum(d[1] for d in daily),
+            "users": users.count(),
+            "talkers": talkers.top(top_n),
+            "by_hour": by_hour,
+            "peak_hour": max(range(24), key=by_hour.__getitem__),
+        }
+
+    def _snapshot(self) -> list:
+        """在事件循环上复制当前状态，只做浅拷贝，不做编码"""
+        return [
+            (
+                group_id,
+                dict(group.hours),
+                [(day, d.copy_state()) for day, d in group.days.items()],
+            )
+            for group_id, group in self._groups.items()
+        ]
+
+    def _write(self, snapshot: list):
+        data = {
+            group_id: {
+                "hours": hours,
+                "days": {day: DayActivity.state_to_dict(st) for day, st in days},
+            }
+            for group_id, hours, days in snapshot
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    async def flush(self):
+        """写盘：在事件循环上复制状态，编码、序列化与写文件放到线程中"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, self._snapshot())
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"保存群活跃统计失败: {e}")
+
+    def start(self):
+        async def loop():
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(loop())
+
+    def stop(self):
+        """停止定时写盘，未落盘的变动在 close 时写入"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+
+    async def close(self):
+        self.stop()
+        await self.flush()
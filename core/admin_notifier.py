@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from aiocqhttp import CQHttp
+from astrbot import logger
+
+from .outbound import split_messages
+
+
+class PendingNotice:
+    __slots__ = ("client", "message", "enqueued_at")
+
+    def __init__(self, client: CQHttp, message: str):
+        self.client = client
+        self.message = message
+        self.enqueued_at = time.monotonic()
+
+
+class AdminNotifier:
+    """
+    bot管理员私聊通知队列。
+    通知先按管理员入队，防抖窗口结束后每位管理员的待发通知合并为一条摘要，
+    各管理员之间并发发送，不占用事件处理流程。
+    多个bot账号的通知各自由原账号发出（管理员未必是每个账号的好友）。
+    """
+
+    def __init__(self, debounce: float = 3, max_length: int = 3000):
+        """
+        :param debounce: 防抖窗口（秒），从窗口内第一条通知入队时开始计时
+        :param max_length: 单条私聊消息的最大长度，超出则拆分发送
+        """
+        self.configure(debounce, max_length)
+        self._queues: Dict[str, List[PendingNotice]] = defaultdict(list)
+        self._flush_task: asyncio.Task | None = None
+        # 统计信息
+        self.sent = 0
+        self.failed = 0
+        self.max_latency = 0.0
+        self._latency_sum = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def configure(self, debounce: float, max_length: int = 3000):
+        self.debounce = max(0.0, debounce)
+        self.max_length = max_length
+
+    def push(self, client: CQHttp, admin_ids: set[str], message: str):
+        """将通知加入各管理员的待发队列"""
+        for admin_id in admin_ids:
+            if admin_id.isdigit():
+                self._queues[admin_id].append(PendingNotice(client, message))
+        if self._queues and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.debounce)
+        queues, self._queues = self._queues, defaultdict(list)
+        await asyncio.gather(
+            *(self._deliver(admin_id, items) for admin_id, items in queues.items())
+        )
+        # 发送期间又有新通知入队时，开启下一个窗口
+        if self._queues:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    def _build_digest(self, items: List[PendingNotice]) -> List[str]:
+        if len(items) == 1:
+            texts = [items[0].message]
+        else:
+            texts = [f"【{len(items)}条通知】"] + [item.message for item in items]
+        return split_messages(texts, self.max_length, sep="\n\n")
+
+    async def _deliver(self, admin_id: str, items: List[PendingNotice]):
+        by_client: Dict[CQHttp, List[PendingNotice]] = defaultdict(list)
+        for item in items:
+            by_client[item.client].append(item)
+        for client, group in by_client.items():
+            try:
+                for chunk in self._build_digest(group):
+                    await client.send_private_msg(user_id=int(admin_id), message=chunk)
+            except Exception as e:
+                self.failed += len(group)
+                logger.error(f"无法发送消息给bot管理员：{e}")
+                continue
+            now = time.monotonic()
+            for item in group:
+                latency = now - item.enqueued_at
+                self._latency_sum += latency
+                self.max_latency = max(self.max_latency, latency)
+            self.sent += len(group)
+
+    def stats(self) -> Dict[str, float]:
+        """队列深度与送达延迟统计"""
+        return {
+            "queue_depth": self.queue_depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "avg_latency": self._latency_sum / self.sent if self.sent else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+    async def shutdown(self):
+        """立即发送所有待发通知"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        queues, self._queues = self._queues, defaultdict(list)
+        await asyncio.gather(
+            *(self._deliver(admin_id, items) for admin_id, items in queues.items())
+        )
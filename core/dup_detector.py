@@ -0,0 +1,177 @@
+import random
+import time
+import zlib
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Set, Tuple
+
+_MERSENNE = (1 << 61) - 1
+
+
+class MinHasher:
+    """基于字符 n-gram 的 MinHash 签名"""
+
+    def __init__(self, num_perm: int = 32, shingle_size: int = 3, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.params = [
+            (rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> Set[int]:
+        k = self.shingle_size
+        if len(text) <= k:
+            return {zlib.crc32(text.encode())}
+        return {zlib.crc32(text[i : i + k].encode()) for i in range(len(text) - k + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        xs = self.shingles(text)
+        return tuple(
+            min((a * x + b) % _MERSENNE for x in xs) for a, b in self.params
+        )
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """由签名估计两段文本的 Jaccard 相似度"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class _Entry:
+    __slots__ = ("ts", "sender_id", "message_id", "sig", "fired")
+
+    def __init__(self, ts: float, sender_id: str, message_id: int, sig: Tuple[int, ...]):
+        self.ts = ts
+        self.sender_id = sender_id
+        self.message_id = message_id
+        self.sig = sig
+        self.fired = False
+
+
+class _GroupWindow:
+    def __init__(self, max_entries: int):
+        self.entries: deque[_Entry] = deque()
+        self.max_entries = max_entries
+        self.buckets: Dict[Tuple[int, int], Set[_Entry]] = defaultdict(set)
+
+
+class CopyRaidDetector:
+    """
+    多账号复制粘贴刷屏检测。
+    每个群维护一个有界的近期消息窗口，消息的 MinHash 签名按 LSH 分段放入桶中，
+    新消息只与同桶的候选比较；窗口内有足够多不同账号发送了近似内容时触发。
+    每过一个窗口清扫一次所有群，移除已无消息的群窗口，不活跃的群不会一直占用内存。
+    """
+
+    def __init__(
+        self,
+        window: float = 60,
+        min_senders: int = 5,
+        threshold: float = 0.8,
+        num_perm: int = 32,
+        bands: int = 8,
+        max_entries: int = 500,
+        min_length: int = 8,
+    ):
+        """
+        :param window: 统计窗口（秒）
+        :param min_senders: 触发所需的不同发送者数量
+        :param threshold: 判定为近似内容的相似度阈值
+        :param bands: LSH 分段数，须整除 num_perm
+        :param max_entries: 每个群窗口内最多保留的消息数
+        :param min_length: 归一化后短于此长度的消息不参与检测
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_length = min_length
+        self.hasher = MinHasher(num_perm=num_perm)
+        self._groups: Dict[str, _GroupWindow] = {}
+        self._last_sweep = time.monotonic()
+        self.configure(window, min_senders, threshold, max_entries)
+
+    def configure(
+        self, window: float, min_senders: int, threshold: float, max_entries: int
+    ):
+        """更新检测参数，各群窗口中已有的消息保留"""
+        self.window = window
+        self.min_senders = max(2, min_senders)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        for win in self._groups.values():
+            win.max_entries = max_entries
+
+    def _band_keys(self, sig: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        r = self.rows
+        return [(i, hash(sig[i * r : (i + 1) * r])) for i in range(self.bands)]
+
+    def _evict(self, win: _GroupWindow, now: float):
+        while win.entries and (
+            now - win.entries[0].ts > self.window
+            or len(win.entries) >= win.max_entries
+        ):
+            old = win.entries.popleft()
+            for key in self._band_keys(old.sig):
+                bucket = win.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(old)
+                    if not bucket:
+                        del win.buckets[key]
+
+    def _sweep(self, now: float):
+        for group_id, win in list(self._groups.items()):
+            self._evict(win, now)
+            if not win.entries:
+                del self._groups[group_id]
+        self._last_sweep = now
+
+    def feed(
+        self,
+        group_id: str,
+        sender_id: str,
+        message_id: int,
+        text: str,
+        sig: Optional[Tuple[int, ...]] = None,
+    ) -> List[Tuple[str, int]]:
+        """
+        记录一条（已归一化的）消息，触发时返回需要处理的 (发送者, 消息ID) 列表，否则返回空列表。
+        已触发过的内容在窗口内再次出现时，直接返回新消息。
+        :param sig: 预先算好的签名（如在执行器中计算），不传则当场计算
+        """
+        if len(text) < self.min_length:
+            return []
+        now = time.monotonic()
+        if now - self._last_sweep > self.window:
+            self._sweep(now)
+        win = self._groups.get(group_id)
+        if win is None:
+            win = self._groups[group_id] = _GroupWindow(self.max_entries)
+        self._evict(win, now)
+
+        if sig is None:
+            sig = self.hasher.signature(text)
+        entry = _Entry(now, sender_id, message_id, sig)
+        keys = self._band_keys(sig)
+
+        candidates: Set[_Entry] = set()
+        for key in keys:
+            candidates.update(win.buckets.get(key, ()))
+        cluster = [
+            c for c in candidates if similarity(c.sig, sig) >= self.threshold
+        ]
+
+        win.entries.append(entry)
+        for key in keys:
+            win.buckets[key].add(entry)
+
+        if any(c.fired for c in cluster):
+            entry.fired = True
+            return [(sender_id, message_id)]
+
+        cluster.append(entry)
+        if len({c.sender_id for c in cluster}) < self.min_senders:
+            return []
+        for c in cluster:
+            c.fired = True
+        return [(c.sender_id, c.message_id) for c in cluster]
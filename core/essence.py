@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from aiocqhttp import CQHttp
+
+from astrbot import logger
+
+from .utils import download_image, format_time
+
+
+class EssenceEntry:
+    """一条精华消息的展示信息"""
+
+    __slots__ = (
+        "sender",
+        "sender_id",
+        "sent_at",
+        "operator",
+        "set_at",
+        "text",
+        "images",
+    )
+
+    def __init__(self, raw: dict):
+        self.sender: str = raw.get("sender_nick") or str(raw.get("sender_id", ""))
+        self.sender_id = str(raw.get("sender_id", ""))
+        self.sent_at: int = raw.get("sender_time", 0)
+        self.operator: str = raw.get("operator_nick") or str(
+            raw.get("operator_id", "")
+        )
+        self.set_at: int = raw.get("operator_time", 0)
+        self.images: List[str] = []
+        parts = []
+        content = raw.get("content")
+        if not isinstance(content, list):
+            content = []
+        for seg in content:
+            seg_type, data = seg.get("type"), seg.get("data", {})
+            if seg_type == "text":
+                parts.append(data.get("text", ""))
+            elif seg_type == "image" and data.get("url"):
+                self.images.append(data["url"])
+                parts.append(f"[图片{len(self.images)}]")
+            elif seg_type == "at":
+                parts.append(f"@{data.get('qq', '')}")
+            elif seg_type == "face":
+                parts.append("[表情]")
+            else:
+                parts.append(f"[{seg_type}]")
+        self.text = "".join(parts).strip() or f"（消息ID {raw.get('message_id', '')}）"
+
+
+class EssenceCache:
+    """
+    群精华列表缓存。
+    每个群缓存一份解析后的快照，在有效期内直接复用，设精/移精后失效；
+    同一个群的并发查询只发起一次接口调用。
+    精华中的图片按 URL 去重下载到本地，下载并发有上限，本地文件数量超出上限时淘汰最久未用的。
+    """
+
+    def __init__(
+        self,
+        image_dir: str,
+        ttl: float = 600,
+        image_concurrency: int = 4,
+        max_images: int = 500,
+    ):
+        """
+        :param ttl: 快照有效期（秒）
+        :param image_concurrency: 图片下载并发数
+        :param max_images: 本地保留的图片数量上限
+        """
+        self.image_dir = image_dir
+        self.max_images = max(1, max_images)
+        self.configure(ttl, image_concurrency)
+        # group_id -> (获取时间, 精华列表)
+        self._snapshots: Dict[str, Tuple[float, List[EssenceEntry]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 每次失效递增，获取期间发生失效的结果不写入缓存
+        self._generation: Dict[str, int] = {}
+        # URL 摘要（即文件名）-> 本地路径，按最近使用排序；以往运行留下的图片按修改时间排在前面
+        self._images: OrderedDict[str, str] = OrderedDict()
+        self._downloads: Dict[str, asyncio.Future] = {}
+        self._load_images()
+
+    def _load_images(self):
+        if not os.path.isdir(self.image_dir):
+            return
+        files = []
+        for name in os.listdir(self.image_dir):
+            path = os.path.join(self.image_dir, name)
+            if name.endswith(".jpg") and os.path.isfile(path):
+                files.append((os.path.getmtime(path), name[:-4], path))
+        for _, digest, path in sorted(files):
+            self._images[digest] = path
+        self._evict()
+
+    def _evict(self):
+        while len(self._images) > self.max_images:
+            _, old_path = self._images.popitem(last=False)
+            try:
+                os.remove(old_path)
+            except OSError as e:
+                logger.debug(f"删除精华图片缓存失败：{e}")
+
+    def configure(self, ttl: float, image_concurrency: int):
+        self.ttl = ttl
+        self._image_sem = asyncio.Semaphore(max(1, image_concurrency))
+
+    def invalidate(self, group_id: str):
+        group_id = str(group_id)
+        self._snapshots.pop(group_id, None)
+        self._inflight.pop(group_id, None)
+        self._generation[group_id] = self._generation.get(group_id, 0) + 1
+
+    async def get(self, client: CQHttp, group_id: str) -> List[EssenceEntry]:
+        """取本群精华列表（按设精时间从新到旧）"""
+        group_id = str(group_id)
+        cached = self._snapshots.get(group_id)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        fut = self._inflight.get(group_id)
+        if fut is None:
+            fut = asyncio.ensure_future(self._fetch(client, group_id))
+            self._inflight[group_id] = fut
+
+            def done(f: asyncio.Future):
+                # 期间失效过的话，表中已是新的请求
+                if self._inflight.get(group_id) is f:
+                    del self._inflight[group_id]
+
+            fut.add_done_callback(done)
+        return await asyncio.shield(fut)
+
+    async def _fetch(self, client: CQHttp, group_id: str) -> List[EssenceEntry]:
+        fetched_at = time.monotonic()
+        generation = self._generation.get(group_id, 0)
+        raw_list = await client.get_essence_msg_list(group_id=int(group_id))
+        entries = [EssenceEntry(raw) for raw in raw_list or []]
+        entries.sort(key=lambda e: e.set_at, reverse=True)
+        if self._generation.get(group_id, 0) == generation:
+            self._snapshots[group_id] = (fetched_at, entries)
+        return entries
+
+    @staticmethod
+    def format_page(
+        entries: List[EssenceEntry], index: int, total: int, count: int
+    ) -> str:
+        lines = [f"### 群精华（第{index}/{total}页，共{count}条）"]
+        for entry in entries:
+            lines.append(
+                f"**{entry.sender}**（{entry.sender_id}） {format_time(entry.sent_at)}\n\n"
+                f"{entry.text}\n\n"
+                f"—— {entry.operator} 设为精华 {format_time(entry.set_at)}"
+            )
+        return "\n\n---\n\n".join(lines)
+
+    async def fetch_images(self, urls: List[str]) -> List[str]:
+        """下载一批图片，返回成功的本地路径（顺序与 URL 一致，重复 URL 只下载一次）"""
+        unique = list(dict.fromkeys(urls))
+        paths = await asyncio.gather(*(self._fetch_image(url) for url in unique))
+        return [path for path in paths if path]
+
+    async def _fetch_image(self, url: str) -> Optional[str]:
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        path = self._images.get(digest)
+        if path and os.path.exists(path):
+            self._images.move_to_end(digest)
+            return path
+        fut = self._downloads.get(url)
+        if fut is None:
+            fut = asyncio.ensure_future(self._download(url))
+            self._downloads[url] = fut
+            fut.add_done_callback(lambda _: self._downloads.pop(url, None))
+        return await asyncio.shield(fut)
+
+    async def _download(self, url: str) -> Optional[str]:
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        save_path = os.path.join(self.image_dir, digest + ".jpg")
+        async with self._image_sem:
+            path = await download_image(url, save_path)
+        if not path:
+            return None
+        self._images[digest] = path
+        self._evict()
+        return path
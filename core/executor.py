@@ -0,0 +1,307 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from astrbot import logger
+
+T = TypeVar("T")
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+MODES = (INLINE, THREAD, PROCESS)
+
+# 各类任务值得移出事件循环的工作量下限（由 python -m core.executor 测得），
+# 低于下限时调度与传输的开销比计算本身还大，直接执行
+OFFLOAD_THRESHOLDS: Dict[str, int] = {
+    # 违禁词数 × 消息字数
+    "forbidden_words": 400_000,
+    # 归一化后的消息字数
+    "minhash": 100,
+    # 群成员数
+    "member_sort": 5_000,
+    # 图片字节数
+    "dhash": 0,
+}
+
+# 参数体积大、跨进程传输比计算本身更贵的任务，进程模式下改用线程池
+THREAD_KINDS = {"member_sort"}
+
+# 工作进程内常驻的状态（编译好的匹配器等），由进程池的 initializer 写入
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(state: Dict[str, Any]):
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def _call_state(name: str, method: str, args: tuple):
+    return getattr(_worker_state[name], method)(*args)
+
+
+class TaskExecutor:
+    """
+    CPU 密集任务的统一执行入口，三种模式：
+    - inline：在事件循环线程中直接执行，适合小型部署
+    - thread：放到线程池执行
+    - process：放到进程池执行，纯 Python 计算不再与事件循环争抢 GIL；
+      违禁词匹配器等常驻在工作进程中，每次只传输消息文本
+    会释放 GIL 的任务（图片解码缩放等）不论模式都放到线程池。
+    工作量低于 OFFLOAD_THRESHOLDS 的任务总是直接执行。
+    """
+
+    def __init__(self, mode: str = INLINE, workers: int = 2):
+        """
+        :param mode: inline / thread / process
+        :param workers: 线程池或进程池的大小
+        """
+        self.mode = INLINE
+        self.workers = 0
+        self._state: Dict[str, Any] = {}
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self.counts: Dict[str, int] = {INLINE: 0, THREAD: 0, PROCESS: 0}
+        self.configure(mode, workers)
+
+    def configure(self, mode: str, workers: int):
+        if mode not in MODES:
+            logger.warning(f"未知的任务执行模式：{mode}，改用 {INLINE}")
+            mode = INLINE
+        workers = max(1, workers)
+        if (mode, workers) != (self.mode, self.workers):
+            self._close_pools(wait=False)
+        self.mode = mode
+        self.workers = workers
+
+    def set_state(self, name: str, obj: Any):
+        """
+        更新常驻状态（须可被 pickle）。
+        进程池随之作废，下次使用时以新状态重建，旧池中正在执行的任务照常完成。
+        """
+        self._state[name] = obj
+        if self._processes is not None:
+            self._processes.shutdown(wait=False)
+            self._processes = None
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="qqadmin"
+            )
+        return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            # 事件循环所在进程有多个线程，fork 不安全，使用 spawn
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(dict(self._state),),
+            )
+        return self._processes
+
+    def _route(self, kind: str, size: int, gil_free: bool = False) -> str:
+        if size < OFFLOAD_THRESHOLDS.get(kind, 0):
+            return INLINE
+        if gil_free or (self.mode == PROCESS and kind in THREAD_KINDS):
+            return THREAD
+        return self.mode
+
+    async def run(
+        self,
+        kind: str,
+        fn: Callable[..., T],
+        *args: Any,
+        size: int = 0,
+        gil_free: bool = False,
+    ) -> T:
+        """
+        执行一个任务。进程模式下 fn 与参数会被 pickle，应为模块级函数与简单数据。
+        :param kind: 任务类别，决定直接执行的工作量下限
+        :param size: 本次任务的工作量估计
+        :param gil_free: 任务主要耗时在会释放 GIL 的 C 代码中
+        """
+        route = self._route(kind, size, gil_free)
+        self.counts[route] += 1
+        if route == INLINE:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        if route == THREAD:
+            return await loop.run_in_executor(self._thread_pool(), fn, *args)
+        try:
+            return await loop.run_in_executor(self._process_pool(), fn, *args)
+        except BrokenProcessPool as e:
+            self._processes = None
+            logger.error(f"进程池异常，本次改为直接执行：{e}")
+            return fn(*args)
+
+    async def call(self, kind: str, name: str, method: str, *args: Any, size: int = 0):
+        """调用常驻状态 name 的方法，进程模式下只把参数发给工作进程"""
+        route = self._route(kind, size)
+        self.counts[route] += 1
+        if route == PROCESS:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    self._process_pool(), _call_state, name, method, args
+                )
+            except BrokenProcessPool as e:
+                self._processes = None
+                logger.error(f"进程池异常，本次改为直接执行：{e}")
+                route = INLINE
+        fn = getattr(self._state[name], method)
+        if route == INLINE:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._thread_pool(), fn, *args
+        )
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "workers": self.workers, **self.counts}
+
+    def _close_pools(self, wait: bool):
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+            self._processes = None
+
+    async def shutdown(self):
+        await asyncio.to_thread(self._close_pools, True)
+
+
+def _bench_sort(members: list) -> list:
+    return sorted(members, key=lambda m: m.get("join_time", 0))
+
+
+def _bench_dhash(data: bytes) -> int:
+    from core.image_filter import dhash
+
+    return dhash(data)
+
+
+async def _benchmark():
+    # 交叉点基准：python -m core.executor
+    # 每种任务分别测量单次耗时与期间事件循环的最长卡顿，卡顿超过 2ms 才值得移出事件循环
+    import io
+    import random
+    import time
+
+    from core.dup_detector import MinHasher
+    from core.text_normalizer import TextNormalizer, WordMatcher
+
+    rng = random.Random(0)
+
+    def rand_text(n: int, alphabet: str = "abcdefghijklmnop群管插件测试消息") -> str:
+        return "".join(rng.choice(alphabet) for _ in range(n))
+
+    async def measure(factory, n: int) -> tuple[float, float]:
+        # 预热：让进程池的每个工作进程都启动并加载好常驻状态
+        await asyncio.gather(*(factory() for _ in range(4)))
+        stall = 0.0
+        running = True
+
+        async def ticker():
+            nonlocal stall
+            while running:
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                stall = max(stall, time.perf_counter() - start - 0.001)
+
+        tick = asyncio.create_task(ticker())
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        for _ in range(n):
+            await factory()
+            # 让出事件循环，直接执行时卡顿只算单次调用
+            await asyncio.sleep(0)
+        cost = (time.perf_counter() - start) / n
+        running = False
+        await tick
+        return cost * 1000, stall * 1000
+
+    executors = {mode: TaskExecutor(mode, workers=2) for mode in MODES}
+    OFFLOAD_THRESHOLDS.update({kind: 0 for kind in OFFLOAD_THRESHOLDS})
+
+    def report(name: str, size: str, results: Dict[str, tuple[float, float]]):
+        cols = "  ".join(
+            f"{mode} {cost:>8.2f}ms/卡顿{stall:>7.2f}ms"
+            for mode, (cost, stall) in results.items()
+        )
+        if results[INLINE][1] < 2:
+            verdict = INLINE
+        else:
+            verdict = min((THREAD, PROCESS), key=lambda m: results[m][1])
+        print(f"{name:<8}{size:<16} {cols}  -> {verdict}")
+
+    normalizer = TextNormalizer()
+    # 违禁词与消息字符集不相交，测的是全部查找一遍的最坏情况
+    message = rand_text(100)
+    for n_words in (100, 1_000, 5_000, 20_000):
+        words = [
+            (w, normalizer.normalize(w))
+            for w in (rand_text(4, "甲乙丙丁戊己庚辛壬癸") for _ in range(n_words))
+        ]
+        matcher = WordMatcher(normalizer, words)
+        results = {}
+        for mode, ex in executors.items():
+            ex.set_state("forbidden", matcher)
+            results[mode] = await measure(
+                lambda: ex.call("forbidden_words", "forbidden", "find", message), 50
+            )
+        report("违禁词", f"词数×字数={n_words * len(message)}", results)
+
+    hasher = MinHasher()
+    for length in (20, 100, 500, 2_000):
+        text = rand_text(length)
+        results = {}
+        for mode, ex in executors.items():
+            ex.set_state("minhash", hasher)
+            results[mode] = await measure(
+                lambda: ex.call("minhash", "minhash", "signature", text), 20
+            )
+        report("MinHash", f"字数={length}", results)
+
+    for count in (500, 5_000, 50_000):
+        members = [
+            {"user_id": i, "join_time": rng.randrange(10**9), "nickname": rand_text(8)}
+            for i in range(count)
+        ]
+        results = {}
+        for mode, ex in executors.items():
+            results[mode] = await measure(
+                lambda: ex.run("member_sort", _bench_sort, members, size=count), 10
+            )
+        report("成员排序", f"人数={count}", results)
+
+    try:
+        from PIL import Image as PILImage
+
+        for side in (128, 512, 2048):
+            img = PILImage.effect_noise((side, side), 64).convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG")
+            data = buf.getvalue()
+            results = {}
+            for mode, ex in executors.items():
+                results[mode] = await measure(
+                    lambda: ex.run(
+                        "dhash", _bench_dhash, data, size=len(data), gil_free=True
+                    ),
+                    10,
+                )
+            report("dHash", f"字节={len(data)}", results)
+    except Exception as e:
+        print(f"跳过 dHash 基准：{e}")
+
+    for ex in executors.values():
+        await ex.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
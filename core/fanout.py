@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from astrbot import logger
+
+from .outbound import TokenBucket
+
+
+class FanoutJob:
+    """一次跨群批量操作及其进度"""
+
+    __slots__ = ("job_id", "action", "payload", "targets", "done", "failed", "created")
+
+    def __init__(
+        self,
+        job_id: str,
+        action: str,
+        payload: dict,
+        targets: List[str],
+        done: Optional[List[str]] = None,
+        failed: Optional[Dict[str, str]] = None,
+        created: Optional[float] = None,
+    ):
+        self.job_id = job_id
+        self.action = action
+        self.payload = payload
+        self.targets = targets
+        self.done = set(done or [])
+        # group_id -> 最近一次失败原因，重试成功后移除
+        self.failed: Dict[str, str] = failed or {}
+        self.created = time.time() if created is None else created
+
+    @property
+    def remaining(self) -> List[str]:
+        return [gid for gid in self.targets if gid not in self.done]
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "action": self.action,
+            "payload": self.payload,
+            "targets": self.targets,
+            "done": sorted(self.done),
+            "failed": self.failed,
+            "created": self.created,
+        }
+
+
+class FanoutEngine:
+    """
+    跨群批量操作。
+    对目标群以有限并发、令牌桶限速依次执行操作，按固定间隔回报进度；
+    已完成的群按批写入检查点文件，中断（失败、停止、重启）后以同一任务继续时跳过已完成的群。
+    全部成功后删除检查点。
+    """
+
+    def __init__(
+        self,
+        json_path: str,
+        concurrency: int = 5,
+        rate: float = 2,
+        progress_interval: float = 10,
+    ):
+        """
+        :param concurrency: 同时处理的群数
+        :param rate: 每秒最多处理的群数
+        :param progress_interval: 进度回报间隔（秒）
+        """
+        self.path = json_path
+        self.configure(concurrency, rate, progress_interval)
+        self.jobs: Dict[str, FanoutJob] = {}
+        self._running: Dict[str, asyncio.Event] = {}
+        self._load()
+
+    def configure(self, concurrency: int, rate: float, progress_interval: float):
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.progress_interval = progress_interval
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data:
+                job = FanoutJob(**item)
+                self.jobs[job.job_id] = job
+        except Exception as e:
+            logger.error(f"加载跨群任务检查点失败: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                [job.to_dict() for job in self.jobs.values()], f, ensure_ascii=False
+            )
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def make_id(action: str, payload: dict) -> str:
+        """同一操作、同一参数得到同一任务编号，重复下达即续跑"""
+        raw = json.dumps([action, payload], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()[:8]
+
+    def prepare(self, action: str, payload: dict, targets: List[str]) -> FanoutJob:
+        """取得未完成的同一任务，没有则新建；新出现的目标群会追加进去"""
+        job_id = self.make_id(action, payload)
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = self.jobs[job_id] = FanoutJob(job_id, action, payload, targets)
+        else:
+            known = set(job.targets)
+            job.targets.extend(gid for gid in targets if gid not in known)
+        return job
+
+    def discard(self, job_id: str):
+        """放弃未完成的任务（如已被相反的操作取代）"""
+        if job_id not in self._running and self.jobs.pop(job_id, None):
+            self._save()
+
+    def is_running(self, job_id: str) -> bool:
+        return job_id in self._running
+
+    def stop(self, job_id: Optional[str] = None) -> List[str]:
+        """停止指定任务（不指定则全部），已派发的群会执行完，返回被停止的任务编号"""
+        stopped = []
+        for jid, flag in self._running.items():
+            if job_id in (None, jid):
+                flag.set()
+                stopped.append(jid)
+        return stopped
+
+    async def run(
+        self,
+        job: FanoutJob,
+        op: Callable[[str], Awaitable[None]],
+        on_progress: Optional[Callable[[FanoutJob], Awaitable[None]]] = None,
+        paced: bool = True,
+        save_every: int = 20,
+        commit: Optional[Callable[[], None]] = None,
+    ):
+        """
+        执行任务中尚未完成的群，返回时检查点已写入。
+        :param op: 对单个群执行的操作，抛出异常即视为该群失败
+        :param paced: 是否按速率限制派发（纯本地操作可关闭）
+        :param save_every: 每完成多少个群写一次检查点
+        :param commit: 写检查点前调用，操作结果先于进度落盘（用于批量保存的本地操作）
+        """
+        if job.job_id in self._running:
+            raise RuntimeError(f"任务 {job.job_id} 正在执行")
+        stopping = self._running[job.job_id] = asyncio.Event()
+        bucket = TokenBucket(self.rate, self.concurrency) if paced else None
+        sem = asyncio.Semaphore(self.concurrency)
+        unsaved = 0
+        last_report = time.monotonic()
+
+        def checkpoint():
+            if commit:
+                commit()
+            self._save()
+
+        async def handle(group_id: str):
+            nonlocal unsaved, last_report
+            async with sem:
+                if stopping.is_set():
+                    return
+                if bucket:
+                    await bucket.acquire()
+                try:
+                    await op(group_id)
+                    job.done.add(group_id)
+                    job.failed.pop(group_id, None)
+                except Exception as e:
+                    job.failed[group_id] = str(e) or type(e).__name__
+                unsaved += 1
+                if unsaved >= save_every:
+                    unsaved = 0
+                    checkpoint()
+                if on_progress and time.monotonic() - last_report >= self.progress_interval:
+                    last_report = time.monotonic()
+                    try:
+                        await on_progress(job)
+                    except Exception as e:
+                        logger.warning(f"跨群任务进度回报失败：{e}")
+
+        try:
+            await asyncio.gather(*(handle(gid) for gid in job.remaining))
+        finally:
+            del self._running[job.job_id]
+            if not job.remaining:
+                self.jobs.pop(job.job_id, None)
+            try:
+                checkpoint()
+            except Exception as e:
+                logger.error(f"保存跨群任务检查点失败: {e}")
@@ -72,10 +72,11 @@ class GroupJoinManager:
     def get_keywords(self, group_id: str) -> List[str]:
         return self.data.accept_keywords.get(group_id, [])
 
-    def add_reject_id(self, group_id: str, ids: List[str]):
+    def add_reject_id(self, group_id: str, ids: List[str], save: bool = True):
         self.data.reject_ids.setdefault(group_id, []).extend(ids)
         self.data.reject_ids[group_id] = list(set(self.data.reject_ids[group_id]))
-        self.data.save()
+        if save:
+            self.data.save()
 
     def remove_reject_id(self, group_id: str, ids: List[str]):
         if group_id in self.data.reject_ids:
@@ -0,0 +1,206 @@
+import asyncio
+import io
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import ClientSession, ClientTimeout
+from astrbot import logger
+from PIL import Image as PILImage
+
+from .executor import TaskExecutor
+
+
+def dhash(data: bytes, size: int = 8) -> int:
+    """计算图片的差值哈希（64位），对缩放、压缩、轻微改动不敏感"""
+    with PILImage.open(io.BytesIO(data)) as img:
+        img.seek(0)  # 动图取第一帧
+        gray = img.convert("L").resize(
+            (size + 1, size), PILImage.Resampling.LANCZOS
+        )
+        pixels = list(gray.getdata())
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """按汉明距离组织的 BK 树，用于查找相近的图片哈希"""
+
+    def __init__(self):
+        self.root: Optional[Tuple[int, Dict[int, tuple]]] = None
+        self.size = 0
+
+    def add(self, value: int) -> bool:
+        """添加哈希，已存在时返回 False"""
+        if self.root is None:
+            self.root = (value, {})
+            self.size = 1
+            return True
+        node = self.root
+        while True:
+            dist = hamming(value, node[0])
+            if dist == 0:
+                return False
+            child = node[1].get(dist)
+            if child is None:
+                node[1][dist] = (value, {})
+                self.size += 1
+                return True
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int]]:
+        """返回与 value 距离不超过 radius 的 (距离, 哈希) 列表"""
+        if self.root is None:
+            return []
+        results = []
+        stack = [self.root]
+        while stack:
+            node_value, children = stack.pop()
+            dist = hamming(value, node_value)
+            if dist <= radius:
+                results.append((dist, node_value))
+            # 三角不等式剪枝：只有边长落在 [dist-radius, dist+radius] 的子树可能命中
+            for edge, child in children.items():
+                if dist - radius <= edge <= dist + radius:
+                    stack.append(child)
+        return results
+
+
+class ImageFilter:
+    """
+    违禁图片过滤：下载图片后在线程池中计算感知哈希，
+    在 BK 树中按汉明距离查找相近的违禁图片。
+    图片哈希按文件 ID 缓存，重复发送的图片无需再次下载和计算。
+    """
+
+    def __init__(
+        self,
+        json_path: str,
+        max_distance: int = 6,
+        concurrency: int = 4,
+        cache_size: int = 4096,
+        executor: Optional[TaskExecutor] = None,
+    ):
+        self.path = json_path
+        self.executor = executor
+        self.cache_size = cache_size
+        self.configure(max_distance, concurrency)
+        self._cache: OrderedDict[str, Optional[int]] = OrderedDict()
+        self._session: Optional[ClientSession] = None
+        self.hashes: List[int] = []
+        self.tree = BKTree()
+        self._load()
+
+    def configure(self, max_distance: int, concurrency: int):
+        """更新匹配距离与下载并发数，已缓存的图片哈希保留"""
+        self.max_distance = max_distance
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.hashes = [int(h, 16) for h in data.get("hashes", [])]
+        except Exception as e:
+            logger.error(f"加载违禁图片数据失败: {e}")
+        self._rebuild()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"hashes": [f"{h:016x}" for h in self.hashes]},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    def _rebuild(self):
+        self.tree = BKTree()
+        for h in self.hashes:
+            self.tree.add(h)
+
+    @property
+    def size(self) -> int:
+        return self.tree.size
+
+    async def _fetch(self, url: str) -> bytes:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(timeout=ClientTimeout(total=15))
+        async with self._session.get(url.replace("https://", "http://")) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+
+    async def get_hash(self, url: str, file_id: str | None = None) -> Optional[int]:
+        """获取图片哈希，优先读缓存；下载或解析失败返回 None"""
+        key = file_id or url
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        async with self._sem:
+            try:
+                data = await self._fetch(url)
+                if self.executor:
+                    value = await self.executor.run(
+                        "dhash", dhash, data, size=len(data), gil_free=True
+                    )
+                else:
+                    value = await asyncio.to_thread(dhash, data)
+            except Exception as e:
+                logger.warning(f"计算图片哈希失败：{e}")
+                value = None
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    async def match(self, url: str, file_id: str | None = None) -> Optional[int]:
+        """检查图片是否命中违禁图片，命中时返回汉明距离"""
+        if not self.size:
+            return None
+        value = await self.get_hash(url, file_id)
+        if value is None:
+            return None
+        hits = self.tree.search(value, self.max_distance)
+        return min(dist for dist, _ in hits) if hits else None
+
+    async def add(self, url: str, file_id: str | None = None) -> Optional[bool]:
+        """添加违禁图片，返回 None 表示图片获取失败，False 表示已存在"""
+        value = await self.get_hash(url, file_id)
+        if value is None:
+            return None
+        if not self.tree.add(value):
+            return False
+        self.hashes.append(value)
+        self._save()
+        return True
+
+    async def remove(self, url: str, file_id: str | None = None) -> Optional[int]:
+        """删除与该图片相近的所有违禁图片，返回删除数量"""
+        value = await self.get_hash(url, file_id)
+        if value is None:
+            return None
+        before = len(self.hashes)
+        self.hashes = [
+            h for h in self.hashes if hamming(h, value) > self.max_distance
+        ]
+        removed = before - len(self.hashes)
+        if removed:
+            self._rebuild()
+            self._save()
+        return removed
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
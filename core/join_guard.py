@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aiocqhttp import CQHttp
+from astrbot import logger
+
+
+class PendingJoin:
+    __slots__ = ("client", "user_id", "flag")
+
+    def __init__(self, client: CQHttp, user_id: str, flag: str):
+        self.client = client
+        self.user_id = user_id
+        self.flag = flag
+
+
+class JoinGuard:
+    """
+    进群申请防刷检测。
+    按群统计滑动窗口内的进群申请数，超过阈值后该群进入封锁状态：
+    封锁期间的申请先排队，再按批次以有限并发拒绝（或搁置），
+    封锁开始与结束时各只向管理员发送一条汇总通知。
+    """
+
+    def __init__(
+        self,
+        notify: Callable[[CQHttp, str, str], Awaitable[None]],
+        window: float = 60,
+        threshold: int = 10,
+        lockdown_time: float = 300,
+        reject: bool = True,
+        reject_reason: str = "",
+        batch_interval: float = 5,
+        concurrency: int = 5,
+        on_reject: Optional[Callable[[str, str], None]] = None,
+    ):
+        """
+        :param notify: 发送汇总通知的回调，参数为 (client, group_id, message)
+        :param reject: True 则拒绝封锁期间的申请，False 则搁置交由管理员处理
+        :param on_reject: 成功拒绝一个申请后的回调，参数为 (group_id, user_id)
+        """
+        self.notify = notify
+        self.on_reject = on_reject
+        self.configure(
+            window=window,
+            threshold=threshold,
+            lockdown_time=lockdown_time,
+            reject=reject,
+            reject_reason=reject_reason,
+            batch_interval=batch_interval,
+            concurrency=concurrency,
+        )
+
+        self._arrivals: Dict[str, deque[float]] = defaultdict(deque)
+        self._locked_until: Dict[str, float] = {}
+        self._pending: Dict[str, List[PendingJoin]] = defaultdict(list)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def configure(
+        self,
+        window: float,
+        threshold: int,
+        lockdown_time: float,
+        reject: bool,
+        reject_reason: str,
+        batch_interval: float,
+        concurrency: int,
+    ):
+        """更新参数，已在封锁中的群按原截止时间继续"""
+        self.window = window
+        self.threshold = max(1, threshold)
+        self.lockdown_time = lockdown_time
+        self.reject = reject
+        self.reject_reason = reject_reason
+        self.batch_interval = batch_interval
+        self.concurrency = max(1, concurrency)
+
+    def is_locked(self, group_id: str) -> bool:
+        return self._locked_until.get(group_id, 0) > time.monotonic()
+
+    def observe(self, group_id: str) -> bool:
+        """记录一次进群申请，返回该群当前是否处于封锁状态"""
+        now = time.monotonic()
+        if self.is_locked(group_id):
+            return True
+        arrivals = self._arrivals[group_id]
+        arrivals.append(now)
+        while arrivals and now - arrivals[0] > self.window:
+            arrivals.popleft()
+        if len(arrivals) >= self.threshold:
+            self._locked_until[group_id] = now + self.lockdown_time
+            arrivals.clear()
+            logger.warning(
+                f"群 {group_id} 在 {self.window}s 内收到 {self.threshold} 个以上进群申请，进入封锁"
+            )
+            return True
+        return False
+
+    def enqueue(self, client: CQHttp, group_id: str, user_id: str, flag: str):
+        """将封锁期间的申请加入队列，由后台任务分批处理"""
+        self._pending[group_id].append(PendingJoin(client, user_id, flag))
+        task = self._tasks.get(group_id)
+        if task is None or task.done():
+            self._tasks[group_id] = asyncio.create_task(
+                self._lockdown_loop(client, group_id)
+            )
+
+    async def _lockdown_loop(self, client: CQHttp, group_id: str):
+        action = "拒绝" if self.reject else "搁置"
+        await self.notify(
+            client,
+            group_id,
+            f"【进群防刷】本群进群申请激增，已进入封锁，"
+            f"{int(self.lockdown_time)}秒内的申请将被自动{action}",
+        )
+        total = handled = failed = 0
+        held: List[str] = []
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def handle(item: PendingJoin) -> bool:
+            async with sem:
+                try:
+                    await item.client.set_group_add_request(
+                        flag=item.flag,
+                        sub_type="add",
+                        approve=False,
+                        reason=self.reject_reason,
+                    )
+                    if self.on_reject:
+                        self.on_reject(group_id, item.user_id)
+                    return True
+                except Exception as e:
+                    logger.warning(f"群 {group_id} 拒绝 {item.user_id} 的申请失败：{e}")
+                    return False
+
+        try:
+            while self.is_locked(group_id) or self._pending[group_id]:
+                await asyncio.sleep(self.batch_interval)
+                batch, self._pending[group_id] = self._pending[group_id], []
+                if not batch:
+                    continue
+                total += len(batch)
+                if self.reject:
+                    results = await asyncio.gather(*(handle(item) for item in batch))
+                    handled += sum(results)
+                    failed += len(results) - sum(results)
+                else:
+                    held.extend(item.user_id for item in batch)
+        finally:
+            self._pending.pop(group_id, None)
+            self._locked_until.pop(group_id, None)
+
+        summary = f"【进群防刷】本群封锁已解除，期间共收到{total}个进群申请"
+        if self.reject:
+            summary += f"，已拒绝{handled}个" + (f"，{failed}个处理失败" if failed else "")
+        elif held:
+            summary += "，均已搁置待处理：\n" + "\n".join(held)
+        await self.notify(client, group_id, summary)
+
+    async def shutdown(self):
+        """取消所有封锁任务"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
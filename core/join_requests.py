@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from astrbot import logger
+
+
+class JoinRequest:
+    __slots__ = ("group_id", "user_id", "nickname", "flag", "comment", "ts")
+
+    def __init__(
+        self,
+        group_id: str,
+        user_id: str,
+        nickname: str,
+        flag: str,
+        comment: str = "",
+        ts: Optional[float] = None,
+    ):
+        self.group_id = group_id
+        self.user_id = user_id
+        self.nickname = nickname
+        self.flag = flag
+        self.comment = comment
+        self.ts = time.time() if ts is None else ts
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class JoinRequestStore:
+    """
+    待处理的进群申请，持久化在 json 文件中，超过有效期自动丢弃。
+    按 flag、按群、按通知消息ID 三处索引：引用通知即可直接取回申请，
+    不必从通知文本中解析 flag；也可一次取出某群的全部待处理申请。
+    变动后延迟一小段时间合并写盘，写盘在线程中进行，进群高峰时不阻塞事件循环。
+    """
+
+    def __init__(self, json_path: str, ttl: float = 86400, save_delay: float = 2):
+        """
+        :param ttl: 申请的有效期（秒）
+        :param save_delay: 变动后延迟多久写盘（秒）
+        """
+        self.path = json_path
+        self.ttl = ttl
+        self.save_delay = save_delay
+        self._save_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._by_flag: Dict[str, JoinRequest] = {}
+        self._by_group: Dict[str, Dict[str, JoinRequest]] = {}
+        # 通知消息ID -> flag 列表（一条通知可能合并了多条申请）
+        self._by_message: Dict[str, List[str]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get("requests", []):
+                self._index(JoinRequest(**item))
+            self._by_message = data.get("messages", {})
+        except Exception as e:
+            logger.error(f"加载待处理进群申请失败: {e}")
+        self._purge()
+
+    def _snapshot(self) -> dict:
+        return {
+            "requests": [req.to_dict() for req in self._by_flag.values()],
+            "messages": {mid: list(flags) for mid, flags in self._by_message.items()},
+        }
+
+    def _write(self, data: dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _save(self):
+        """标记有变动，稍后合并写盘"""
+        if self._save_task is not None and not self._save_task.done():
+            return
+
+        async def save_later():
+            await asyncio.sleep(self.save_delay)
+            # 写盘期间的新变动另起一次保存
+            self._save_task = None
+            try:
+                async with self._write_lock:
+                    await asyncio.to_thread(self._write, self._snapshot())
+            except Exception as e:
+                logger.error(f"保存待处理进群申请失败: {e}")
+
+        self._save_task = asyncio.create_task(save_later())
+
+    async def close(self):
+        """立即写入尚未落盘的变动"""
+        if self._save_task is None:
+            return
+        if not self._save_task.done():
+            self._save_task.cancel()
+        self._save_task = None
+        self._write(self._snapshot())
+
+    def _index(self, req: JoinRequest):
+        self._by_flag[req.flag] = req
+        self._by_group.setdefault(req.group_id, {})[req.flag] = req
+
+    def _drop(self, flag: str) -> Optional[JoinRequest]:
+        req = self._by_flag.pop(flag, None)
+        if req:
+            group = self._by_group.get(req.group_id, {})
+            group.pop(flag, None)
+            if not group:
+                self._by_group.pop(req.group_id, None)
+        return req
+
+    def _purge(self) -> bool:
+        """清理过期申请及不再指向任何申请的消息索引，返回是否有变动"""
+        deadline = time.time() - self.ttl
+        expired = [flag for flag, req in self._by_flag.items() if req.ts < deadline]
+        for flag in expired:
+            self._drop(flag)
+        stale = [
+            mid
+            for mid, flags in self._by_message.items()
+            if not any(flag in self._by_flag for flag in flags)
+        ]
+        for mid in stale:
+            del self._by_message[mid]
+        return bool(expired or stale)
+
+    def add(self, req: JoinRequest):
+        self._purge()
+        self._index(req)
+        self._save()
+
+    def bind_message(self, message_id, flags: Iterable[str]):
+        """记录通知消息对应的申请"""
+        self._by_message[str(message_id)] = list(flags)
+        self._save()
+
+    def by_message(self, message_id) -> List[JoinRequest]:
+        """取回某条通知消息对应的待处理申请"""
+        flags = self._by_message.get(str(message_id), [])
+        return [self._by_flag[flag] for flag in flags if flag in self._by_flag]
+
+    def get(self, flag: str) -> Optional[JoinRequest]:
+        return self._by_flag.get(flag)
+
+    def pending(self, group_id: str) -> List[JoinRequest]:
+        """某群全部未过期的待处理申请，按申请时间排序"""
+        if self._purge():
+            self._save()
+        return sorted(self._by_group.get(group_id, {}).values(), key=lambda r: r.ts)
+
+    def remove(self, flags: Iterable[str]):
+        """移除已处理的申请（批量处理后统一保存一次）"""
+        removed = [flag for flag in flags if self._drop(flag)]
+        if removed:
+            self._purge()
+            self._save()
+
+    def remove_user(self, group_id: str, user_id: str):
+        """用户已进群（如被其他管理员同意）时移除其申请"""
+        flags = [
+            flag
+            for flag, req in self._by_group.get(group_id, {}).items()
+            if req.user_id == user_id
+        ]
+        self.remove(flags)
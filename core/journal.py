@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+from astrbot import logger
+
+_SEGMENT_PATTERN = re.compile(r"^journal-(\d{6})\.jsonl$")
+
+
+class ModerationJournal:
+    """
+    处罚记录日志：只追加的 JSONL 分段文件，单段写满后轮转，超出段数时删除最旧的段。
+    每段写满封存时生成一个 (群, 用户) -> 行偏移 的索引文件；内存中另有一份 (群, 用户) -> 所在分段 的
+    精简索引，查询时只加载确实含有该用户记录的分段索引，按偏移直接定位行，无需扫描整个日志。
+    写入先进入内存缓冲区，由后台任务批量落盘。
+    启动时的目录扫描与索引加载在线程中进行，首次写入或查询前等待其完成。
+    """
+
+    def __init__(
+        self,
+        dir_path: str,
+        segment_size: int = 8 * 1024 * 1024,
+        max_segments: int = 32,
+        flush_interval: float = 1,
+        batch_size: int = 500,
+        index_cache_size: int = 4,
+    ):
+        """
+        :param segment_size: 单个分段的大小上限（字节）
+        :param max_segments: 最多保留的分段数
+        :param flush_interval: 批量落盘的间隔（秒）
+        :param index_cache_size: 内存中缓存的已封存分段索引数
+        """
+        self.dir = dir_path
+        self.configure(segment_size, max_segments)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.index_cache_size = max(1, index_cache_size)
+
+        self._buffer: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._segments: List[int] = []  # 升序，最后一个为当前写入段
+        self._active_size = 0
+        # 当前写入段的索引：key -> 行偏移列表
+        self._active_index: Dict[str, List[int]] = defaultdict(list)
+        # 已封存分段的索引缓存：segment -> {key: 行偏移列表}
+        self._index_cache: OrderedDict[int, Dict[str, List[int]]] = OrderedDict()
+        # 已封存分段的精简索引：key -> 含有该 key 的分段（升序）
+        self._key_segments: Dict[str, List[int]] = defaultdict(list)
+        self._ready: Optional[asyncio.Future] = None
+
+    def configure(self, segment_size: int, max_segments: int):
+        """更新分段大小与保留段数，在下次轮转时生效"""
+        self.segment_size = segment_size
+        self.max_segments = max(2, max_segments)
+
+    @staticmethod
+    def _key(group_id: str, user_id: str) -> str:
+        return f"{group_id}:{user_id}"
+
+    def _segment_path(self, seg: int) -> str:
+        return os.path.join(self.dir, f"journal-{seg:06d}.jsonl")
+
+    def _index_path(self, seg: int) -> str:
+        return os.path.join(self.dir, f"journal-{seg:06d}.idx")
+
+    async def _ensure_open(self):
+        """首次调用时在线程中加载已有分段，之后直接返回；加载失败时下次调用重试"""
+        if self._ready is None or (
+            self._ready.done() and self._ready.exception() is not None
+        ):
+            self._ready = asyncio.ensure_future(asyncio.to_thread(self._open))
+        await asyncio.shield(self._ready)
+
+    def _open(self):
+        self._active_index = defaultdict(list)
+        self._key_segments = defaultdict(list)
+        os.makedirs(self.dir, exist_ok=True)
+        self._segments = sorted(
+            int(m.group(1))
+            for name in os.listdir(self.dir)
+            if (m := _SEGMENT_PATTERN.match(name))
+        )
+        if not self._segments:
+            self._segments = [1]
+            return
+        # 重建当前写入段的索引（至多扫描一个分段）
+        active = self._segments[-1]
+        offset = 0
+        try:
+            with open(self._segment_path(active), "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        key = self._key(entry["group"], entry["user"])
+                        self._active_index[key].append(offset)
+                    except Exception:
+                        pass
+                    offset += len(line)
+        except OSError as e:
+            logger.error(f"加载处罚记录失败：{e}")
+        self._active_size = offset
+        # 补齐缺失的封存索引，并建立精简索引
+        for seg in self._segments[:-1]:
+            if os.path.exists(self._index_path(seg)):
+                index = self._read_index(seg)
+            else:
+                index = self._scan_segment(seg)
+                self._write_index(seg, index)
+            for key in index:
+                self._key_segments[key].append(seg)
+
+    def _scan_segment(self, seg: int) -> Dict[str, List[int]]:
+        index: Dict[str, List[int]] = defaultdict(list)
+        offset = 0
+        with open(self._segment_path(seg), "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    index[self._key(entry["group"], entry["user"])].append(offset)
+                except Exception:
+                    pass
+                offset += len(line)
+        return index
+
+    def _write_index(self, seg: int, index: Dict[str, List[int]]):
+        with open(self._index_path(seg), "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+
+    def _read_index(self, seg: int) -> Dict[str, List[int]]:
+        try:
+            with open(self._index_path(seg), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return self._scan_segment(seg)
+
+    async def _load_index(self, seg: int) -> Dict[str, List[int]]:
+        index = self._index_cache.get(seg)
+        if index is not None:
+            self._index_cache.move_to_end(seg)
+            return index
+        index = await asyncio.to_thread(self._read_index, seg)
+        self._index_cache[seg] = index
+        if len(self._index_cache) > self.index_cache_size:
+            self._index_cache.popitem(last=False)
+        return index
+
+    def record(
+        self,
+        group_id: str,
+        user_id: str,
+        action: str,
+        operator: str = "",
+        detail: str = "",
+    ):
+        """记录一次处罚（非阻塞，后台批量写入）"""
+        self._buffer.append(
+            {
+                "ts": int(time.time()),
+                "group": str(group_id),
+                "user": str(user_id),
+                "action": action,
+                "operator": str(operator),
+                "detail": detail,
+            }
+        )
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._writer())
+
+    async def _writer(self):
+        try:
+            await self._ensure_open()
+        except Exception as e:
+            # 记录留在缓冲区，下次写入时重试加载
+            logger.error(f"加载处罚记录失败：{e}")
+            return
+        while self._buffer:
+            await asyncio.sleep(self.flush_interval)
+            batch = self._buffer[: self.batch_size]
+            self._buffer = self._buffer[self.batch_size :]
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"写入处罚记录失败：{e}")
+
+    async def _flush(self, batch: List[dict]):
+        if self._active_size >= self.segment_size:
+            await self._rotate()
+        lines = [
+            (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            for entry in batch
+        ]
+        path = self._segment_path(self._segments[-1])
+
+        def write():
+            with open(path, "ab") as f:
+                f.write(b"".join(lines))
+
+        await asyncio.to_thread(write)
+        # 写入成功后才建立索引，查询不会读到未落盘的行
+        offset = self._active_size
+        for entry, line in zip(batch, lines):
+            self._active_index[self._key(entry["group"], entry["user"])].append(offset)
+            offset += len(line)
+        self._active_size = offset
+
+    async def _rotate(self):
+        sealed = self._segments[-1]
+        index = dict(self._active_index)
+        await asyncio.to_thread(self._write_index, sealed, index)
+        self._segments.append(sealed + 1)
+        self._active_index = defaultdict(list)
+        self._active_size = 0
+        for key in index:
+            self._key_segments[key].append(sealed)
+        removed = set()
+        while len(self._segments) > self.max_segments:
+            old = self._segments.pop(0)
+            removed.add(old)
+            self._index_cache.pop(old, None)
+            for path in (self._segment_path(old), self._index_path(old)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if removed:
+            for key in list(self._key_segments):
+                segs = [seg for seg in self._key_segments[key] if seg not in removed]
+                if segs:
+                    self._key_segments[key] = segs
+                else:
+                    del self._key_segments[key]
+
+    def _read_lines(self, seg: int, offsets: List[int]) -> List[dict]:
+        entries = []
+        with open(self._segment_path(seg), "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                try:
+                    entries.append(json.loads(f.readline()))
+                except ValueError:
+                    pass
+        return entries
+
+    async def query(self, group_id: str, user_id: str, limit: int = 20) -> List[dict]:
+        """查询某群某用户最近的处罚记录，按时间倒序"""
+        await self._ensure_open()
+        key = self._key(group_id, user_id)
+        results: List[dict] = []
+        # 取快照：查询期间可能发生轮转
+        segments = list(self._segments)
+        active, active_index, live = segments[-1], self._active_index, set(segments)
+        candidates = [active] + [
+            seg for seg in reversed(self._key_segments.get(key, ())) if seg in live
+        ]
+        for seg in candidates:
+            try:
+                if seg == active:
+                    offsets = list(active_index.get(key, ()))
+                else:
+                    offsets = (await self._load_index(seg)).get(key, [])
+                if not offsets:
+                    continue
+                wanted = offsets[-(limit - len(results)) :]
+                entries = await asyncio.to_thread(self._read_lines, seg, wanted)
+            except OSError:
+                # 分段在查询期间被轮转删除
+                continue
+            results.extend(reversed(entries))
+            if len(results) >= limit:
+                break
+        return results
+
+    async def close(self):
+        """等待后台写入完成，确保缓冲区中的记录全部落盘"""
+        self.flush_interval = 0
+        if self._task and not self._task.done():
+            await self._task
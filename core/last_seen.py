@@ -0,0 +1,288 @@
+import asyncio
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from astrbot import logger
+
+# 文件头：魔数、版本、槽位数、已用槽位数
+_HEADER = struct.Struct("<4sB3xII")
+# 记录：QQ号、最后发言时间（秒）
+_RECORD = struct.Struct("<QI")
+_MAGIC = b"LSIX"
+_VERSION = 1
+_MIN_CAPACITY = 256
+_MAX_LOAD = 0.7
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+class _GroupTable:
+    """单个群的定长记录文件，开放寻址哈希表，直接映射到内存读写"""
+
+    __slots__ = ("path", "file", "mm", "capacity", "count", "shift", "lock", "retired")
+
+    def __init__(self, path: str):
+        self.path = path
+        # 与后台落盘线程互斥：映射不会在 msync 进行中被关闭
+        self.lock = threading.Lock()
+        self.retired = False
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            self._create(path, _MIN_CAPACITY)
+        self.file = open(path, "r+b")
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0)
+        except Exception:
+            self.file.close()
+            raise
+        magic, version, self.capacity, self.count = _HEADER.unpack_from(self.mm, 0)
+        if (
+            magic != _MAGIC
+            or version != _VERSION
+            or len(self.mm) != _HEADER.size + self.capacity * _RECORD.size
+        ):
+            # 先释放映射与句柄，调用方随后会删除该文件
+            self.mm.close()
+            self.file.close()
+            raise ValueError(f"最后发言索引文件已损坏：{path}")
+        self.shift = 64 - (self.capacity.bit_length() - 1)
+
+    @staticmethod
+    def _create(path: str, capacity: int, records: Optional[Dict[int, int]] = None):
+        # 先写临时文件再替换，扩容中途退出不会留下半个文件
+        tmp_path = path + ".tmp"
+        size = _HEADER.size + capacity * _RECORD.size
+        with open(tmp_path, "wb") as f:
+            f.truncate(size)
+        if records:
+            with open(tmp_path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+                shift = 64 - (capacity.bit_length() - 1)
+                for user_id, ts in records.items():
+                    slot = ((user_id * _GOLDEN) & _MASK64) >> shift
+                    while _RECORD.unpack_from(mm, _HEADER.size + slot * _RECORD.size)[0]:
+                        slot = (slot + 1) & (capacity - 1)
+                    _RECORD.pack_into(mm, _HEADER.size + slot * _RECORD.size, user_id, ts)
+                _HEADER.pack_into(mm, 0, _MAGIC, _VERSION, capacity, len(records))
+        else:
+            with open(tmp_path, "r+b") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, capacity, 0))
+        os.replace(tmp_path, path)
+
+    def _find(self, user_id: int) -> Tuple[int, int, int]:
+        """返回 (记录偏移, 已存的QQ号, 已存的时间)，QQ号为 0 表示空槽"""
+        slot = ((user_id * _GOLDEN) & _MASK64) >> self.shift
+        while True:
+            offset = _HEADER.size + slot * _RECORD.size
+            stored, ts = _RECORD.unpack_from(self.mm, offset)
+            if stored == user_id or stored == 0:
+                return offset, stored, ts
+            slot = (slot + 1) & (self.capacity - 1)
+
+    def get(self, user_id: int) -> int:
+        _, stored, ts = self._find(user_id)
+        return ts if stored else 0
+
+    def set(self, user_id: int, ts: int) -> bool:
+        """写入最后发言时间，返回 False 表示需要先扩容"""
+        offset, stored, _ = self._find(user_id)
+        if not stored:
+            if self.count + 1 > self.capacity * _MAX_LOAD:
+                return False
+            self.count += 1
+            _HEADER.pack_into(
+                self.mm, 0, _MAGIC, _VERSION, self.capacity, self.count
+            )
+        _RECORD.pack_into(self.mm, offset, user_id, ts)
+        return True
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        for user_id, ts in _RECORD.iter_unpack(self.mm[_HEADER.size :]):
+            if user_id and ts:
+                yield user_id, ts
+
+    def grow(self) -> "_GroupTable":
+        # 时间为 0 的记录是已退群成员，扩容时一并清除
+        records = dict(self.items())
+        capacity = self.capacity * 2
+        while len(records) + 1 > capacity * _MAX_LOAD:
+            capacity *= 2
+        self.retire()
+        self._create(self.path, capacity, records)
+        return _GroupTable(self.path)
+
+    def flush(self):
+        """在落盘线程中调用：msync，期间被弃用的表由本线程收尾关闭"""
+        with self.lock:
+            if not self.mm.closed:
+                self.mm.flush()
+        if self.retired:
+            self._release()
+
+    def _release(self):
+        with self.lock:
+            if not self.mm.closed:
+                self.mm.close()
+                self.file.close()
+
+    def retire(self):
+        """
+        在事件循环中弃用此表：解除映射但不 msync（共享映射的脏页仍由内核写回）。
+        落盘线程正持有此表时不等待，交给它在 msync 结束后关闭。
+        """
+        self.retired = True
+        if self.lock.acquire(blocking=False):
+            try:
+                if not self.mm.closed:
+                    self.mm.close()
+                    self.file.close()
+            finally:
+                self.lock.release()
+
+    def close(self):
+        """落盘并关闭，会阻塞，只在线程中调用"""
+        with self.lock:
+            if not self.mm.closed:
+                self.mm.flush()
+                self.mm.close()
+                self.file.close()
+
+
+class LastSeenIndex:
+    """
+    群友最后发言时间索引。
+    每个群一个定长记录文件（每人 12 字节，开放寻址），通过 mmap 直接在内存中原地更新，
+    重启后无需解析即可使用；脏页按批定时落盘。
+    同时打开的文件数有上限，超出时关闭最久未用的群，避免上千个群耗尽文件句柄。
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        flush_interval: float = 60,
+        max_open: int = 256,
+        resolution: int = 60,
+    ):
+        """
+        :param flush_interval: 落盘间隔（秒）
+        :param max_open: 同时映射的群文件数上限
+        :param resolution: 时间精度（秒），同一人在此间隔内的重复发言不再写入
+        """
+        self.dir = data_dir
+        self.configure(flush_interval, max_open)
+        self.resolution = resolution
+        os.makedirs(self.dir, exist_ok=True)
+        self._tables: OrderedDict[str, _GroupTable] = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def configure(self, flush_interval: float, max_open: int):
+        self.flush_interval = max(1, flush_interval)
+        self.max_open = max(1, max_open)
+
+    def _table(self, group_id: str, create: bool = True) -> Optional[_GroupTable]:
+        table = self._tables.get(group_id)
+        if table is not None:
+            self._tables.move_to_end(group_id)
+            return table
+        path = os.path.join(self.dir, f"{group_id}.bin")
+        if not create and not os.path.exists(path):
+            return None
+        try:
+            table = _GroupTable(path)
+        except ValueError as e:
+            logger.error(f"{e}，已重建")
+            os.remove(path)
+            table = _GroupTable(path)
+        self._tables[group_id] = table
+        while len(self._tables) > self.max_open:
+            old_id, old_table = self._tables.popitem(last=False)
+            old_table.retire()
+            self._dirty.discard(old_id)
+        return table
+
+    def touch(self, group_id: str, user_id: str, ts: float = 0):
+        """记录一次发言"""
+        ts = int(ts or time.time())
+        table = self._table(str(group_id))
+        assert table is not None
+        uid = int(user_id)
+        if ts - table.get(uid) < self.resolution:
+            return
+        if not table.set(uid, ts):
+            table = self._tables[str(group_id)] = table.grow()
+            table.set(uid, ts)
+        self._dirty.add(str(group_id))
+
+    def forget(self, group_id: str, user_id: str):
+        """成员退群后清除其记录（置零，扩容时回收槽位）"""
+        table = self._table(str(group_id), create=False)
+        if table is None:
+            return
+        uid = int(user_id)
+        if table.get(uid):
+            table.set(uid, 0)
+            self._dirty.add(str(group_id))
+
+    def get(self, group_id: str, user_id: str) -> int:
+        table = self._table(str(group_id), create=False)
+        return table.get(int(user_id)) if table else 0
+
+    def snapshot(self, group_id: str) -> Dict[int, int]:
+        """本群所有记录过的成员的最后发言时间"""
+        table = self._table(str(group_id), create=False)
+        return dict(table.items()) if table else {}
+
+    async def flush(self):
+        """脏页落盘（msync 在线程中执行，不阻塞事件循环）"""
+        tables = [
+            (group_id, table)
+            for group_id in self._dirty
+            if (table := self._tables.get(group_id))
+        ]
+        self._dirty.clear()
+
+        def sync():
+            for group_id, table in tables:
+                try:
+                    table.flush()
+                except Exception as e:
+                    logger.error(f"最后发言索引落盘失败（群 {group_id}）：{e}")
+
+        if tables:
+            await asyncio.to_thread(sync)
+
+    def start(self):
+        async def loop():
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(loop())
+
+    def stop(self):
+        """停止定时落盘并释放所有映射（不 msync，不阻塞），之后的读写会重新打开文件"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        for table in self._tables.values():
+            table.retire()
+        self._tables.clear()
+        self._dirty.clear()
+
+    async def close(self):
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        tables = list(self._tables.values())
+        self._tables.clear()
+        self._dirty.clear()
+
+        def close_all():
+            for table in tables:
+                table.close()
+
+        await asyncio.to_thread(close_all)
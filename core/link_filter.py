@@ -0,0 +1,171 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from astrbot import logger
+
+ALLOW = "allow"
+DENY = "deny"
+
+# 一次扫描提取文本中的所有域名，协议头可有可无
+URL_PATTERN = re.compile(
+    r"(?:[a-z][a-z0-9+.-]*:/{1,2})?"
+    r"((?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+(?:[a-z]{2,63}|xn--[a-z0-9-]{1,59}))"
+    r"(?![a-z0-9-])",
+    re.IGNORECASE,
+)
+
+# 全角字符与各种“点”折叠为 ASCII，防止 x。com / ｘ．ｃｏｍ 之类的变形
+_FOLD_TABLE = {cp: cp - 0xFEE0 for cp in range(0xFF01, 0xFF5F)}
+_FOLD_TABLE.update({ord(c): "." for c in "。｡．·"})
+
+
+def normalize_domain(domain: str) -> str:
+    return domain.strip().lower().translate(_FOLD_TABLE).strip(".")
+
+
+def extract_domains(text: str) -> Set[str]:
+    """提取文本中出现的所有域名（小写）"""
+    text = text.translate(_FOLD_TABLE).replace("\\/", "/")
+    return {m.group(1).lower() for m in URL_PATTERN.finditer(text)}
+
+
+class DomainTrie:
+    """
+    按域名标签倒序组织的后缀树，规则对该域名及其所有子域名生效。
+    查询只沿域名标签走一遍，耗时与规则数量无关。
+    """
+
+    def __init__(self):
+        self.root: Dict = {}
+
+    def add(self, domain: str, action: str):
+        node = self.root
+        for label in reversed(normalize_domain(domain).split(".")):
+            node = node.setdefault(label, {})
+        node[""] = action  # 空键存放规则，不会与标签冲突
+
+    def remove(self, domain: str) -> bool:
+        path = []
+        node = self.root
+        for label in reversed(normalize_domain(domain).split(".")):
+            if label not in node:
+                return False
+            path.append((node, label))
+            node = node[label]
+        if "" not in node:
+            return False
+        del node[""]
+        # 清理空节点
+        for parent, label in reversed(path):
+            if parent[label]:
+                break
+            del parent[label]
+        return True
+
+    def lookup(self, domain: str) -> Tuple[int, Optional[str]]:
+        """返回最具体的命中规则 (匹配深度, 规则)，未命中返回 (0, None)"""
+        node = self.root
+        depth, action = 0, None
+        for i, label in enumerate(reversed(domain.split(".")), start=1):
+            node = node.get(label)
+            if node is None:
+                break
+            if "" in node:
+                depth, action = i, node[""]
+        return depth, action
+
+
+class LinkFilter:
+    """
+    链接域名过滤：全局规则来自配置，各群规则持久化在 json 文件中。
+    同一域名命中多条规则时，更具体的规则优先；深度相同时群规则优先。
+    """
+
+    def __init__(
+        self,
+        json_path: str,
+        deny_domains: Iterable[str] = (),
+        allow_domains: Iterable[str] = (),
+    ):
+        self.path = json_path
+        self.set_global_rules(deny_domains, allow_domains)
+        # group_id -> {domain: action}
+        self.group_rules: Dict[str, Dict[str, str]] = {}
+        self.group_tries: Dict[str, DomainTrie] = {}
+        self._load()
+
+    def set_global_rules(
+        self, deny_domains: Iterable[str], allow_domains: Iterable[str]
+    ):
+        """重建全局规则，各群规则不受影响"""
+        trie = DomainTrie()
+        for domain in deny_domains:
+            trie.add(domain, DENY)
+        for domain in allow_domains:
+            trie.add(domain, ALLOW)
+        self.global_trie = trie
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.group_rules = json.load(f)
+        except Exception as e:
+            logger.error(f"加载域名规则失败: {e}")
+            return
+        for group_id, rules in self.group_rules.items():
+            trie = self.group_tries[group_id] = DomainTrie()
+            for domain, action in rules.items():
+                trie.add(domain, action)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.group_rules, f, ensure_ascii=False, indent=2)
+
+    def set_rules(self, group_id: str, domains: List[str], action: str) -> List[str]:
+        trie = self.group_tries.setdefault(group_id, DomainTrie())
+        rules = self.group_rules.setdefault(group_id, {})
+        added = []
+        for domain in map(normalize_domain, domains):
+            if domain:
+                trie.add(domain, action)
+                rules[domain] = action
+                added.append(domain)
+        self._save()
+        return added
+
+    def remove_rules(self, group_id: str, domains: List[str]) -> List[str]:
+        trie = self.group_tries.get(group_id)
+        rules = self.group_rules.get(group_id, {})
+        removed = []
+        for domain in map(normalize_domain, domains):
+            if trie and trie.remove(domain):
+                rules.pop(domain, None)
+                removed.append(domain)
+        self._save()
+        return removed
+
+    def get_rules(self, group_id: str) -> Dict[str, str]:
+        return self.group_rules.get(group_id, {})
+
+    def check(self, group_id: str, domain: str) -> Optional[str]:
+        """返回该群对该域名适用的规则"""
+        depth, action = self.global_trie.lookup(domain)
+        trie = self.group_tries.get(group_id)
+        if trie:
+            group_depth, group_action = trie.lookup(domain)
+            if group_action and group_depth >= depth:
+                action = group_action
+        return action
+
+    def find_denied(self, group_id: str, text: str) -> List[str]:
+        """返回文本中被禁止的域名"""
+        return [
+            domain
+            for domain in extract_domains(text)
+            if self.check(group_id, domain) == DENY
+        ]
@@ -0,0 +1,153 @@
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from astrbot import logger
+
+T = TypeVar("T")
+
+
+class LoadShedder:
+    """
+    事件循环延迟监控与降载。
+    后台定时采样事件循环的调度延迟（实际唤醒时间与预期的差值），平滑后超过阈值即进入过载状态，
+    回落到恢复阈值以下才退出。过载期间：
+    - 需要结果的非必要查询（昵称、陌生人信息等）直接使用兜底值
+    - 无需等待结果的非必要任务（管理员私聊等）进入低优先级队列，恢复后再依次执行
+    禁言、撤回等处罚不经过本模块，始终优先执行。
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        lag_threshold: float = 0.5,
+        recover_threshold: float = 0.2,
+        max_queue: int = 1000,
+        alpha: float = 0.3,
+    ):
+        """
+        :param interval: 采样间隔（秒）
+        :param lag_threshold: 进入过载的平滑延迟阈值（秒）
+        :param recover_threshold: 退出过载的平滑延迟阈值（秒）
+        :param max_queue: 低优先级队列上限，超出时丢弃最早的任务
+        :param alpha: 延迟平滑系数
+        """
+        self.alpha = alpha
+        self.configure(interval, lag_threshold, recover_threshold, max_queue)
+        self.lag = 0.0
+        self.smoothed_lag = 0.0
+        self.max_lag = 0.0
+        self.overloaded = False
+        self.shed: Dict[str, int] = defaultdict(int)
+        self.deferred: Dict[str, int] = defaultdict(int)
+        self.dropped = 0
+        self._queue: asyncio.Queue[tuple[str, Callable[[], Awaitable]]] = (
+            asyncio.Queue()
+        )
+        self._calm = asyncio.Event()
+        self._calm.set()
+        self._sample_task: asyncio.Task | None = None
+        self._drain_task: asyncio.Task | None = None
+
+    def configure(
+        self,
+        interval: float,
+        lag_threshold: float,
+        recover_threshold: float,
+        max_queue: int,
+    ):
+        self.interval = max(0.05, interval)
+        self.lag_threshold = lag_threshold
+        self.recover_threshold = min(recover_threshold, lag_threshold)
+        self.max_queue = max(1, max_queue)
+
+    def start(self):
+        if self._sample_task is None or self._sample_task.done():
+            self._sample_task = asyncio.create_task(self._sample_loop())
+        if not self._draining():
+            self._drain_task = asyncio.create_task(self._drain_loop())
+
+    def _draining(self) -> bool:
+        return self._drain_task is not None and not self._drain_task.done()
+
+    def stop(self):
+        """停止监控并退出降载状态，队列中剩余的任务由后台继续执行完"""
+        if self._sample_task is not None:
+            self._sample_task.cancel()
+            self._sample_task = None
+        self.overloaded = False
+        self.smoothed_lag = 0.0
+        self._calm.set()
+
+    async def _sample_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            self.smoothed_lag += self.alpha * (self.lag - self.smoothed_lag)
+            if not self.overloaded and self.smoothed_lag >= self.lag_threshold:
+                self.overloaded = True
+                self._calm.clear()
+                logger.warning(
+                    f"事件循环延迟 {self.smoothed_lag * 1000:.0f}ms，进入降载模式"
+                )
+            elif self.overloaded and self.smoothed_lag < self.recover_threshold:
+                self.overloaded = False
+                self._calm.set()
+                logger.info(
+                    f"事件循环延迟回落至 {self.smoothed_lag * 1000:.0f}ms，退出降载模式，"
+                    f"待执行的低优先级任务 {self._queue.qsize()} 个"
+                )
+
+    async def _drain_loop(self):
+        # 低优先级任务逐个执行，过载时暂停
+        while True:
+            kind, factory = await self._queue.get()
+            await self._calm.wait()
+            try:
+                await factory()
+            except Exception as e:
+                logger.warning(f"低优先级任务（{kind}）执行失败：{e}")
+
+    async def fetch(
+        self, kind: str, factory: Callable[[], Awaitable[T]], fallback: T
+    ) -> T:
+        """执行需要结果的非必要查询，过载时直接返回兜底值"""
+        if self.overloaded:
+            self.shed[kind] += 1
+            return fallback
+        return await factory()
+
+    async def defer(self, kind: str, factory: Callable[[], Awaitable]):
+        """执行无需等待结果的非必要任务，过载时放入低优先级队列"""
+        # 队列无人执行时（未启动或已关闭）直接执行，避免任务永远滞留
+        if not self._draining() or (not self.overloaded and self._queue.empty()):
+            await factory()
+            return
+        self.deferred[kind] += 1
+        if self._queue.qsize() >= self.max_queue:
+            dropped_kind, _ = self._queue.get_nowait()
+            self.dropped += 1
+            logger.warning(f"低优先级队列已满，丢弃一个{dropped_kind}任务")
+        self._queue.put_nowait((kind, factory))
+
+    def stats(self) -> dict:
+        return {
+            "lag_ms": self.lag * 1000,
+            "smoothed_lag_ms": self.smoothed_lag * 1000,
+            "max_lag_ms": self.max_lag * 1000,
+            "overloaded": self.overloaded,
+            "queue_depth": self._queue.qsize(),
+            "shed": dict(self.shed),
+            "deferred": dict(self.deferred),
+            "dropped": self.dropped,
+        }
+
+    async def shutdown(self):
+        tasks = [t for t in (self._sample_task, self._drain_task) if t is not None]
+        self._sample_task = self._drain_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
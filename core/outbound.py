@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List
+
+
+class TokenBucket:
+    """
+    令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个。
+    等待者按到达顺序依次取令牌。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 1e-3)
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def configure(self, rate: float, capacity: float):
+        """调整速率与容量，已积累的令牌保留（不超过新容量）"""
+        self._refill()
+        self.rate = max(rate, 1e-3)
+        self.capacity = max(capacity, 1.0)
+        self.tokens = min(self.tokens, self.capacity)
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+class ReplyPacer:
+    """
+    群消息发送节流与合并。
+    同一次命令产生的多条回复合并成尽量少的消息，仅在超过长度上限时拆分；
+    每个群一个令牌桶，控制向该群发送消息的速率。
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, max_length: int = 3000):
+        self.rate = rate
+        self.burst = burst
+        self.max_length = max_length
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def configure(self, rate: float, burst: int, max_length: int):
+        """更新节流参数，各群已有的令牌桶原地调整"""
+        self.rate = rate
+        self.burst = burst
+        self.max_length = max_length
+        for bucket in self._buckets.values():
+            bucket.configure(rate, burst)
+
+    async def acquire(self, group_id: str):
+        """等待向该群发送一条消息的配额"""
+        bucket = self._buckets.get(group_id)
+        if bucket is None:
+            bucket = self._buckets[group_id] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+    def split(self, lines: Iterable[str], sep: str = "\n") -> List[str]:
+        """将多行回复合并为若干条消息，每条不超过长度上限"""
+        return split_messages(lines, self.max_length, sep)
+
+
+def split_messages(lines: Iterable[str], max_length: int, sep: str = "\n") -> List[str]:
+    """将多段文字合并为尽量少的消息，每条不超过 max_length，单段超长时硬切"""
+    chunks: List[str] = []
+    current = ""
+    for line in lines:
+        while len(line) > max_length:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:max_length])
+            line = line[max_length:]
+        if current and len(current) + len(sep) + len(line) > max_length:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}{sep}{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,12 +1,17 @@
 
+import asyncio
 from functools import wraps
 import inspect
+import time
 from typing import Awaitable, Callable, Any, AsyncGenerator, Dict, List, Optional, Union, cast
 from enum import IntEnum
+from aiocqhttp import CQHttp
 from astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event import (
     AiocqhttpMessageEvent,
 )
 from astrbot import logger
+from .resilience import guarded
+from .tracing import TracedClient, current_trace, span, tracer
 from .utils import get_ats
 
 
@@ -47,6 +52,26 @@ class PermLevel(IntEnum):
 
 
 
+class PermPlan:
+    """
+    命令的权限检查计划，在装饰时根据静态参数生成一次。
+    运行时按计划决定哪些查询可以跳过，剩余查询并发执行。
+    """
+
+    __slots__ = ("perm_key", "bot_perm", "check_at")
+
+    def __init__(self, perm_key: str, bot_perm: PermLevel, check_at: bool):
+        self.perm_key = perm_key
+        self.bot_perm = bot_perm
+        self.check_at = check_at
+
+    def __repr__(self):
+        return (
+            f"PermPlan(perm_key={self.perm_key!r}, bot_perm={self.bot_perm!s}, "
+            f"check_at={self.check_at})"
+        )
+
+
 class PermissionManager:
     _instance: Optional["PermissionManager"] = None
 
@@ -61,17 +86,41 @@ class PermissionManager:
         superusers: Optional[List[str]] = None,
         perms: Optional[Dict[str, str]] = None,
         level_threshold: int = 10,
+        cache_ttl: float = 600,
     ):
         if self._initialized:
             return
-        self.superusers = superusers or []
         if perms is None:
             raise ValueError("初始化必须传入 perms")
+        # 角色缓存：各 bot 账号在各群的等级（按 (self_id, group_id) 区分），
+        # 以及各群的群主/管理员名单（群的客观状态，各账号共享）
+        self._bot_levels: Dict[tuple[str, str], tuple[PermLevel, float]] = {}
+        self._rosters: Dict[str, tuple[Dict[str, PermLevel], float]] = {}
+        # 已知的 bot 账号及其客户端
+        self._clients: Dict[str, CQHttp] = {}
+        self.level_threshold = level_threshold
+        self.configure(superusers or [], perms, level_threshold, cache_ttl)
+        self._initialized = True
+
+    def configure(
+        self,
+        superusers: List[str],
+        perms: Dict[str, str],
+        level_threshold: int,
+        cache_ttl: float,
+    ) -> None:
+        """更新权限表等配置，整体替换，不影响正在进行的权限检查"""
+        self.superusers = list(superusers)
         self.perms: Dict[str, PermLevel] = {
             k: PermLevel.from_str(v) for k, v in perms.items()
         }
+        if level_threshold != self.level_threshold:
+            # 高等级成员的判定依赖等级阈值，丢弃按旧阈值缓存的 bot 等级
+            self._bot_levels = {
+                k: v for k, v in self._bot_levels.items() if v[0] <= PermLevel.ADMIN
+            }
         self.level_threshold = level_threshold
-        self._initialized = True
+        self.cache_ttl = cache_ttl
 
     @classmethod
     def get_instance(
@@ -79,29 +128,18 @@ class PermissionManager:
         superusers: Optional[List[str]] = None,
         perms: Optional[Dict[str, str]] = None,
         level_threshold: int = 50,
+        cache_ttl: float = 600,
     ) -> "PermissionManager":
         if cls._instance is None:
             cls._instance = cls(
                 superusers=superusers,
                 perms=perms,
                 level_threshold=level_threshold,
+                cache_ttl=cache_ttl,
             )
         return cls._instance
 
-    async def get_perm_level(
-        self, event: AiocqhttpMessageEvent, user_id: str | int
-    ) -> PermLevel:
-        group_id = event.get_group_id()
-        if not group_id:
-            return PermLevel.UNKNOWN
-        if str(user_id) in self.superusers:
-            return PermLevel.SUPERUSER
-
-        info = await event.bot.get_group_member_info(
-            group_id=int(group_id), user_id=int(user_id), no_cache=True
-        )
-        role = info.get("role", "unknown")
-        level = int(info.get("level", 0))
+    def _role_to_level(self, role: str, level: int) -> PermLevel:
         match role:
             case "owner":
                 return PermLevel.OWNER
@@ -116,33 +154,235 @@ class PermissionManager:
             case _:
                 return PermLevel.UNKNOWN
 
+    def _is_fresh(self, cached_at: float) -> bool:
+        return time.monotonic() - cached_at < self.cache_ttl
+
+    def register_client(self, self_id: str | int, client: CQHttp) -> None:
+        """登记一个 bot 账号的客户端，用于多账号分摊批量操作"""
+        self._clients[str(self_id)] = guarded(client)
+
+    def peek_bot_level(self, group_id: str, self_id: str | int) -> PermLevel | None:
+        """读取缓存中该 bot 账号在该群的等级，未缓存或已过期返回 None"""
+        cached = self._bot_levels.get((str(self_id), str(group_id)))
+        if cached and self._is_fresh(cached[1]):
+            return cached[0]
+        return None
+
+    def _peek_roster(self, group_id: str) -> Dict[str, PermLevel] | None:
+        cached = self._rosters.get(str(group_id))
+        if cached and self._is_fresh(cached[1]):
+            return cached[0]
+        return None
+
+    def set_roster(
+        self, group_id: str, members: List[dict], self_id: str | int | None = None
+    ) -> None:
+        """用群成员列表刷新该群的群主/管理员名单，并顺带记录各 bot 账号的等级"""
+        now = time.monotonic()
+        self_ids = set(self._clients)
+        if self_id is not None:
+            self_ids.add(str(self_id))
+        roster: Dict[str, PermLevel] = {}
+        for member in members:
+            user_id = str(member.get("user_id", ""))
+            level = self._role_to_level(
+                member.get("role", "unknown"), int(member.get("level", 0))
+            )
+            if level <= PermLevel.ADMIN:
+                roster[user_id] = level
+            if user_id in self_ids:
+                self._bot_levels[(user_id, str(group_id))] = (level, now)
+        self._rosters[str(group_id)] = (roster, now)
+
+    def update_role(
+        self,
+        group_id: str,
+        user_id: str | int,
+        level: PermLevel,
+        self_id: str | int | None = None,
+    ) -> None:
+        """角色变动（设置/取消管理员）时增量更新缓存"""
+        group_id, user_id = str(group_id), str(user_id)
+        # 变动对象可能是本账号，也可能是同群的其他 bot 账号
+        if user_id in self._clients or (self_id is not None and user_id == str(self_id)):
+            if level <= PermLevel.ADMIN:
+                self._bot_levels[(user_id, group_id)] = (level, time.monotonic())
+            else:
+                # 降为成员时无法得知群等级，下次查询时重新获取
+                self._bot_levels.pop((user_id, group_id), None)
+        roster = self._peek_roster(group_id)
+        if roster is None:
+            return
+        if level <= PermLevel.ADMIN:
+            roster[user_id] = level
+        else:
+            roster.pop(user_id, None)
+
+    async def get_perm_level(
+        self, event: AiocqhttpMessageEvent, user_id: str | int, exact: bool = True
+    ) -> PermLevel:
+        """
+        获取用户在当前群的权限等级，优先使用缓存。
+        :param exact: 为 False 时，若已知该用户不在群主/管理员名单中，
+            直接返回 MEMBER 而不区分是否为高等级成员。
+        """
+        group_id = event.get_group_id()
+        if not group_id:
+            return PermLevel.UNKNOWN
+        if str(user_id) in self.superusers:
+            return PermLevel.SUPERUSER
+
+        self_id = str(event.get_self_id())
+        is_self = str(user_id) == self_id
+        if is_self and (cached := self.peek_bot_level(group_id, self_id)) is not None:
+            return cached
+        roster = self._peek_roster(group_id)
+        if roster is not None and not is_self:
+            if str(user_id) in roster:
+                return roster[str(user_id)]
+            if not exact:
+                return PermLevel.MEMBER
+
+        info = await event.bot.get_group_member_info(
+            group_id=int(group_id), user_id=int(user_id), no_cache=True
+        )
+        level = self._role_to_level(
+            info.get("role", "unknown"), int(info.get("level", 0))
+        )
+        if is_self:
+            self._bot_levels[(self_id, str(group_id))] = (level, time.monotonic())
+        return level
+
+    async def warm_up(self, client: CQHttp, concurrency: int = 5) -> int:
+        """
+        预热所有群的 bot 等级与群主/管理员名单，返回成功预热的群数。
+        """
+        login_info = await client.get_login_info()
+        self_id = str(login_info.get("user_id", ""))
+        self.register_client(self_id, client)
+        groups = await client.get_group_list()
+        sem = asyncio.Semaphore(max(1, concurrency))
+
+        async def warm_group(group_id: int) -> bool:
+            # 多账号重叠的群可能已被其他账号预热过
+            if (
+                self._peek_roster(str(group_id)) is not None
+                and self.peek_bot_level(str(group_id), self_id) is not None
+            ):
+                return True
+            async with sem:
+                try:
+                    members = await client.get_group_member_list(group_id=group_id)
+                except Exception as e:
+                    logger.warning(f"预热群 {group_id} 的权限信息失败：{e}")
+                    return False
+            self.set_roster(str(group_id), members, self_id=self_id)
+            return True
+
+        results = await asyncio.gather(
+            *(warm_group(int(group["group_id"])) for group in groups)
+        )
+        return sum(results)
+
+    def admin_clients(
+        self, group_id: str, self_id: str | int, client: CQHttp
+    ) -> List[tuple[CQHttp, PermLevel | None]]:
+        """
+        返回在该群拥有管理员以上身份的 bot 账号客户端及其等级，当前事件的账号排在首位（等级记为 None，
+        已由权限检查确认能处置目标）。仅依据缓存判断，未知身份的账号不参与分摊。
+        """
+        clients: List[tuple[CQHttp, PermLevel | None]] = [(client, None)]
+        for other_id, other_client in self._clients.items():
+            if other_id == str(self_id) or other_client is client:
+                continue
+            level = self.peek_bot_level(group_id, other_id)
+            if level is not None and level <= PermLevel.ADMIN:
+                clients.append((other_client, level))
+        return clients
+
+    def shard_targets(
+        self, event: AiocqhttpMessageEvent, targets: List[str]
+    ) -> List[tuple[CQHttp, List[str]]]:
+        """
+        将批量操作的目标轮流分配给群内有管理权限的各 bot 账号，
+        以分摊单账号的风控频率限制。其他账号只分到其身份高于的目标
+        （群管名单未缓存时视目标为管理员），其余目标留给当前账号。
+        """
+        group_id = event.get_group_id()
+        clients = self.admin_clients(group_id, event.get_self_id(), event.bot)
+        roster = self._peek_roster(group_id)
+        shards: List[tuple[CQHttp, List[str]]] = [(c, []) for c, _ in clients]
+        for i, target in enumerate(targets):
+            if roster is None:
+                target_level = PermLevel.ADMIN
+            else:
+                target_level = roster.get(str(target), PermLevel.MEMBER)
+            eligible = [
+                shard
+                for shard, (_, level) in zip(shards, clients)
+                if level is None or level < target_level
+            ]
+            eligible[i % len(eligible)][1].append(target)
+        return [shard for shard in shards if shard[1]]
+
+    def needs_sender_lookup(self, sender_id: str, required_level: PermLevel) -> bool:
+        """判断是否需要联网查询发送者的权限等级"""
+        # 超管满足一切要求；成员级要求对群内发言者必然满足
+        if str(sender_id) in self.superusers:
+            return False
+        return PermLevel.OWNER <= required_level < PermLevel.MEMBER
+
     async def perm_block(
         self,
         event: AiocqhttpMessageEvent,
-        bot_perm: PermLevel,
-        perm_key: str,
-        check_at: bool = True,
+        plan: PermPlan,
     ) -> str | None:
-        logger.debug(f"权限输入：{perm_key} {bot_perm}")
+        logger.debug(f"权限输入：{plan}")
 
-        user_level = await self.get_perm_level(event, user_id=event.get_sender_id())
-
-        required_level = self.perms.get(perm_key)
+        required_level = self.perms.get(plan.perm_key)
         if required_level is None:
             return None
 
-        if user_level > required_level:
+        sender_id = event.get_sender_id()
+        # 要求超管权限而发送者不是超管，无需任何查询即可拒绝
+        if (
+            required_level == PermLevel.SUPERUSER
+            and str(sender_id) not in self.superusers
+        ):
+            return f"你没{required_level}权限"
+
+        need_sender = self.needs_sender_lookup(sender_id, required_level)
+        at_ids = get_ats(event) if plan.check_at else []
+        # bot 为管理员以上时，被at者是否为高等级成员不影响判断
+        bot_level_hint = self.peek_bot_level(event.get_group_id(), event.get_self_id())
+        exact_at = bot_level_hint is None or bot_level_hint > PermLevel.ADMIN
+
+        # 发送者、bot、被at者的权限查询互不依赖，并发执行
+        lookups = [self.get_perm_level(event, user_id=event.get_self_id())]
+        lookups.extend(
+            self.get_perm_level(event, user_id=at_id, exact=exact_at)
+            for at_id in at_ids
+        )
+        if need_sender:
+            lookups.append(
+                self.get_perm_level(
+                    event,
+                    user_id=sender_id,
+                    exact=required_level == PermLevel.HIGH,
+                )
+            )
+        levels = await asyncio.gather(*lookups)
+
+        if need_sender and levels[-1] > required_level:
             return f"你没{required_level}权限"
 
-        bot_level = await self.get_perm_level(event, user_id=event.get_self_id())
-        if bot_level > bot_perm:
-            return f"我没{bot_perm}权限"
+        bot_level = levels[0]
+        if bot_level > plan.bot_perm:
+            return f"我没{plan.bot_perm}权限"
 
-        if check_at:
-            for at_id in get_ats(event):
-                at_level = await self.get_perm_level(event, user_id=at_id)
-                if bot_level >= at_level:
-                    return f"我动不了{at_level}"
+        for at_level in levels[1 : 1 + len(at_ids)]:
+            if bot_level >= at_level:
+                return f"我动不了{at_level}"
 
         return None
 
@@ -161,7 +401,12 @@ def perm_required(
     def decorator(
         func: Callable[..., Union[AsyncGenerator[Any, Any], Awaitable[Any]]],
     ) -> Callable[..., AsyncGenerator[Any, Any]]:
-        actual_perm_key = perm_key or func.__name__
+        plan = PermPlan(
+            perm_key=perm_key or func.__name__,
+            bot_perm=bot_perm,
+            check_at=check_at,
+        )
+
         @wraps(func)
         async def wrapper(
             plugin_instance: Any,
@@ -179,28 +424,71 @@ def perm_required(
 
             # 权限管理未初始化
             if not perm_manager._initialized:
-                logger.error(f"PermissionManager 未初始化（尝试访问权限项：{perm_key}）")
+                logger.error(
+                    f"PermissionManager 未初始化（尝试访问权限项：{plan.perm_key}）"
+                )
                 yield event.plain_result("内部错误：权限系统未正确加载")
                 event.stop_event()
                 return
 
+            # OneBot 调用经由保护代理（超时、重试、熔断），结束后还原
+            client = event.bot
+            event.bot = guarded(client)  # type: ignore
+            perm_manager.register_client(event.get_self_id(), event.bot)
+            if not tracer.enabled:
+                try:
+                    async for item in _run(plugin_instance, event, *args, **kwargs):
+                        yield item
+                finally:
+                    event.bot = client
+                return
+
+            # 追踪本次调用：OneBot 调用再经由追踪代理记录耗时（含重试）
+            trace, token = tracer.start(plan.perm_key, event.get_group_id())
+            event.bot = TracedClient(event.bot)  # type: ignore
+            try:
+                async for item in _run(plugin_instance, event, *args, **kwargs):
+                    yield item
+            finally:
+                event.bot = client
+                tracer.finish(trace, token)
+
+        async def _run(
+            plugin_instance: Any,
+            event: AiocqhttpMessageEvent,
+            *args: Any,
+            **kwargs: Any,
+        ) -> AsyncGenerator[Any, Any]:
             # 判断权限
-            result = await perm_manager.perm_block(
-                event, bot_perm=bot_perm, perm_key=actual_perm_key, check_at=check_at
-            )
+            with span("perm"):
+                result = await PermissionManager.get_instance().perm_block(event, plan)
             if result:
                 yield event.plain_result(result)
                 event.stop_event()
                 return
 
-            # 执行原始方法
-            if inspect.isasyncgenfunction(func):
+            # 执行原始方法（不计入等待回复发送的时间）
+            if not inspect.isasyncgenfunction(func):
+                with span("handler"):
+                    await cast(
+                        Awaitable[Any], func(plugin_instance, event, *args, **kwargs)
+                    )
+                return
+            handler_time = send_time = 0.0
+            handler_start = mark = time.perf_counter()
+            try:
                 async for item in func(plugin_instance, event, *args, **kwargs):
+                    now = time.perf_counter()
+                    handler_time += now - mark
                     yield item
-            else:
-                await cast(
-                    Awaitable[Any], func(plugin_instance, event, *args, **kwargs)
-                )
+                    mark = time.perf_counter()
+                    send_time += mark - now
+                handler_time += time.perf_counter() - mark
+            finally:
+                if trace := current_trace():
+                    trace.add("handler", handler_start, handler_time)
+                    if send_time:
+                        trace.add("send", handler_start, send_time)
 
         return wrapper
 
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from astrbot import logger
+
+# 优先级，数值越小越先渲染
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+
+class _RenderJob:
+    __slots__ = ("key", "text", "future", "waiters")
+
+    def __init__(self, key: Tuple[str, str], text: str):
+        self.key = key
+        self.text = text
+        self.waiters = 0
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class RenderScheduler:
+    """
+    文本转图片的渲染调度。
+    固定数量的工作协程从优先级队列中取任务渲染，渲染再多也不会和消息审核抢占过多资源；
+    同一个群正在排队或渲染中的相同文本共享一次渲染。
+    队列已满、等待超时或渲染失败时返回 None，由调用方改发纯文本。
+    """
+
+    def __init__(
+        self,
+        render: Callable[[str], Awaitable[str]],
+        workers: int = 2,
+        max_queue: int = 20,
+        timeout: float = 30,
+    ):
+        """
+        :param render: 实际的渲染函数，输入文本返回图片地址
+        :param workers: 同时渲染的数量
+        :param max_queue: 排队任务上限，超出时直接降级为纯文本
+        :param timeout: 单次请求的最长等待时间（秒），含排队时间
+        """
+        self._render = render
+        self.configure(workers, max_queue, timeout)
+        self._queue: asyncio.PriorityQueue[tuple[int, int, _RenderJob]] = (
+            asyncio.PriorityQueue()
+        )
+        self._seq = itertools.count()
+        self._inflight: Dict[Tuple[str, str], _RenderJob] = {}
+        self._workers: list[asyncio.Task] = []
+        self.running = 0
+        self.rendered = 0
+        self.deduped = 0
+        self.saturated = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def configure(self, workers: int, max_queue: int, timeout: float):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.timeout = timeout
+
+    def _ensure_workers(self):
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.workers:
+            self._workers.append(asyncio.create_task(self._work()))
+
+    async def _work(self):
+        while True:
+            # 调小并发后，多出的工作协程做完手头任务即退出
+            if len([t for t in self._workers if not t.done()]) > self.workers:
+                self._workers.remove(asyncio.current_task())  # type: ignore
+                return
+            _, _, job = await self._queue.get()
+            if job.future.done():
+                # 所有等待者都已超时放弃
+                continue
+            self.running += 1
+            try:
+                # 渲染接口卡死时释放工作协程，避免所有工作协程被占满
+                url = await asyncio.wait_for(self._render(job.text), self.timeout)
+                self.rendered += 1
+                if not job.future.done():
+                    job.future.set_result(url)
+            except asyncio.TimeoutError:
+                # 等待者各自的超时另计在 timeouts 中，这里记为一次渲染失败
+                self.failures += 1
+                logger.error(f"图片渲染超时（{self.timeout}秒）")
+                if not job.future.done():
+                    job.future.set_result(None)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"图片渲染失败：{e}")
+                if not job.future.done():
+                    job.future.set_result(None)
+            finally:
+                self.running -= 1
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+
+    async def render(
+        self, group_id: str, text: str, priority: int = PRIORITY_NORMAL
+    ) -> Optional[str]:
+        """提交渲染并等待结果，无法在时限内完成时返回 None"""
+        key = (str(group_id), text)
+        job = self._inflight.get(key)
+        if job is not None and not job.future.done():
+            self.deduped += 1
+        else:
+            if self._queue.qsize() >= self.max_queue:
+                self.saturated += 1
+                return None
+            self._ensure_workers()
+            job = _RenderJob(key, text)
+            self._inflight[key] = job
+            self._queue.put_nowait((priority, next(self._seq), job))
+        job.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return None
+        finally:
+            job.waiters -= 1
+            # 没人再等这次渲染，尚未开始的话就不必渲染了
+            if not job.waiters and not job.future.done():
+                job.future.cancel()
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "running": self.running,
+            "rendered": self.rendered,
+            "deduped": self.deduped,
+            "saturated": self.saturated,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+    async def shutdown(self):
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        while not self._queue.empty():
+            _, _, job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.set_result(None)
+        self._inflight.clear()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from astrbot import logger
+
+# 各类违规行为计入信誉分的权重
+OFFENSE_WEIGHTS: Dict[str, float] = {
+    "forbidden_word": 1,
+    "forbidden_image": 2,
+    "link": 2,
+    "spam": 3,
+    "copy_raid": 3,
+    "kick": 5,
+}
+
+
+class ReputationStore:
+    """
+    跨群违规信誉。
+    每个用户一个随时间指数衰减的分数，所有群共享；
+    表项数量有上限，超出时淘汰当前分数最低的一批。读写均为 O(1)。
+    """
+
+    def __init__(
+        self,
+        json_path: str,
+        half_life: float = 7 * 86400,
+        capacity: int = 100000,
+    ):
+        """
+        :param half_life: 分数衰减的半衰期（秒）
+        :param capacity: 最多记录的用户数
+        """
+        self.path = json_path
+        self.capacity = max(1, capacity)
+        self.configure(half_life)
+        # user_id -> (分数, 更新时间)
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        # 被取消的保存仍在线程中写盘，与随后的保存互斥
+        self._write_lock = threading.Lock()
+        self._load()
+
+    def configure(self, half_life: float):
+        """更新半衰期，已有分数按新的衰减速度继续衰减"""
+        self.decay = math.log(2) / max(half_life, 1)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._scores = {uid: (s, ts) for uid, (s, ts) in data.items()}
+        except Exception as e:
+            logger.error(f"加载违规信誉数据失败: {e}")
+
+    def _write(self, scores: Dict[str, Tuple[float, float]], now: float):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # 只保存仍有意义的分数
+        data = {
+            uid: [score, ts]
+            for uid, (score, ts) in scores.items()
+            if self._decayed(score, ts, now) >= 0.01
+        }
+        tmp_path = self.path + ".tmp"
+        with self._write_lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    async def save(self):
+        """有变动时写盘：事件循环中只复制一份表，过滤与序列化在线程中执行"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, dict(self._scores), time.time())
+        except BaseException:
+            self._dirty = True
+            raise
+
+    def _decayed(self, score: float, ts: float, now: float) -> float:
+        return score * math.exp(-self.decay * (now - ts))
+
+    def score(self, user_id: str) -> float:
+        """当前（已衰减的）信誉分，分数越高越可疑"""
+        entry = self._scores.get(str(user_id))
+        if entry is None:
+            return 0.0
+        return self._decayed(entry[0], entry[1], time.time())
+
+    def record(self, user_id: str, offense: str) -> float:
+        """记录一次违规，返回更新后的分数"""
+        now = time.time()
+        score = self.score(user_id) + OFFENSE_WEIGHTS.get(offense, 1)
+        self._scores[str(user_id)] = (score, now)
+        self._dirty = True
+        if len(self._scores) > self.capacity:
+            self._evict(now)
+        return score
+
+    def _evict(self, now: float):
+        # 一次淘汰约 10%，摊还后每次写入仍为 O(1)
+        keep = int(self.capacity * 0.9)
+        ranked: List[Tuple[float, str]] = sorted(
+            (self._decayed(s, ts, now), uid) for uid, (s, ts) in self._scores.items()
+        )
+        for _, uid in ranked[: len(ranked) - keep]:
+            del self._scores[uid]
+
+    def start(self, interval: float = 300):
+        """开始定时保存，已在运行时不重复启动"""
+        if self._save_task is not None and not self._save_task.done():
+            return
+
+        async def loop():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.save()
+                except Exception as e:
+                    logger.error(f"保存违规信誉数据失败: {e}")
+
+        self._save_task = asyncio.create_task(loop())
+
+    def stop(self):
+        """停止定时保存，未落盘的变动在 close 时写入"""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+        self._save_task = None
+
+    async def close(self):
+        self.stop()
+        await self.save()
@@ -0,0 +1,286 @@
+import asyncio
+import inspect
+import random
+import time
+import weakref
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict
+
+from aiocqhttp import ActionFailed, ApiNotAvailable, NetworkError
+
+from astrbot import logger
+
+# 重复执行结果不变的调用，超时或连接出错时可以安全重试
+IDEMPOTENT_ACTIONS = {
+    "set_group_ban",
+    "set_group_whole_ban",
+    "set_group_card",
+    "set_group_name",
+    "set_group_admin",
+    "set_group_special_title",
+}
+
+# 返回数据量大、协议端处理较慢的调用，使用较长的超时
+SLOW_ACTIONS = {
+    "get_group_list",
+    "get_group_member_list",
+    "get_group_msg_history",
+    "get_essence_msg_list",
+    "_get_group_notice",
+    "_send_group_notice",
+}
+
+# 说明协议端无响应或连接异常的错误，计入熔断；ActionFailed 说明协议端正常返回了错误，不计入
+TRANSPORT_ERRORS = (asyncio.TimeoutError, NetworkError, ApiNotAvailable, ConnectionError)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(NetworkError):
+    """协议端熔断中，调用未发出即失败"""
+
+
+def is_idempotent(action: str) -> bool:
+    return action.startswith(("get_", "_get_", "can_")) or action in IDEMPOTENT_ACTIONS
+
+
+class CircuitBreaker:
+    """
+    单个协议端的熔断器。
+    连续 threshold 次无响应后熔断，cooldown 秒内的调用直接失败；
+    冷却结束后放行一次试探调用，成功即恢复，失败则重新熔断。
+    """
+
+    __slots__ = ("state", "failures", "opened_at", "trips", "_probing")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+
+    def allow(self, cooldown: float) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= cooldown:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def on_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self):
+        """调用因与协议端无关的原因结束，归还试探名额"""
+        self._probing = False
+
+    def on_failure(self, threshold: int) -> bool:
+        """记录一次无响应，返回 True 表示本次触发了熔断"""
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= threshold:
+            tripped = self.state != OPEN
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.trips += tripped
+            return tripped
+        return False
+
+
+class CallGuard:
+    """
+    OneBot 调用保护：
+    - 每次调用按动作设置超时，协议端卡死时不再无限挂起命令
+    - 幂等调用在超时或连接出错时带随机抖动指数退避重试
+    - 每个协议端一个熔断器，持续无响应时快速失败，不再堆积请求
+    """
+
+    def __init__(self):
+        self.configure()
+        # 以 id(客户端) 为键：代理强引用着客户端，不能再把客户端本身作为弱引用键。
+        # 熔断器随客户端回收而移除，代理无人引用时即回收，再次包装会得到新代理、沿用原熔断器
+        self._breakers: Dict[int, CircuitBreaker] = {}
+        self._clients: weakref.WeakValueDictionary[int, GuardedClient] = (
+            weakref.WeakValueDictionary()
+        )
+        # action -> 计数
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "rejected": 0}
+        )
+
+    def configure(
+        self,
+        timeout: float = 10,
+        slow_timeout: float = 60,
+        retries: int = 2,
+        backoff: float = 0.5,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30,
+    ):
+        """
+        :param timeout: 普通调用的超时（秒）
+        :param slow_timeout: SLOW_ACTIONS 的超时（秒）
+        :param retries: 幂等调用的最大重试次数
+        :param backoff: 首次重试的退避上限（秒），之后每次翻倍
+        :param breaker_threshold: 连续无响应多少次后熔断
+        :param breaker_cooldown: 熔断持续时间（秒）
+        """
+        self.timeout = timeout
+        self.slow_timeout = slow_timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown = breaker_cooldown
+
+    def wrap(self, client: Any) -> "GuardedClient":
+        """取得客户端的保护代理，同一客户端总是返回同一个代理"""
+        if isinstance(client, GuardedClient):
+            return client
+        guarded = self._clients.get(id(client))
+        if guarded is None:
+            guarded = self._clients[id(client)] = GuardedClient(client, self)
+        return guarded
+
+    def _breaker(self, client: Any) -> CircuitBreaker:
+        key = id(client)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker()
+            try:
+                weakref.finalize(client, self._breakers.pop, key, None)
+            except TypeError:
+                # 不支持弱引用的客户端，熔断器常驻
+                pass
+        return breaker
+
+    async def call(
+        self,
+        client: Any,
+        action: str,
+        first: Awaitable[Any],
+        again: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        执行一次调用。
+        :param first: 已创建的调用
+        :param again: 重试时重新发起调用
+        """
+        counts = self.counts[action]
+        counts["calls"] += 1
+        breaker = self._breaker(client)
+        timeout = self.slow_timeout if action in SLOW_ACTIONS else self.timeout
+        attempts = 1 + (self.retries if is_idempotent(action) else 0)
+        for attempt in range(attempts):
+            pending = first if attempt == 0 else again()
+            if not breaker.allow(self.breaker_cooldown):
+                if inspect.iscoroutine(pending):
+                    pending.close()
+                counts["rejected"] += 1
+                raise CircuitOpenError(f"协议端无响应，暂停调用 {action}")
+            try:
+                result = await asyncio.wait_for(pending, timeout)
+            except ActionFailed:
+                breaker.on_success()
+                counts["failures"] += 1
+                raise
+            except TRANSPORT_ERRORS as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    counts["timeouts"] += 1
+                if breaker.on_failure(self.breaker_threshold):
+                    logger.warning(
+                        f"协议端连续 {breaker.failures} 次无响应，"
+                        f"熔断 {self.breaker_cooldown:g} 秒"
+                    )
+                if attempt + 1 >= attempts:
+                    counts["failures"] += 1
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise asyncio.TimeoutError(
+                            f"调用 {action} 超时（{timeout:g}秒）"
+                        ) from e
+                    raise
+                counts["retries"] += 1
+                await asyncio.sleep(random.uniform(0, self.backoff * 2**attempt))
+            except BaseException:
+                # 其他异常（含取消）不代表协议端的状态，只归还试探名额
+                breaker.release()
+                raise
+            else:
+                breaker.on_success()
+                return result
+
+    def stats(self) -> dict:
+        totals = {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "rejected": 0}
+        for counts in self.counts.values():
+            for key, value in counts.items():
+                totals[key] += value
+        breakers = [
+            {
+                "state": breaker.state,
+                "failures": breaker.failures,
+                "trips": breaker.trips,
+                "cooldown_left": max(
+                    0.0,
+                    self.breaker_cooldown - (time.monotonic() - breaker.opened_at),
+                )
+                if breaker.state == OPEN
+                else 0.0,
+            }
+            for breaker in list(self._breakers.values())
+        ]
+        retried = sorted(
+            ((action, c["retries"]) for action, c in self.counts.items() if c["retries"]),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return {**totals, "breakers": breakers, "retried_actions": retried}
+
+
+class GuardedClient:
+    """
+    包装 CQHttp 客户端，返回可等待对象的调用经由 CallGuard 执行，其余属性原样透传。
+    client.api 同样被包装，与所属客户端共用一个熔断器。
+    """
+
+    __slots__ = ("_client", "_guard", "_owner", "__weakref__")
+
+    def __init__(self, client: Any, guard: CallGuard, owner: Any = None):
+        """
+        :param owner: 熔断器所属的客户端，默认为 client 本身
+        """
+        self._client = client
+        self._guard = guard
+        self._owner = client if owner is None else owner
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name == "api":
+            return GuardedClient(attr, self._guard, self._owner)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            action = name
+            if name == "call_action":
+                action = args[0] if args else kwargs.get("action", name)
+            result = attr(*args, **kwargs)
+            if not inspect.isawaitable(result):
+                return result
+            return self._guard.call(
+                self._owner, action, result, lambda: attr(*args, **kwargs)
+            )
+
+        return call
+
+
+call_guard = CallGuard()
+
+
+def guarded(client: Any) -> GuardedClient:
+    return call_guard.wrap(client)
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from aiocqhttp import CQHttp
+
+
+class ModerationFlight:
+    """
+    合并并发的重复处罚。
+    多个检测同时命中同一条消息或同一个人时，撤回按消息ID、禁言按 (群, 用户) 共享同一次调用；
+    已有同等或更重的禁言正在下发时直接复用，只有更重的禁言才会再次下发；
+    下发完成后不再复用（期间可能已被手动解禁），之后的禁言照常下发。
+    同一个人的处罚通知在窗口期内只发一次。
+    """
+
+    def __init__(
+        self,
+        notice_window: float = 10,
+        recall_window: float = 60,
+        max_entries: int = 4096,
+    ):
+        """
+        :param notice_window: 同一用户的处罚通知去重窗口（秒）
+        :param recall_window: 已撤回消息ID的保留时长（秒）
+        :param max_entries: 表项超过此数量时清理过期项
+        """
+        self.configure(notice_window, recall_window)
+        self.max_entries = max_entries
+        # (group_id, user_id) -> (禁言结束时间, 正在下发禁言的任务)
+        self._bans: Dict[Tuple[str, str], Tuple[float, asyncio.Future]] = {}
+        # message_id -> (撤回时间, 撤回任务)
+        self._recalls: Dict[int, Tuple[float, asyncio.Future]] = {}
+        # (group_id, user_id) -> 上次通知时间
+        self._notices: Dict[Tuple[str, str], float] = {}
+
+    def configure(self, notice_window: float, recall_window: float):
+        self.notice_window = notice_window
+        self.recall_window = recall_window
+
+    def _prune(self, now: float):
+        if len(self._recalls) > self.max_entries:
+            self._recalls = {
+                k: v
+                for k, v in self._recalls.items()
+                if now - v[0] < self.recall_window or not v[1].done()
+            }
+        if len(self._notices) > self.max_entries:
+            self._notices = {
+                k: ts
+                for k, ts in self._notices.items()
+                if now - ts < self.notice_window
+            }
+
+    async def ban(
+        self,
+        client: CQHttp,
+        group_id: str,
+        user_id: str,
+        duration: int,
+        force: bool = False,
+    ) -> bool:
+        """
+        禁言（duration 为 0 即解禁）。返回 True 表示本次实际下发了禁言，
+        False 表示复用了正在下发的同等或更重的禁言；共享的调用失败时异常同样抛给所有等待者。
+        :param force: 管理员手动操作，总是下发并以本次时长为准
+        """
+        key = (str(group_id), str(user_id))
+        now = time.monotonic()
+        until = now + duration
+        prev = self._bans.get(key)
+        if prev and not force and not prev[1].done() and prev[0] >= until - 1:
+            await asyncio.shield(prev[1])
+            return False
+        prev_task: Optional[asyncio.Future] = prev[1] if prev else None
+
+        async def run():
+            # 与之前的禁言保持先后顺序，保证更重的禁言最后生效
+            if prev_task and not prev_task.done():
+                await asyncio.gather(prev_task, return_exceptions=True)
+            await client.set_group_ban(
+                group_id=int(group_id), user_id=int(user_id), duration=duration
+            )
+
+        def done(_):
+            if self._bans.get(key, (0, None))[1] is task:
+                del self._bans[key]
+
+        task = asyncio.ensure_future(run())
+        task.add_done_callback(done)
+        self._bans[key] = (until, task)
+        await asyncio.shield(task)
+        self._prune(now)
+        return True
+
+    async def recall(self, client: CQHttp, message_id: int) -> bool:
+        """撤回消息，返回 True 表示本次实际发起了撤回，False 表示已被其他处理撤回"""
+        message_id = int(message_id)
+        prev = self._recalls.get(message_id)
+        if prev:
+            await asyncio.shield(prev[1])
+            return False
+        now = time.monotonic()
+        task = asyncio.ensure_future(client.delete_msg(message_id=message_id))
+        self._recalls[message_id] = (now, task)
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            self._recalls.pop(message_id, None)
+            raise
+        self._prune(now)
+        return True
+
+    def allow_notice(self, group_id: str, user_id: str) -> bool:
+        """窗口期内同一用户的处罚通知只允许发送一次"""
+        key = (str(group_id), str(user_id))
+        now = time.monotonic()
+        if now - self._notices.get(key, -self.notice_window) < self.notice_window:
+            return False
+        self._notices[key] = now
+        return True
@@ -0,0 +1,177 @@
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# 常用繁体字 -> 简体字，覆盖聊天中最常见的繁体写法
+TRADITIONAL_PAIRS = (
+    "們们 個个 來来 時时 會会 說说 對对 國国 開开 關关 門门 問问 間间 題题 "
+    "長长 還还 這这 車车 東东 電电 話话 書书 學学 習习 見见 親亲 覺觉 體体 "
+    "點点 買买 賣卖 幾几 發发 後后 從从 應应 當当 頭头 歡欢 樂乐 聽听 讀读 "
+    "寫写 錢钱 級级 經经 給给 結结 網网 頁页 視视 線线 紅红 紙纸 過过 進进 "
+    "運运 達达 連连 選选 遠远 邊边 場场 報报 壞坏 塊块 聲声 寶宝 實实 將将 "
+    "導导 屬属 廣广 張张 強强 歸归 戰战 戲戏 擊击 據据 數数 斷断 無无 難难 "
+    "雞鸡 雙双 雜杂 離离 齊齐 龍龙 藥药 藝艺 號号 處处 蟲虫 衛卫 裝装 規规 "
+    "計计 認认 討讨 讓让 記记 許许 論论 設设 證证 評评 試试 詩诗 該该 誤误 "
+    "請请 談谈 識识 護护 變变 負负 責责 費费 貴贵 資资 質质 購购 趕赶 軍军 "
+    "輕轻 較较 辦办 農农 鄉乡 醫医 鐘钟 銀银 錯错 閱阅 隊队 陽阳 陰阴 際际 "
+    "險险 隨随 雖虽 雲云 靈灵 靜静 項项 順顺 須须 預预 領领 顏颜 願愿 類类 "
+    "顯显 風风 飛飞 飯饭 飲饮 馬马 驗验 騙骗 驚惊 髮发 鬥斗 魚鱼 鳥鸟 麗丽 "
+    "黃黄 黨党 齒齿 傳传 償偿 優优 僅仅 價价 義义 華华 單单 圖图 圓圆 團团 "
+    "夢梦 奪夺 婦妇 媽妈 孫孙 寧宁 專专 層层 帶带 幫帮 彈弹 憑凭 懷怀 戀恋 "
+    "掃扫 換换 損损 擁拥 撥拨 攝摄 歲岁 殺杀 氣气 溝沟 滅灭 漢汉 濕湿 燈灯 "
+    "爭争 爺爷 犧牺 獎奖 環环 療疗 盡尽 監监 碼码 確确 礙碍 禮礼 稱称 穩稳 "
+    "筆笔 築筑 約约 紀纪 純纯 細细 終终 組组 統统 絕绝 絲丝 綠绿 緊紧 編编 "
+    "總总 縣县 聯联 腦脑 臉脸 舊旧 艦舰 蘭兰 補补 襲袭 觀观 訊讯 詢询 "
+    "誌志 語语 課课 調调 謝谢 豐丰 貓猫 贊赞 贏赢 蹤踪 轉转 輸输 辭辞 "
+    "鐵铁 鎖锁 閃闪 闆板 陳陈 陸陆 韻韵 響响 頻频 額额 飽饱 館馆 驅驱 鬧闹 "
+    "廢废 廳厅 彌弥 慣惯 懶懒 戶户 晝昼 曬晒 藍蓝 虛虚 蠻蛮 訪访 詐诈 "
+    "賭赌 賺赚 賬账 贈赠 輛辆 週周 鄰邻 釋释 針针 鈔钞 錄录 鍵键 鏈链"
+)
+
+
+def _build_tables() -> Tuple[Dict[int, Optional[str]], Dict[int, Optional[str]]]:
+    """
+    预计算翻译表：
+    - 全角/兼容字符折叠为基本形式（NFKC），并做大小写折叠
+    - 删除零宽字符、控制字符、标点、空白与符号（含常见表情）
+    返回 (基础表, 额外做繁转简的表)
+    """
+
+    def strip(s: str) -> str:
+        return "".join(ch for ch in s if unicodedata.category(ch)[0] not in "PZSC")
+
+    table: Dict[int, Optional[str]] = {}
+    codepoints = list(range(0xD800)) + list(range(0xE000, 0x10000))
+    codepoints += list(range(0x1F000, 0x1FB00))
+    for cp in codepoints:
+        ch = chr(cp)
+        if unicodedata.category(ch)[0] in "PZSC":
+            table[cp] = None
+            continue
+        folded = strip(unicodedata.normalize("NFKC", ch).casefold())
+        if folded != ch:
+            table[cp] = folded or None
+
+    t2s_table = dict(table)
+    for pair in TRADITIONAL_PAIRS.split():
+        t2s_table[ord(pair[0])] = pair[1]
+    return table, t2s_table
+
+
+_TABLES: Optional[Tuple[Dict[int, Optional[str]], Dict[int, Optional[str]]]] = None
+
+
+def _get_tables():
+    global _TABLES
+    if _TABLES is None:
+        _TABLES = _build_tables()
+    return _TABLES
+
+
+class TextNormalizer:
+    """
+    违禁词匹配前的文本归一化：全角转半角、大小写折叠、
+    去除零宽字符/标点/空白/符号，可选繁体转简体。
+    基于预计算的翻译表，每条消息只需一次 str.translate。
+    """
+
+    def __init__(self, fold_traditional: bool = False):
+        base, t2s = _get_tables()
+        self.fold_traditional = fold_traditional
+        self.table = t2s if fold_traditional else base
+
+    def __reduce__(self):
+        # 跨进程传递时只传参数，翻译表在目标进程内重新构建
+        return TextNormalizer, (self.fold_traditional,)
+
+    def normalize(self, text: str) -> str:
+        """归一化文本，用于匹配"""
+        return text.translate(self.table)
+
+    def normalize_with_offsets(self, text: str) -> Tuple[str, List[int]]:
+        """
+        归一化文本并返回偏移表：offsets[i] 为归一化文本第 i 个字符在原文中的下标。
+        逐字处理，较慢，只在命中后需要定位原文时使用。
+        """
+        table = self.table
+        out: List[str] = []
+        offsets: List[int] = []
+        for i, ch in enumerate(text):
+            mapped = table.get(ord(ch), ch)
+            if not mapped:
+                continue
+            out.append(mapped)
+            offsets.extend([i] * len(mapped))
+        return "".join(out), offsets
+
+    def locate(self, text: str, start: int, end: int) -> Tuple[int, int]:
+        """将归一化文本中的区间 [start, end) 映射回原文区间"""
+        _, offsets = self.normalize_with_offsets(text)
+        return offsets[start], offsets[end - 1] + 1
+
+
+class WordMatcher:
+    """
+    违禁词匹配器：消息归一化一次后逐个查找归一化后的违禁词。
+    归一化会去掉空白，纯 ASCII 的词（如 sb）因此可能横跨两个英文单词命中，
+    这类词要求命中处在原文中前后都不紧挨着英文字母或数字。
+    """
+
+    def __init__(self, normalizer: TextNormalizer, words: List[Tuple[str, str]]):
+        """
+        :param words: (原词, 归一化后的词) 列表
+        """
+        self.normalizer = normalizer
+        self.words = words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _is_word_char(self, ch: str) -> bool:
+        mapped = self.normalizer.table.get(ord(ch), ch)
+        return bool(mapped) and mapped.isascii() and mapped.isalnum()
+
+    def _on_boundary(self, text: str, start: int, end: int) -> bool:
+        """原文区间 [start, end) 两侧不与英文字母或数字相连"""
+        if start > 0 and self._is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and self._is_word_char(text[end]):
+            return False
+        return True
+
+    def find(self, text: str) -> Optional[Tuple[str, int, int]]:
+        """返回第一个命中的 (原词, 原文起点, 原文终点)，未命中返回 None"""
+        normalized = self.normalizer.normalize(text)
+        offsets: Optional[List[int]] = None
+        for word, normalized_word in self.words:
+            if not normalized_word:
+                continue
+            ascii_word = normalized_word.isascii()
+            pos = normalized.find(normalized_word)
+            while pos != -1:
+                if offsets is None:
+                    _, offsets = self.normalizer.normalize_with_offsets(text)
+                start = offsets[pos]
+                end = offsets[pos + len(normalized_word) - 1] + 1
+                if not ascii_word or self._on_boundary(text, start, end):
+                    return word, start, end
+                pos = normalized.find(normalized_word, pos + 1)
+        return None
+
+
+if __name__ == "__main__":
+    # 吞吐量基准：python -m core.text_normalizer
+    import timeit
+
+    start = timeit.default_timer()
+    normalizer = TextNormalizer(fold_traditional=True)
+    print(f"构建翻译表耗时：{(timeit.default_timer() - start) * 1000:.1f} ms")
+
+    samples = {
+        "短消息": "今天天气不错，大家吃了吗？",
+        "变形消息": "傻​ 逼ＳＢ，你們這些人！！" * 3,
+        "长消息": "这是一条比较长的群聊消息，包含一些标点符号和English words. " * 10,
+    }
+    for name, msg in samples.items():
+        n = 100_000
+        cost = timeit.timeit(lambda: normalizer.normalize(msg), number=n)
+        print(f"{name}（{len(msg)}字）：{cost / n * 1e6:.2f} µs/条")
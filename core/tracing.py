@@ -0,0 +1,235 @@
+import asyncio
+import contextvars
+import heapq
+import inspect
+import json
+import os
+import random
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from astrbot import logger
+
+
+class Trace:
+    """一次命令调用的耗时记录"""
+
+    __slots__ = ("name", "group_id", "start", "wall", "total", "spans", "finished")
+
+    MAX_SPANS = 64
+
+    def __init__(self, name: str, group_id: str = ""):
+        self.name = name
+        self.group_id = group_id
+        self.start = time.perf_counter()
+        self.wall = time.time()
+        self.total = 0.0
+        # (span 名称, 相对开始时间, 耗时)，单位秒
+        self.spans: List[Tuple[str, float, float]] = []
+        self.finished = False
+
+    def add(self, name: str, start: float, duration: float):
+        if not self.finished and len(self.spans) < self.MAX_SPANS:
+            self.spans.append((name, start - self.start, duration))
+
+    def to_dict(self) -> dict:
+        return {
+            "command": self.name,
+            "group_id": self.group_id,
+            "time": self.wall,
+            "total_ms": round(self.total * 1000, 2),
+            "spans": [
+                {"name": n, "at_ms": round(s * 1000, 2), "ms": round(d * 1000, 2)}
+                for n, s, d in self.spans
+            ],
+        }
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "qqadmin_trace", default=None
+)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """在当前命令的追踪中记录一段耗时，没有正在追踪的命令时不做任何事"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter() - start)
+
+
+async def _timed(name: str, awaitable):
+    trace = _current.get()
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        if trace is not None:
+            trace.add(name, start, time.perf_counter() - start)
+
+
+class TracedClient:
+    """
+    包装 CQHttp 客户端，每次 OneBot 调用记录为一个 span。
+    只包装返回可等待对象的调用，其余属性原样透传。
+    """
+
+    __slots__ = ("_client",)
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name == "api":
+            return TracedClient(attr)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not inspect.isawaitable(result):
+                return result
+            action = name
+            if name == "call_action":
+                action = args[0] if args else kwargs.get("action", name)
+            return _timed(f"onebot.{action}", result)
+
+        return call
+
+
+class Tracer:
+    """
+    命令耗时统计：
+    - 每个命令保留最近若干次的总耗时，用于计算 p50/p95/p99
+    - 保留最慢的 N 次调用及其各阶段耗时
+    - 超过阈值的慢调用按采样率写入慢日志（JSONL）
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.window = 1000
+        self.slowest_n = 20
+        self.slow_threshold = 1.0
+        self.sample_rate = 0.1
+        self.log_path: Optional[str] = None
+        self.max_log_size = 5 * 1024 * 1024
+        self._durations: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+        self._counts: Dict[str, int] = defaultdict(int)
+        # 最小堆，堆顶是当前保留的调用中最快的一次
+        self._slowest: List[Tuple[float, int, dict]] = []
+        self._seq = 0
+
+    def configure(
+        self,
+        enabled: bool = True,
+        window: int = 1000,
+        slowest_n: int = 20,
+        slow_threshold: float = 1.0,
+        sample_rate: float = 0.1,
+        log_path: Optional[str] = None,
+    ):
+        """
+        :param window: 每个命令用于计算分位数的最近调用数
+        :param slow_threshold: 慢调用阈值（秒）
+        :param sample_rate: 慢调用写入日志的采样率
+        """
+        self.enabled = enabled
+        self.window = max(1, window)
+        self.slowest_n = max(1, slowest_n)
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.log_path = log_path
+        self._durations.clear()
+        self._counts.clear()
+        self._slowest.clear()
+
+    def start(self, name: str, group_id: str = "") -> Tuple[Trace, contextvars.Token]:
+        trace = Trace(name, group_id)
+        return trace, _current.set(trace)
+
+    def finish(self, trace: Trace, token: contextvars.Token):
+        trace.total = time.perf_counter() - trace.start
+        trace.finished = True
+        try:
+            _current.reset(token)
+        except ValueError:
+            # 生成器在其他上下文中被关闭
+            pass
+        self._durations[trace.name].append(trace.total)
+        self._counts[trace.name] += 1
+
+        self._seq += 1
+        if len(self._slowest) < self.slowest_n:
+            heapq.heappush(self._slowest, (trace.total, self._seq, trace.to_dict()))
+        elif trace.total > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (trace.total, self._seq, trace.to_dict()))
+
+        if (
+            self.log_path
+            and trace.total >= self.slow_threshold
+            and random.random() < self.sample_rate
+        ):
+            line = json.dumps(trace.to_dict(), ensure_ascii=False) + "\n"
+            try:
+                asyncio.get_running_loop().run_in_executor(None, self._write_log, line)
+            except RuntimeError:
+                self._write_log(line)
+
+    def _write_log(self, line: str):
+        try:
+            assert self.log_path
+            if (
+                os.path.exists(self.log_path)
+                and os.path.getsize(self.log_path) > self.max_log_size
+            ):
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except Exception as e:
+            logger.warning(f"写入慢日志失败：{e}")
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], p: float) -> float:
+        index = max(0, min(len(sorted_values) - 1, int(len(sorted_values) * p + 0.5) - 1))
+        return sorted_values[index]
+
+    def stats(self) -> List[dict]:
+        """各命令的调用次数与耗时分位数（毫秒），按 p95 降序"""
+        rows = []
+        for name, values in self._durations.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            rows.append(
+                {
+                    "command": name,
+                    "count": self._counts[name],
+                    "p50": self._percentile(ordered, 0.50) * 1000,
+                    "p95": self._percentile(ordered, 0.95) * 1000,
+                    "p99": self._percentile(ordered, 0.99) * 1000,
+                }
+            )
+        rows.sort(key=lambda row: row["p95"], reverse=True)
+        return rows
+
+    def slowest(self) -> List[dict]:
+        """保留的最慢调用，按耗时降序"""
+        return [item for _, _, item in sorted(self._slowest, reverse=True)]
+
+
+tracer = Tracer()
@@ -1,9 +1,16 @@
 from datetime import datetime
+import json
 import os
 from typing import Tuple
 
 from aiohttp import ClientSession
-from astrbot.core.message.components import At, BaseMessageComponent, Image, Reply
+from astrbot.core.message.components import (
+    At,
+    BaseMessageComponent,
+    Image,
+    Json,
+    Reply,
+)
 from astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event import (
     AiocqhttpMessageEvent,
 )
@@ -37,10 +44,16 @@ ADMIN_HELP = (
     "- 取消管理员 @<用户> - 取消指定用户的管理员身份\n"
     "- 设为精华 - 将引用的消息设置为群精华\n"
     "- 移除精华 - 将引用的消息移出群精华\n"
-    "- 查看精华 - 查看群精华消息列表\n"
+    "- 查看精华 <页码> - 分页查看群精华消息\n"
     "- 撤回 - (引用消息)撤回 | 撤回 @某人(默认bot) 数量(默认10)\n"
     "- 设置群头像 - 引用图片设置群头像\n"
+    "- 添加违禁图 - 引用图片添加违禁图，相似图片会被撤回\n"
+    "- 删除违禁图 - 引用图片删除相近的违禁图\n"
     "- 设置群名 <新群名> - 修改群名称\n"
+    "- 禁用域名 <域名> - 本群禁止发送该域名及其子域名的链接，多个域名用空格分隔\n"
+    "- 放行域名 <域名> - 本群放行该域名及其子域名的链接，多个域名用空格分隔\n"
+    "- 删除域名规则 <域名> - 删除本群的域名规则\n"
+    "- 查看域名规则 - 查看本群的域名规则\n"
     "- 发布群公告 <内容> - 发布群公告，可引用图片\n"
     "- 查看群公告 - 查看群公告\n"
     "- 开启宵禁 <HH:MM> <HH:MM> - 开启宵禁任务，需输入开始时间、结束时间\n"
@@ -53,8 +66,20 @@ ADMIN_HELP = (
     "- 查看进群黑名单 - 查看当前群的进群黑名单\n"
     "- 同意进群 - 同意引用的进群申请\n"
     "- 拒绝进群 <理由> - 拒绝引用的进群申请，可附带拒绝理由\n"
-    "- 群友信息 - 查看群成员信息\n"
+    "- 同意全部 - 同意本群全部待处理的进群申请\n"
+    "- 拒绝全部 <理由> - 拒绝本群全部待处理的进群申请，可附带拒绝理由\n"
+    "- 群友信息 <页码> - 分页查看群成员信息，不填页码则发送全部页\n"
+    "- 处罚记录 @<用户> - 查看指定用户在本群的处罚记录\n"
     "- 清理群友 <未发言天数> <群等级> - 清理群友，可指定未发言天数和群等级\n"
+    "- 重载群管配置 - 重新读取配置文件，只重建变化的部分\n"
+    "- 群管性能 - 查看各命令的耗时分位数与最慢的几次调用\n"
+    "- 群活跃 <天数> - 查看本群近几天的消息数、活跃人数和话唠榜\n"
+    "- 全群禁言 - 在bot所在的所有群开启全员禁言\n"
+    "- 全群解禁 - 在bot所在的所有群关闭全员禁言\n"
+    "- 全群公告 <内容> - 向bot所在的所有群发布群公告，可引用一张图片\n"
+    "- 全群拉黑 <QQ号> - 将QQ号加入所有群的进群黑名单\n"
+    "- 全群任务 <编号> - 继续中断的全群任务，不填编号则查看未完成的任务\n"
+    "- 停止全群任务 <编号> - 停止正在执行的全群任务\n"
     "- 群管帮助 - 显示本插件的帮助信息"
 )
 
@@ -111,6 +136,12 @@ def get_reply_message_str(event: AiocqhttpMessageEvent) -> str | None:
     )
 
 
+def paginate(items: list, page_size: int) -> list[list]:
+    """将列表按固定大小切分为若干页"""
+    page_size = max(1, page_size)
+    return [items[i : i + page_size] for i in range(0, len(items), page_size)]
+
+
 def format_time(timestamp):
     """格式化时间戳"""
     return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
@@ -147,3 +178,14 @@ def extract_image_url(chain: list[BaseMessageComponent]) -> str | None:
                     return reply_seg.url
     return None
 
+
+def extract_card_text(chain: list[BaseMessageComponent]) -> str:
+    """提取卡片/JSON消息中的原始文本，用于检测其中的链接"""
+    parts = []
+    for seg in chain:
+        if isinstance(seg, Json):
+            data = seg.data
+            parts.append(
+                data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+            )
+    return "\n".join(parts)
@@ -1,5 +1,8 @@
 import asyncio
 from collections import defaultdict, deque
+import copy
+import hashlib
+import json
 import os
 import random
 import textwrap
@@ -21,8 +24,33 @@ from astrbot.core.utils.session_waiter import (
 )
 from astrbot.api.star import StarTools
 from astrbot.core.star.filter.event_message_type import EventMessageType
+from .core.activity import ActivityStats
+from .core.admin_notifier import AdminNotifier
 from .core.curfew_manager import CurfewManager
+from .core.dup_detector import CopyRaidDetector
+from .core.essence import EssenceCache
+from .core.executor import TaskExecutor
+from .core.fanout import FanoutEngine, FanoutJob
 from .core.group_join_manager import GroupJoinManager
+from .core.image_filter import ImageFilter
+from .core.join_guard import JoinGuard
+from .core.join_requests import JoinRequest, JoinRequestStore
+from .core.journal import ModerationJournal
+from .core.last_seen import LastSeenIndex
+from .core.link_filter import ALLOW, DENY, LinkFilter
+from .core.load_shedder import LoadShedder
+from .core.outbound import ReplyPacer, TokenBucket
+from .core.render_pool import (
+    PRIORITY_BULK,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    RenderScheduler,
+)
+from .core.reputation import ReputationStore
+from .core.resilience import call_guard, guarded
+from .core.single_flight import ModerationFlight
+from .core.text_normalizer import TextNormalizer, WordMatcher
+from .core.tracing import span, tracer
 from .core.permission import (
     PermLevel,
     PermissionManager,
@@ -46,12 +74,80 @@ class AdminPlugin(Star):
         self._load_config()
         self.curfew_managers: dict[str, CurfewManager] = {}
 
+    # 顶层配置项 -> 负责该项的加载方法，热重载时只重新执行发生变化的项对应的方法
+    CONFIG_LOADERS: dict[str, str] = {
+        # 执行器须最先创建，后续加载方法会向其登记常驻状态
+        "executor_config": "_load_executor_config",
+        "superusers": "_load_perm_config",
+        "perms": "_load_perm_config",
+        "level_threshold": "_load_perm_config",
+        "perm_cache_config": "_load_perm_config",
+        "ban_time_setting": "_load_ban_config",
+        "night_ban_config": "_load_ban_config",
+        "forbidden_config": "_load_forbidden_config",
+        "image_filter_config": "_load_image_filter_config",
+        "link_filter_config": "_load_link_filter_config",
+        "copy_raid_config": "_load_copy_raid_config",
+        "reputation_config": "_load_reputation_config",
+        "spamming_config": "_load_spamming_config",
+        "enable_audit": "_load_join_config",
+        "admin_audit": "_load_join_config",
+        "enable_black": "_load_join_config",
+        "auto_black": "_load_join_config",
+        "join_request_config": "_load_join_config",
+        "admin_notify_debounce": "_load_join_config",
+        "outbound_config": "_load_outbound_config",
+        "onebot_config": "_load_onebot_config",
+        "join_guard_config": "_load_join_guard_config",
+        "dedup_config": "_load_dedup_config",
+        "trace_config": "_load_trace_config",
+        "journal_config": "_load_journal_config",
+        "load_shed_config": "_load_shedding_config",
+        "activity_config": "_load_activity_config",
+        "last_seen_config": "_load_last_seen_config",
+        "essence_config": "_load_essence_config",
+        "render_config": "_load_render_config",
+        "fanout_config": "_load_fanout_config",
+        "member_list_config": "_load_member_list_config",
+        "config_watch_interval": "_load_config_watch_config",
+    }
+
     def _load_config(self):
         """加载并初始化插件配置"""
+        for loader in dict.fromkeys(self.CONFIG_LOADERS.values()):
+            getattr(self, loader)()
+        self._config_snapshot = copy.deepcopy(dict(self.config))
+
+    def _load_executor_config(self):
+        executor_config = self.config.get("executor_config", {})
+        mode: str = executor_config.get("mode", "inline")
+        workers: int = executor_config.get("workers", 2)
+        if executor := getattr(self, "executor", None):
+            executor.configure(mode, workers)
+        else:
+            self.executor = TaskExecutor(mode, workers)
+
+    def _load_perm_config(self):
         superusers_set = set(self.config.get("superusers", []))
         superusers_set.update(self.context.get_config().get("admins_id", []))
         self.superusers = list(superusers_set)
 
+        self.level_threshold: int = self.config.get("level_threshold", 50)
+        self.perms: dict = self.config.get("perms", {})
+
+        perm_cache_config = self.config.get("perm_cache_config", {})
+        self.perm_cache_ttl: int = perm_cache_config.get("cache_ttl", 600)
+        self.enable_warm_up: bool = perm_cache_config.get("warm_up", False)
+        self.warm_up_concurrency: int = perm_cache_config.get(
+            "warm_up_concurrency", 5
+        )
+        perm_manager = PermissionManager._instance
+        if perm_manager is not None and perm_manager._initialized:
+            perm_manager.configure(
+                self.superusers, self.perms, self.level_threshold, self.perm_cache_ttl
+            )
+
+    def _load_ban_config(self):
         ban_time_setting = self.config.get("ban_time_setting", {})
         self.ban_rand_time_min: int = ban_time_setting.get("ban_rand_time_min", 30)
         self.ban_rand_time_max: int = ban_time_setting.get("ban_rand_time_max", 300)
@@ -60,44 +156,383 @@ class AdminPlugin(Star):
         self.night_start_time: str = night_ban_config.get("night_start_time", "23:30")
         self.night_end_time: str = night_ban_config.get("night_end_time", "6:00")
 
+    def _load_forbidden_config(self):
         forbidden_config = self.config.get("forbidden_config", {})
         raw_words = forbidden_config.get("forbidden_words", "")
         if isinstance(raw_words, str):
-            self.forbidden_words = [word.strip() for word in raw_words.split("，") if word.strip()]
+            forbidden_words = [word.strip() for word in raw_words.split("，") if word.strip()]
         elif isinstance(raw_words, list):
-            self.forbidden_words = [word.strip() for word in raw_words if word.strip()]
+            forbidden_words = [word.strip() for word in raw_words if word.strip()]
         else:
-            self.forbidden_words = []
+            forbidden_words = []
+        # 违禁词与消息使用同一套归一化规则，归一化后为空的词忽略
+        text_normalizer = TextNormalizer(
+            fold_traditional=forbidden_config.get("fold_traditional", False)
+        )
+        normalized_forbidden_words: list[tuple[str, str]] = [
+            (word, normalized)
+            for word in forbidden_words
+            if (normalized := text_normalizer.normalize(word))
+        ]
+        # 构建完成后整体替换，正在匹配的消息不受影响
+        self.forbidden_words = forbidden_words
+        self.text_normalizer = text_normalizer
+        self.forbidden_matcher = WordMatcher(
+            text_normalizer, normalized_forbidden_words
+        )
+        self.executor.set_state("forbidden", self.forbidden_matcher)
         self.forbidden_words_group: list[str] = forbidden_config.get(
             "forbidden_words_group", []
         )
         self.forbidden_words_ban_time: int = forbidden_config.get(
             "forbidden_words_ban_time", 60
         )
+
+    def _load_image_filter_config(self):
+        image_filter_config = self.config.get("image_filter_config", {})
+        self.enable_image_filter: bool = image_filter_config.get("enable", False)
+        self.image_max_distance: int = image_filter_config.get("max_distance", 6)
+        self.image_ban_time: int = image_filter_config.get("ban_time", 0)
+        self.image_concurrency: int = image_filter_config.get("concurrency", 4)
+        if image_filter := getattr(self, "image_filter", None):
+            image_filter.configure(self.image_max_distance, self.image_concurrency)
+
+    def _load_link_filter_config(self):
+        link_filter_config = self.config.get("link_filter_config", {})
+        self.enable_link_filter: bool = link_filter_config.get("enable", False)
+        self.link_ban_time: int = link_filter_config.get("ban_time", 0)
+        self.deny_domains: list[str] = [
+            d.strip()
+            for d in link_filter_config.get("deny_domains", "").split("，")
+            if d.strip()
+        ]
+        self.allow_domains: list[str] = [
+            d.strip()
+            for d in link_filter_config.get("allow_domains", "").split("，")
+            if d.strip()
+        ]
+        if link_filter := getattr(self, "link_filter", None):
+            link_filter.set_global_rules(self.deny_domains, self.allow_domains)
+
+    def _load_copy_raid_config(self):
+        copy_raid_config = self.config.get("copy_raid_config", {})
+        self.enable_copy_raid: bool = copy_raid_config.get("enable", False)
+        self.copy_raid_ban_time: int = copy_raid_config.get("ban_time", 600)
+        params = dict(
+            window=copy_raid_config.get("window", 60),
+            min_senders=copy_raid_config.get("min_senders", 5),
+            threshold=copy_raid_config.get("similarity", 0.8),
+            max_entries=copy_raid_config.get("max_entries", 500),
+        )
+        if detector := getattr(self, "copy_raid_detector", None):
+            detector.configure(**params)
+        else:
+            self.copy_raid_detector = CopyRaidDetector(**params)
+            self.executor.set_state("minhash", self.copy_raid_detector.hasher)
+
+    def _load_reputation_config(self):
+        reputation_config = self.config.get("reputation_config", {})
+        self.enable_reputation: bool = reputation_config.get("enable", False)
+        self.reputation_half_life: float = (
+            reputation_config.get("half_life_days", 7) * 86400
+        )
+        self.reputation_step: float = max(1, reputation_config.get("escalate_step", 5))
+        self.reputation_max_ban_time: int = reputation_config.get(
+            "max_ban_time", 604800
+        )
+        self.reputation_reject_score: float = reputation_config.get(
+            "join_reject_score", 15
+        )
+        if reputation := getattr(self, "reputation", None):
+            reputation.configure(self.reputation_half_life)
+            if self.enable_reputation:
+                reputation.start()
+            else:
+                reputation.stop()
+
+    def _load_spamming_config(self):
         spamming_config = self.config.get("spamming_config", {})
+        old_count = getattr(self, "min_count", None)
         self.min_interval = spamming_config.get("min_interval", 0.5)
         self.min_count = spamming_config.get("min_count", 4)
         self.spamming_ban_time = spamming_config.get("spamming_ban_time", 600)
         self.spamming_group_whitelist = spamming_config.get(
             "spamming_group_whitelist", []
         )
-        self.msg_timestamps: dict[str, dict[str, deque[float]]] = defaultdict(
-            lambda: defaultdict(lambda: deque(maxlen=self.min_count))
-        )
-        self.last_banned_time: dict[str, dict[str, float]] = defaultdict(
-            lambda: defaultdict(float)
-        )
-        self.last_banned_time: dict[str, dict[str, float]] = defaultdict(
-            lambda: defaultdict(float)
-        )
+        if old_count is None:
+            # 刷屏检测的运行状态只创建一次，重载配置时保留
+            self.msg_timestamps: dict[str, dict[str, deque[float]]] = defaultdict(
+                lambda: defaultdict(lambda: deque(maxlen=self.min_count))
+            )
+            self.last_banned_time: dict[str, dict[str, float]] = defaultdict(
+                lambda: defaultdict(float)
+            )
+        elif old_count != self.min_count:
+            # 按新的计数调整已有队列的长度，保留最近的时间戳
+            for users in self.msg_timestamps.values():
+                for user_id, timestamps in users.items():
+                    users[user_id] = deque(timestamps, maxlen=self.min_count)
 
+    def _load_join_config(self):
         self.enable_audit: bool = self.config.get("enable_audit", False)
         self.admin_audit: bool = self.config.get("admin_audit", False)
         self.enable_black: bool = self.config.get("enable_black", False)
         self.auto_black: bool = self.config.get("auto_black", False)
 
-        self.level_threshold: int = self.config.get("level_threshold", 50)
-        self.perms: dict = self.config.get("perms", {})
+        join_request_config = self.config.get("join_request_config", {})
+        self.join_request_ttl: float = join_request_config.get("ttl_hours", 24) * 3600
+        bulk_rate = join_request_config.get("bulk_rate", 5)
+        self.join_request_concurrency: int = max(
+            1, join_request_config.get("bulk_concurrency", 5)
+        )
+        if join_requests := getattr(self, "join_requests", None):
+            join_requests.ttl = self.join_request_ttl
+        debounce = self.config.get("admin_notify_debounce", 3)
+        if getattr(self, "admin_notifier", None):
+            self.join_request_bucket.configure(bulk_rate, bulk_rate)
+            self.admin_notifier.configure(debounce)
+        else:
+            self.join_request_bucket = TokenBucket(rate=bulk_rate, capacity=bulk_rate)
+            self.admin_notifier = AdminNotifier(debounce=debounce)
+
+    def _load_outbound_config(self):
+        outbound_config = self.config.get("outbound_config", {})
+        params = dict(
+            rate=outbound_config.get("rate", 1.0),
+            burst=outbound_config.get("burst", 5),
+            max_length=outbound_config.get("max_length", 3000),
+        )
+        if reply_pacer := getattr(self, "reply_pacer", None):
+            reply_pacer.configure(**params)
+        else:
+            self.reply_pacer = ReplyPacer(**params)
+
+    def _load_onebot_config(self):
+        onebot_config = self.config.get("onebot_config", {})
+        call_guard.configure(
+            timeout=onebot_config.get("timeout", 10),
+            slow_timeout=onebot_config.get("slow_timeout", 60),
+            retries=onebot_config.get("retries", 2),
+            breaker_threshold=onebot_config.get("breaker_threshold", 5),
+            breaker_cooldown=onebot_config.get("breaker_cooldown", 30),
+        )
+
+    def _load_join_guard_config(self):
+        join_guard_config = self.config.get("join_guard_config", {})
+        self.enable_join_guard: bool = join_guard_config.get("enable", False)
+        params = dict(
+            window=join_guard_config.get("window", 60),
+            threshold=join_guard_config.get("threshold", 10),
+            lockdown_time=join_guard_config.get("lockdown_time", 300),
+            reject=join_guard_config.get("action", "拒绝") == "拒绝",
+            reject_reason=join_guard_config.get("reject_reason", ""),
+            batch_interval=join_guard_config.get("batch_interval", 5),
+            concurrency=join_guard_config.get("concurrency", 5),
+        )
+        if join_guard := getattr(self, "join_guard", None):
+            join_guard.configure(**params)
+        else:
+            self.join_guard = JoinGuard(
+                notify=self._notify_group_event,
+                on_reject=lambda group_id, user_id: self._record(
+                    group_id, user_id, "拒绝进群", "进群防刷"
+                ),
+                **params,
+            )
+
+    def _load_dedup_config(self):
+        dedup_config = self.config.get("dedup_config", {})
+        params = dict(
+            notice_window=dedup_config.get("notice_window", 10),
+            recall_window=dedup_config.get("recall_window", 60),
+        )
+        if moderation := getattr(self, "moderation", None):
+            moderation.configure(**params)
+        else:
+            self.moderation = ModerationFlight(**params)
+
+    def _load_trace_config(self):
+        self.trace_config: dict = self.config.get("trace_config", {})
+        if getattr(self, "plugin_data_dir", None):
+            self._configure_tracer()
+
+    def _configure_tracer(self):
+        tracer.configure(
+            enabled=self.trace_config.get("enable", False),
+            window=self.trace_config.get("window", 1000),
+            slowest_n=self.trace_config.get("slowest_n", 20),
+            slow_threshold=self.trace_config.get("slow_threshold_ms", 1000) / 1000,
+            sample_rate=self.trace_config.get("sample_rate", 0.1),
+            log_path=os.path.join(self.plugin_data_dir, "slow_log.jsonl"),
+        )
+
+    def _load_journal_config(self):
+        journal_config = self.config.get("journal_config", {})
+        self.journal_segment_size: int = int(
+            journal_config.get("segment_size_mb", 8) * 1024 * 1024
+        )
+        self.journal_max_segments: int = journal_config.get("max_segments", 32)
+        self.journal_query_limit: int = journal_config.get("query_limit", 20)
+        if journal := getattr(self, "journal", None):
+            journal.configure(self.journal_segment_size, self.journal_max_segments)
+
+    def _load_shedding_config(self):
+        load_shed_config = self.config.get("load_shed_config", {})
+        self.enable_load_shed: bool = load_shed_config.get("enable", True)
+        params = dict(
+            interval=load_shed_config.get("interval", 0.5),
+            lag_threshold=load_shed_config.get("lag_threshold_ms", 500) / 1000,
+            recover_threshold=load_shed_config.get("recover_threshold_ms", 200) / 1000,
+            max_queue=load_shed_config.get("max_queue", 1000),
+        )
+        if load_shedder := getattr(self, "load_shedder", None):
+            load_shedder.configure(**params)
+            if self.enable_load_shed:
+                load_shedder.start()
+            else:
+                load_shedder.stop()
+        else:
+            self.load_shedder = LoadShedder(**params)
+
+    def _load_activity_config(self):
+        activity_config = self.config.get("activity_config", {})
+        self.enable_activity: bool = activity_config.get("enable", True)
+        self.activity_retention_days: int = activity_config.get("retention_days", 7)
+        self.activity_top_k: int = activity_config.get("top_k", 50)
+        self.activity_flush_interval: float = activity_config.get(
+            "flush_interval", 300
+        )
+        if activity := getattr(self, "activity", None):
+            activity.configure(
+                self.activity_retention_days,
+                self.activity_top_k,
+                self.activity_flush_interval,
+            )
+            if self.enable_activity:
+                activity.start()
+            else:
+                activity.stop()
+
+    def _load_last_seen_config(self):
+        last_seen_config = self.config.get("last_seen_config", {})
+        self.enable_last_seen: bool = last_seen_config.get("enable", True)
+        self.last_seen_flush_interval: float = last_seen_config.get(
+            "flush_interval", 60
+        )
+        self.last_seen_max_open: int = last_seen_config.get("max_open_groups", 256)
+        if last_seen := getattr(self, "last_seen", None):
+            last_seen.configure(self.last_seen_flush_interval, self.last_seen_max_open)
+            if self.enable_last_seen:
+                last_seen.start()
+            else:
+                last_seen.stop()
+
+    def _load_essence_config(self):
+        essence_config = self.config.get("essence_config", {})
+        self.essence_cache_ttl: float = essence_config.get("cache_ttl", 600)
+        self.essence_page_size: int = max(1, essence_config.get("page_size", 10))
+        self.essence_send_images: bool = essence_config.get("send_images", True)
+        self.essence_image_concurrency: int = essence_config.get(
+            "image_concurrency", 4
+        )
+        if essence_cache := getattr(self, "essence_cache", None):
+            essence_cache.configure(
+                self.essence_cache_ttl, self.essence_image_concurrency
+            )
+
+    def _load_render_config(self):
+        render_config = self.config.get("render_config", {})
+        params = dict(
+            workers=render_config.get("workers", 2),
+            max_queue=render_config.get("max_queue", 20),
+            timeout=render_config.get("timeout", 30),
+        )
+        if render_scheduler := getattr(self, "render_scheduler", None):
+            render_scheduler.configure(**params)
+        else:
+            self.render_scheduler = RenderScheduler(self.text_to_image, **params)
+
+    def _load_fanout_config(self):
+        fanout_config = self.config.get("fanout_config", {})
+        self.fanout_concurrency: int = fanout_config.get("concurrency", 3)
+        self.fanout_rate: float = fanout_config.get("rate", 1)
+        self.fanout_progress_interval: float = fanout_config.get(
+            "progress_interval", 15
+        )
+        if fanout := getattr(self, "fanout", None):
+            fanout.configure(
+                self.fanout_concurrency,
+                self.fanout_rate,
+                self.fanout_progress_interval,
+            )
+
+    def _load_member_list_config(self):
+        member_list_config = self.config.get("member_list_config", {})
+        self.member_page_size: int = member_list_config.get("page_size", 200)
+        self.member_render_workers: int = max(
+            1, member_list_config.get("render_workers", 3)
+        )
+
+    def _load_config_watch_config(self):
+        self.config_watch_interval: float = self.config.get("config_watch_interval", 5)
+        # 插件初始化后，间隔从 0 调回正数时重新开始监听
+        if hasattr(self, "config_watch_task"):
+            self._start_config_watch()
+
+    def _start_config_watch(self):
+        task = getattr(self, "config_watch_task", None)
+        if self.config_watch_interval > 0 and (task is None or task.done()):
+            self.config_watch_task = asyncio.create_task(self._watch_config())
+
+    def _read_config_file(self) -> dict | None:
+        path = getattr(self.config, "config_path", None)
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return json.load(f)
+
+    async def reload_config(self) -> list[str]:
+        """
+        从配置文件重新读取配置，与上次加载的配置逐项比较，
+        只重建发生变化的配置项对应的结构，返回变化的配置项。
+        """
+        data = await asyncio.to_thread(self._read_config_file)
+        if data is not None:
+            self.config.update(data)
+        current = dict(self.config)
+        changed = [
+            key
+            for key in current.keys() | self._config_snapshot.keys()
+            if current.get(key) != self._config_snapshot.get(key)
+        ]
+        for loader in dict.fromkeys(
+            self.CONFIG_LOADERS[key] for key in changed if key in self.CONFIG_LOADERS
+        ):
+            getattr(self, loader)()
+        self._config_snapshot = copy.deepcopy(current)
+        if changed:
+            logger.info(f"群管配置已重载，变化的配置项：{changed}")
+        return changed
+
+    async def _watch_config(self):
+        """定时检查配置文件的修改时间，变化时自动重载"""
+        path = getattr(self.config, "config_path", None)
+        if not path:
+            return
+        last_mtime = os.path.getmtime(path) if os.path.exists(path) else 0
+        while self.config_watch_interval > 0:
+            await asyncio.sleep(self.config_watch_interval)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if mtime == last_mtime:
+                continue
+            last_mtime = mtime
+            try:
+                await self.reload_config()
+            except Exception as e:
+                logger.error(f"自动重载群管配置失败：{e}")
 
     async def initialize(self):
         # 初始化权限管理器
@@ -105,25 +540,279 @@ class AdminPlugin(Star):
             superusers=self.superusers,
             perms=self.perms,
             level_threshold=self.level_threshold,
+            cache_ttl=self.perm_cache_ttl,
         )
+        # 后台预热权限缓存，不阻塞插件加载
+        self.warm_up_task: asyncio.Task | None = None
+        if self.enable_warm_up:
+            self.warm_up_task = asyncio.create_task(self._warm_up_permissions())
         # 初始化进群管理器
         self.plugin_data_dir = StarTools.get_data_dir("astrbot_plugin_QQAdmin")
         group_join_data = os.path.join(self.plugin_data_dir, "group_join_data.json")
         self.group_join_manager = GroupJoinManager(group_join_data)
+        self.join_requests = JoinRequestStore(
+            os.path.join(self.plugin_data_dir, "pending_join_requests.json"),
+            ttl=self.join_request_ttl,
+        )
+        # 初始化命令耗时追踪
+        self._configure_tracer()
+        # 初始化处罚记录
+        self.journal = ModerationJournal(
+            os.path.join(self.plugin_data_dir, "journal"),
+            segment_size=self.journal_segment_size,
+            max_segments=self.journal_max_segments,
+        )
+        # 初始化跨群违规信誉
+        self.reputation = ReputationStore(
+            os.path.join(self.plugin_data_dir, "reputation.json"),
+            half_life=self.reputation_half_life,
+        )
+        if self.enable_reputation:
+            self.reputation.start()
+        # 初始化群活跃统计
+        self.activity = ActivityStats(
+            os.path.join(self.plugin_data_dir, "activity.json"),
+            retention_days=self.activity_retention_days,
+            top_k=self.activity_top_k,
+            flush_interval=self.activity_flush_interval,
+        )
+        if self.enable_activity:
+            self.activity.start()
+        # 初始化最后发言时间索引
+        self.last_seen = LastSeenIndex(
+            os.path.join(self.plugin_data_dir, "last_seen"),
+            flush_interval=self.last_seen_flush_interval,
+            max_open=self.last_seen_max_open,
+        )
+        if self.enable_last_seen:
+            self.last_seen.start()
+        # 初始化群精华缓存
+        self.essence_cache = EssenceCache(
+            os.path.join(self.plugin_data_dir, "essence_images"),
+            ttl=self.essence_cache_ttl,
+            image_concurrency=self.essence_image_concurrency,
+        )
+        # 初始化跨群批量操作
+        self.fanout = FanoutEngine(
+            os.path.join(self.plugin_data_dir, "fanout_jobs.json"),
+            concurrency=self.fanout_concurrency,
+            rate=self.fanout_rate,
+            progress_interval=self.fanout_progress_interval,
+        )
+        # 初始化链接过滤器
+        self.link_filter = LinkFilter(
+            os.path.join(self.plugin_data_dir, "link_rules.json"),
+            deny_domains=self.deny_domains,
+            allow_domains=self.allow_domains,
+        )
+        # 初始化违禁图片过滤器
+        self.image_filter = ImageFilter(
+            os.path.join(self.plugin_data_dir, "banned_images.json"),
+            max_distance=self.image_max_distance,
+            concurrency=self.image_concurrency,
+            executor=self.executor,
+        )
+        # 监控事件循环延迟，过载时推迟非必要任务
+        if self.enable_load_shed:
+            self.load_shedder.start()
+        # 监听配置文件变化，自动热重载
+        self.config_watch_task: asyncio.Task | None = None
+        self._start_config_watch()
         # 概率打印LOGO（qwq）
         if random.random() < 0.01:
             print_logo()
 
-    async def _send_admin(self, client: CQHttp, message: str):
-        """向bot管理员发送私聊消息"""
-        for admin_id in self.admins_id:
-            if admin_id.isdigit():
+    async def _render(
+        self,
+        event: AiocqhttpMessageEvent,
+        text: str,
+        priority: int = PRIORITY_NORMAL,
+    ):
+        """
+        将文本交给渲染调度器渲染为图片结果（耗时计入命令追踪）；
+        降载、排队已满、超时或渲染失败时直接以文字发送
+        """
+        with span("render"):
+            url = await self.load_shedder.fetch(
+                "render",
+                lambda: self.render_scheduler.render(
+                    event.get_group_id(), text, priority
+                ),
+                None,
+            )
+        return event.image_result(url) if url else event.plain_result(text)
+
+    async def _get_nickname(self, event: AiocqhttpMessageEvent, user_id) -> str:
+        """获取群友昵称，降载时以QQ号代替"""
+        return await self.load_shedder.fetch(
+            "nickname", lambda: get_nickname(event, user_id), str(user_id)
+        )
+
+    async def _get_stranger_nickname(self, client: CQHttp, user_id: str) -> str:
+        """获取陌生人昵称，降载时跳过查询"""
+
+        async def query() -> str:
+            info = await client.get_stranger_info(user_id=int(user_id))
+            return info["nickname"] or "未知昵称"
+
+        return await self.load_shedder.fetch("stranger_info", query, "未知昵称")
+
+    def _get_clients(self) -> list[CQHttp]:
+        """获取所有 aiocqhttp 平台实例的客户端，多账号部署时会有多个"""
+        return [
+            guarded(inst.get_client())  # type: ignore
+            for inst in self.context.platform_manager.get_insts()
+            if inst.meta().name == "aiocqhttp"
+        ]
+
+    async def _warm_up_permissions(self, retries: int = 30, interval: float = 10):
+        """预热各账号在各群的身份与群主/管理员名单，协议端未连接时定时重试"""
+        perm_manager = PermissionManager.get_instance()
+        warmed: set[int] = set()
+        for _ in range(retries):
+            clients = self._get_clients()
+            for client in clients:
+                if id(client) in warmed:
+                    continue
+                start = time.perf_counter()
                 try:
-                    await client.send_private_msg(
-                        user_id=int(admin_id), message=message
+                    count = await perm_manager.warm_up(
+                        client, concurrency=self.warm_up_concurrency
                     )
                 except Exception as e:
-                    logger.error(f"无法发送消息给bot管理员：{e}")
+                    logger.debug(f"权限缓存预热暂不可用：{e}")
+                    continue
+                warmed.add(id(client))
+                logger.info(
+                    f"权限缓存预热完成：{count} 个群，耗时 {time.perf_counter() - start:.2f}s"
+                )
+            if clients and len(warmed) == len(clients):
+                return
+            await asyncio.sleep(interval)
+        logger.warning("权限缓存预热未完成：部分协议端始终未连接")
+
+    async def _ban_members(
+        self,
+        event: AiocqhttpMessageEvent,
+        user_ids: list[str],
+        duration: int,
+        reason: str = "",
+    ) -> int:
+        """
+        禁言一批群友（duration 为 0 即解禁），目标分摊给群内有管理权限的各 bot 账号，返回成功数。
+        reason 非空表示自动处罚（与其他检测的处罚合并，重者生效），为空表示由发送者手动操作
+        """
+        group_id = int(event.get_group_id())
+        operator = "自动" if reason else event.get_sender_id()
+
+        async def ban_shard(client: CQHttp, shard: list[str]) -> int:
+            success = 0
+            for uid in shard:
+                try:
+                    issued = await self.moderation.ban(
+                        client, group_id, uid, duration, force=not reason
+                    )
+                    success += 1
+                    if not issued:
+                        continue
+                    if duration:
+                        self._record(
+                            group_id, uid, "禁言", f"{duration}秒 {reason}", operator
+                        )
+                    else:
+                        self._record(group_id, uid, "解禁", reason, operator)
+                except Exception as e:
+                    logger.warning(f"禁言 {uid} 失败：{e}")
+            return success
+
+        shards = PermissionManager.get_instance().shard_targets(event, user_ids)
+        return sum(await asyncio.gather(*(ban_shard(c, s) for c, s in shards)))
+
+    async def _kick_members(
+        self,
+        event: AiocqhttpMessageEvent,
+        user_ids: list[str],
+        reject_add_request: bool = False,
+        reason: str = "",
+    ) -> list[tuple[str, str, bool]]:
+        """踢出一批群友，目标分摊给群内有管理权限的各 bot 账号，返回 (QQ, 昵称, 是否成功)"""
+        group_id = int(event.get_group_id())
+        action = "拉黑" if reject_add_request else "踢出"
+
+        async def kick_shard(
+            client: CQHttp, shard: list[str]
+        ) -> list[tuple[str, str, bool]]:
+            results = []
+            for uid in shard:
+                target_name = uid
+                try:
+                    target_name = await self._get_nickname(event, uid)
+                    await client.set_group_kick(
+                        group_id=group_id,
+                        user_id=int(uid),
+                        reject_add_request=reject_add_request,
+                    )
+                    self._record(
+                        group_id, uid, action, reason, event.get_sender_id()
+                    )
+                    results.append((uid, target_name, True))
+                except Exception as e:
+                    logger.error(f"踢出 {target_name}({uid}) 失败：{e}")
+                    results.append((uid, target_name, False))
+            return results
+
+        shards = PermissionManager.get_instance().shard_targets(event, user_ids)
+        results = await asyncio.gather(*(kick_shard(c, s) for c, s in shards))
+        return [item for shard in results for item in shard]
+
+    def _record(
+        self,
+        group_id,
+        user_id,
+        action: str,
+        detail: str = "",
+        operator: str = "自动",
+    ):
+        """写入一条处罚记录"""
+        self.journal.record(str(group_id), str(user_id), action, operator, detail)
+
+    def _record_offense(self, user_id: str, offense: str) -> float:
+        """记录一次跨群违规，返回该用户当前的信誉分"""
+        if not self.enable_reputation:
+            return 0.0
+        return self.reputation.record(user_id, offense)
+
+    def _escalate_ban_time(self, base: int, score: float) -> int:
+        """按信誉分升级禁言时长：每满一档翻一倍，不超过上限"""
+        if not self.enable_reputation or base <= 0 or score < self.reputation_step:
+            return base
+        level = min(int(score // self.reputation_step), 16)
+        return min(base * 2**level, max(base, self.reputation_max_ban_time))
+
+    async def _send_admin(self, client: CQHttp, message: str):
+        """向bot管理员发送私聊消息（入队后合并为摘要异步发送，降载时推迟入队）"""
+
+        async def push():
+            self.admin_notifier.push(client, self.admins_id, message)
+
+        await self.load_shedder.defer("admin_dm", push)
+
+    async def _notify_group_event(self, client: CQHttp, group_id: str, message: str):
+        """通知群事件：开启仅通知bot管理员时私聊管理员，否则发到对应群聊"""
+        if self.admin_audit:
+            await self._send_admin(client, message)
+            return
+        try:
+            await self.reply_pacer.acquire(str(group_id))
+            await client.send_group_msg(group_id=int(group_id), message=message)
+        except Exception as e:
+            logger.error(f"群 {group_id} 事件通知发送失败：{e}")
+
+    async def _send_replies(self, event: AiocqhttpMessageEvent, lines: list[str]):
+        """将一次命令产生的多条回复合并发送，按群节流"""
+        for text in self.reply_pacer.split(lines):
+            await self.reply_pacer.acquire(event.get_group_id())
+            yield event.plain_result(text)
 
     @filter.command("禁言")
     @perm_required(PermLevel.ADMIN)
@@ -131,15 +820,10 @@ class AdminPlugin(Star):
         """禁言 60 @user"""
         if not ban_time or not isinstance(ban_time, int):
             ban_time = random.randint(self.ban_rand_time_min, self.ban_rand_time_max)
-        for tid in get_ats(event):
-            try:
-                await event.bot.set_group_ban(
-                    group_id=int(event.get_group_id()),
-                    user_id=int(tid),
-                    duration=ban_time,
-                )
-            except:  # noqa: E722
-                pass
+        targets = get_ats(event)
+        success = await self._ban_members(event, targets, ban_time)
+        if success < len(targets):
+            yield event.plain_result(f"{len(targets) - success}人禁言失败，详见日志")
         event.stop_event()
 
     @filter.command("禁我")
@@ -151,10 +835,19 @@ class AdminPlugin(Star):
         if not ban_time or not isinstance(ban_time, int):
             ban_time = random.randint(self.ban_rand_time_min, self.ban_rand_time_max)
         try:
-            await event.bot.set_group_ban(
-                group_id=int(event.get_group_id()),
-                user_id=int(event.get_sender_id()),
-                duration=ban_time,
+            await self.moderation.ban(
+                event.bot,
+                event.get_group_id(),
+                event.get_sender_id(),
+                ban_time,
+                force=True,
+            )
+            self._record(
+                event.get_group_id(),
+                event.get_sender_id(),
+                "禁言",
+                f"{ban_time}秒 禁我",
+                event.get_sender_id(),
             )
             yield event.plain_result(random.choice(BAN_ME_QUOTES))
         except Exception:
@@ -165,10 +858,10 @@ class AdminPlugin(Star):
     @perm_required(PermLevel.ADMIN)
     async def cancel_group_ban(self, event: AiocqhttpMessageEvent):
         """解禁@user"""
-        for tid in get_ats(event):
-            await event.bot.set_group_ban(
-                group_id=int(event.get_group_id()), user_id=int(tid), duration=0
-            )
+        targets = get_ats(event)
+        success = await self._ban_members(event, targets, 0)
+        if success < len(targets):
+            yield event.plain_result(f"{len(targets) - success}人解禁失败，详见日志")
         event.stop_event()
 
     @filter.command("开启全员禁言", alias={"全员禁言"})
@@ -197,15 +890,17 @@ class AdminPlugin(Star):
         """改名 xxx @user"""
         target_card = target_card or event.get_sender_name()
         tids = get_ats(event) or [event.get_sender_id()]
+        replies = []
         for tid in tids:
-            target_name = await get_nickname(event, user_id=tid)
-            replay = f"已将{target_name}的群昵称改为【{target_card}】"
-            yield event.plain_result(replay)
+            target_name = await self._get_nickname(event, tid)
+            replies.append(f"已将{target_name}的群昵称改为【{target_card}】")
             await event.bot.set_group_card(
                 group_id=int(event.get_group_id()),
                 user_id=int(tid),
                 card=str(target_card),
             )
+        async for result in self._send_replies(event, replies):
+            yield result
 
     @filter.command("改我")
     @perm_required(PermLevel.ADMIN)
@@ -229,15 +924,18 @@ class AdminPlugin(Star):
         """头衔 xxx @user"""
         new_title = str(new_title) or event.get_sender_name()
         tids = get_ats(event) or [event.get_sender_id()]
+        replies = []
         for tid in tids:
-            target_name = await get_nickname(event, user_id=tid)
-            yield event.plain_result(f"已将{target_name}的头衔改为【{new_title}】")
+            target_name = await self._get_nickname(event, tid)
+            replies.append(f"已将{target_name}的头衔改为【{new_title}】")
             await event.bot.set_group_special_title(
                 group_id=int(event.get_group_id()),
                 user_id=int(tid),
                 special_title=new_title,
                 duration=-1,
             )
+        async for result in self._send_replies(event, replies):
+            yield result
 
     @filter.command("申请头衔", alias={"我要头衔"})
     @perm_required(PermLevel.OWNER)
@@ -258,48 +956,68 @@ class AdminPlugin(Star):
     @perm_required(PermLevel.ADMIN)
     async def set_group_kick(self, event: AiocqhttpMessageEvent):
         """踢了@user"""
-        for tid in get_ats(event):
-            target_name = await get_nickname(event, user_id=tid)
-            await event.bot.set_group_kick(
-                group_id=int(event.get_group_id()),
-                user_id=int(tid),
-                reject_add_request=False,
-            )
-            yield event.plain_result(f"已将【{tid}-{target_name}】踢出本群")
+        results = await self._kick_members(event, get_ats(event))
+        replies = []
+        for tid, target_name, ok in results:
+            if ok:
+                self._record_offense(tid, "kick")
+                replies.append(f"已将【{tid}-{target_name}】踢出本群")
+            else:
+                replies.append(f"踢出【{tid}-{target_name}】失败")
+        async for result in self._send_replies(event, replies):
+            yield result
 
     @filter.command("拉黑")
     @perm_required(PermLevel.ADMIN)
     async def set_group_block(self, event: AiocqhttpMessageEvent):
         """拉黑 @user"""
-        for tid in get_ats(event):
-            target_name = await get_nickname(event, user_id=tid)
-            await event.bot.set_group_kick(
-                group_id=int(event.get_group_id()),
-                user_id=int(tid),
-                reject_add_request=True,
-            )
-            yield event.plain_result(f"已将【{tid}-{target_name}】踢出本群并拉黑!")
+        results = await self._kick_members(
+            event, get_ats(event), reject_add_request=True
+        )
+        replies = []
+        for tid, target_name, ok in results:
+            if ok:
+                self._record_offense(tid, "kick")
+                replies.append(f"已将【{tid}-{target_name}】踢出本群并拉黑!")
+            else:
+                replies.append(f"拉黑【{tid}-{target_name}】失败")
+        async for result in self._send_replies(event, replies):
+            yield result
 
     @filter.command("设为管理员")
     @perm_required(PermLevel.OWNER, check_at=False)
     async def set_group_admin(self, event: AiocqhttpMessageEvent):
         """设置管理员@user"""
+        chain = []
         for tid in get_ats(event):
             await event.bot.set_group_admin(
                 group_id=int(event.get_group_id()), user_id=int(tid), enable=True
             )
-            chain = [At(qq=tid), Plain(text="你已被设为管理员")]
+            PermissionManager.get_instance().update_role(
+                event.get_group_id(), tid, PermLevel.ADMIN, self_id=event.get_self_id()
+            )
+            chain.append(At(qq=tid))
+        if chain:
+            chain.append(Plain(text="你已被设为管理员"))
+            await self.reply_pacer.acquire(event.get_group_id())
             yield event.chain_result(chain)
 
     @filter.command("取消管理员")
     @perm_required(PermLevel.OWNER)
     async def cancel_group_admin(self, event: AiocqhttpMessageEvent):
         """取消管理员@user"""
+        chain = []
         for tid in get_ats(event):
             await event.bot.set_group_admin(
                 group_id=int(event.get_group_id()), user_id=int(tid), enable=False
             )
-            chain = [At(qq=tid), Plain(text="你的管理员身份已被取消")]
+            PermissionManager.get_instance().update_role(
+                event.get_group_id(), tid, PermLevel.MEMBER, self_id=event.get_self_id()
+            )
+            chain.append(At(qq=tid))
+        if chain:
+            chain.append(Plain(text="你的管理员身份已被取消"))
+            await self.reply_pacer.acquire(event.get_group_id())
             yield event.chain_result(chain)
 
     @filter.command("设为精华", alias={"设精"})
@@ -309,6 +1027,7 @@ class AdminPlugin(Star):
         first_seg = event.get_messages()[0]
         if isinstance(first_seg, Reply):
             await event.bot.set_essence_msg(message_id=int(first_seg.id))
+            self.essence_cache.invalidate(event.get_group_id())
             yield event.plain_result("已设为精华消息")
             event.stop_event()
 
@@ -319,19 +1038,35 @@ class AdminPlugin(Star):
         first_seg = event.get_messages()[0]
         if isinstance(first_seg, Reply):
             await event.bot.delete_essence_msg(message_id=int(first_seg.id))
+            self.essence_cache.invalidate(event.get_group_id())
             yield event.plain_result("已移除精华消息")
             event.stop_event()
 
     @filter.command("查看精华", alias={"群精华"})
     @perm_required(PermLevel.ADMIN)
-    async def get_essence_msg_list(self, event: AiocqhttpMessageEvent):
-        """查看群精华"""
-        essence_data = await event.bot.get_essence_msg_list(
-            group_id=int(event.get_group_id())
+    async def get_essence_msg_list(
+        self, event: AiocqhttpMessageEvent, page: int = 1
+    ):
+        """查看群精华，按页渲染，可指定页码：查看精华 2"""
+        entries = await self.essence_cache.get(event.bot, event.get_group_id())
+        if not entries:
+            yield event.plain_result("本群还没有精华消息")
+            return
+        pages = paginate(entries, self.essence_page_size)
+        total = len(pages)
+        if not isinstance(page, int) or not 1 <= page <= total:
+            yield event.plain_result(f"页码超出范围，共{total}页")
+            return
+        page_entries = pages[page - 1]
+        yield await self._render(
+            event,
+            self.essence_cache.format_page(page_entries, page, total, len(entries)),
         )
-        yield event.plain_result(f"{essence_data}")
+        if self.essence_send_images:
+            urls = [url for entry in page_entries for url in entry.images]
+            if paths := await self.essence_cache.fetch_images(urls):
+                yield event.chain_result([Image.fromFileSystem(p) for p in paths])
         event.stop_event()
-        # TODO 做张好看的图片来展示
 
     @filter.command("撤回")
     @perm_required(PermLevel.MEMBER)
@@ -343,6 +1078,12 @@ class AdminPlugin(Star):
         if isinstance(first_seg, Reply):
             try:
                 await client.delete_msg(message_id=int(first_seg.id))
+                self._record(
+                    event.get_group_id(),
+                    first_seg.sender_id,
+                    "撤回",
+                    operator=event.get_sender_id(),
+                )
             except Exception:
                 yield event.plain_result("我无权撤回这条消息")
             finally:
@@ -376,9 +1117,15 @@ class AdminPlugin(Star):
                 async with sem:
                     try:
                         await client.delete_msg(message_id=message["message_id"])
+                        self._record(
+                            event.get_group_id(),
+                            message["sender"]["user_id"],
+                            "撤回",
+                            operator=event.get_sender_id(),
+                        )
                         delete_count += 1
-                    except Exception:
-                        pass
+                    except Exception as e:
+                        logger.warning(f"撤回消息 {message['message_id']} 失败：{e}")
 
             # 并发撤回
             tasks = [try_delete(msg) for msg in messages]
@@ -398,29 +1145,248 @@ class AdminPlugin(Star):
             and event.get_group_id() not in self.forbidden_words_group
         ):
             return
-        if not self.forbidden_words or not event.message_str:
+        if not self.forbidden_matcher or not event.message_str:
+            return
+        # 检测违禁词（每条消息只归一化一次），词表很大时移出事件循环
+        hit = await self.executor.call(
+            "forbidden_words",
+            "forbidden",
+            "find",
+            event.message_str,
+            size=len(self.forbidden_matcher) * len(event.message_str),
+        )
+        if hit is None:
+            return
+        word, start, end = hit
+        logger.info(
+            f"群 {event.get_group_id()} 的 {event.get_sender_id()} 触发违禁词"
+            f"【{word}】：{event.message_str[start:end]}"
+        )
+        group_id, user_id = event.get_group_id(), event.get_sender_id()
+        if self.moderation.allow_notice(group_id, user_id):
+            yield event.plain_result("不准发禁词！")
+        # 撤回消息
+        reason = f"违禁词【{word}】"
+        try:
+            message_id = event.message_obj.message_id
+            if await self.moderation.recall(event.bot, message_id):
+                self._record(group_id, user_id, "撤回", reason)
+        except Exception as e:
+            logger.warning(f"撤回 {user_id} 的违禁词消息失败：{e}")
+        # 禁言发送者，有跨群违规记录的加重处罚
+        score = self._record_offense(user_id, "forbidden_word")
+        if self.forbidden_words_ban_time > 0:
+            duration = self._escalate_ban_time(self.forbidden_words_ban_time, score)
+            try:
+                if await self.moderation.ban(event.bot, group_id, user_id, duration):
+                    self._record(group_id, user_id, "禁言", f"{duration}秒 {reason}")
+            except Exception as e:
+                logger.warning(f"禁言 {user_id} 失败：{e}")
+
+    @filter.event_message_type(EventMessageType.GROUP_MESSAGE)
+    @perm_required(PermLevel.ADMIN)
+    async def check_forbidden_images(self, event: AiocqhttpMessageEvent):
+        """
+        自动检测违禁图片，撤回并禁言
+        """
+        if not self.enable_image_filter or not self.image_filter.size:
+            return
+        images = [seg for seg in event.get_messages() if isinstance(seg, Image)]
+        if not images:
+            return
+        # 同一条消息的多张图片并发检测
+        hits = await asyncio.gather(
+            *(self.image_filter.match(seg.url, seg.file) for seg in images if seg.url)
+        )
+        if all(dist is None for dist in hits):
+            return
+        logger.info(
+            f"群 {event.get_group_id()} 的 {event.get_sender_id()} 发送了违禁图片"
+        )
+        group_id, user_id = event.get_group_id(), event.get_sender_id()
+        if self.moderation.allow_notice(group_id, user_id):
+            yield event.plain_result("不准发违禁图片！")
+        try:
+            if await self.moderation.recall(event.bot, event.message_obj.message_id):
+                self._record(group_id, user_id, "撤回", "违禁图片")
+        except Exception as e:
+            logger.warning(f"撤回 {user_id} 的违禁图片失败：{e}")
+        score = self._record_offense(user_id, "forbidden_image")
+        if self.image_ban_time > 0:
+            duration = self._escalate_ban_time(self.image_ban_time, score)
+            try:
+                if await self.moderation.ban(event.bot, group_id, user_id, duration):
+                    self._record(group_id, user_id, "禁言", f"{duration}秒 违禁图片")
+            except Exception as e:
+                logger.warning(f"禁言 {user_id} 失败：{e}")
+
+    @filter.command("添加违禁图")
+    @perm_required(PermLevel.ADMIN)
+    async def add_banned_image(self, event: AiocqhttpMessageEvent):
+        """(引用图片)添加违禁图"""
+        image_url = extract_image_url(chain=event.get_messages())
+        if not image_url:
+            yield event.plain_result("请引用要添加的图片")
+            return
+        result = await self.image_filter.add(image_url)
+        if result is None:
+            yield event.plain_result("图片获取失败")
+        elif result:
+            yield event.plain_result(
+                f"已添加违禁图片，当前共{self.image_filter.size}张"
+            )
+        else:
+            yield event.plain_result("这张图片已经是违禁图片了")
+
+    @filter.command("删除违禁图")
+    @perm_required(PermLevel.ADMIN)
+    async def remove_banned_image(self, event: AiocqhttpMessageEvent):
+        """(引用图片)删除违禁图"""
+        image_url = extract_image_url(chain=event.get_messages())
+        if not image_url:
+            yield event.plain_result("请引用要删除的图片")
+            return
+        removed = await self.image_filter.remove(image_url)
+        if removed is None:
+            yield event.plain_result("图片获取失败")
+        elif removed:
+            yield event.plain_result(f"已删除{removed}张相近的违禁图片")
+        else:
+            yield event.plain_result("这张图片不在违禁图片中")
+
+    @filter.event_message_type(EventMessageType.GROUP_MESSAGE)
+    @perm_required(PermLevel.ADMIN)
+    async def check_links(self, event: AiocqhttpMessageEvent):
+        """
+        自动检测违规链接（含卡片消息），撤回并禁言
+        """
+        if not self.enable_link_filter:
+            return
+        chain = event.get_messages()
+        text = event.message_str
+        if card_text := extract_card_text(chain):
+            text = f"{text}\n{card_text}"
+        if not text:
+            return
+        denied = self.link_filter.find_denied(event.get_group_id(), text)
+        if not denied:
+            return
+        logger.info(
+            f"群 {event.get_group_id()} 的 {event.get_sender_id()} 发送了违规链接：{denied}"
+        )
+        group_id, user_id = event.get_group_id(), event.get_sender_id()
+        if self.moderation.allow_notice(group_id, user_id):
+            yield event.plain_result("不准发违规链接！")
+        reason = f"违规链接【{' '.join(denied)}】"
+        try:
+            if await self.moderation.recall(event.bot, event.message_obj.message_id):
+                self._record(group_id, user_id, "撤回", reason)
+        except Exception as e:
+            logger.warning(f"撤回 {user_id} 的违规链接消息失败：{e}")
+        score = self._record_offense(user_id, "link")
+        if self.link_ban_time > 0:
+            duration = self._escalate_ban_time(self.link_ban_time, score)
+            try:
+                if await self.moderation.ban(event.bot, group_id, user_id, duration):
+                    self._record(group_id, user_id, "禁言", f"{duration}秒 {reason}")
+            except Exception as e:
+                logger.warning(f"禁言 {user_id} 失败：{e}")
+
+    @filter.command("禁用域名")
+    @perm_required(PermLevel.ADMIN)
+    async def add_deny_domains(self, event: AiocqhttpMessageEvent):
+        """禁用域名 xxx.com yyy.com"""
+        domains = event.message_str.removeprefix("禁用域名").strip().split()
+        if not domains:
+            yield event.plain_result("未输入任何域名")
+            return
+        added = self.link_filter.set_rules(event.get_group_id(), domains, DENY)
+        yield event.plain_result(f"本群已禁用域名：{added}")
+
+    @filter.command("放行域名")
+    @perm_required(PermLevel.ADMIN)
+    async def add_allow_domains(self, event: AiocqhttpMessageEvent):
+        """放行域名 xxx.com yyy.com"""
+        domains = event.message_str.removeprefix("放行域名").strip().split()
+        if not domains:
+            yield event.plain_result("未输入任何域名")
+            return
+        added = self.link_filter.set_rules(event.get_group_id(), domains, ALLOW)
+        yield event.plain_result(f"本群已放行域名：{added}")
+
+    @filter.command("删除域名规则")
+    @perm_required(PermLevel.ADMIN)
+    async def remove_domain_rules(self, event: AiocqhttpMessageEvent):
+        """删除域名规则 xxx.com"""
+        domains = event.message_str.removeprefix("删除域名规则").strip().split()
+        if not domains:
+            yield event.plain_result("未指定要删除的域名")
             return
-        # 检测违禁词
-        for word in self.forbidden_words:
-            if word in event.message_str:
-                yield event.plain_result("不准发禁词！")
-                # 撤回消息
+        removed = self.link_filter.remove_rules(event.get_group_id(), domains)
+        yield event.plain_result(f"已删除域名规则：{removed}")
+
+    @filter.command("查看域名规则")
+    @perm_required(PermLevel.ADMIN)
+    async def view_domain_rules(self, event: AiocqhttpMessageEvent):
+        """查看本群的域名规则"""
+        rules = self.link_filter.get_rules(event.get_group_id())
+        if not rules:
+            yield event.plain_result("本群没有设置域名规则")
+            return
+        lines = [
+            f"{domain}：{'禁用' if action == DENY else '放行'}"
+            for domain, action in rules.items()
+        ]
+        yield event.plain_result("本群的域名规则：\n" + "\n".join(lines))
+
+    @filter.event_message_type(EventMessageType.GROUP_MESSAGE)
+    @perm_required(PermLevel.ADMIN)
+    async def check_copy_raid(self, event: AiocqhttpMessageEvent):
+        """多账号复制粘贴刷屏检测，批量撤回并禁言"""
+        if not self.enable_copy_raid or not event.message_str:
+            return
+        text = self.text_normalizer.normalize(event.message_str)
+        if len(text) < self.copy_raid_detector.min_length:
+            return
+        sig = await self.executor.call(
+            "minhash", "minhash", "signature", text, size=len(text)
+        )
+        cluster = self.copy_raid_detector.feed(
+            group_id=event.get_group_id(),
+            sender_id=event.get_sender_id(),
+            message_id=int(event.message_obj.message_id),
+            text=text,
+            sig=sig,
+        )
+        if not cluster:
+            return
+
+        # 批量撤回（消息ID仅对收到消息的账号有效，不做分摊）
+        sem = asyncio.Semaphore(10)
+
+        async def try_delete(user_id: str, message_id: int):
+            async with sem:
                 try:
-                    message_id = event.message_obj.message_id
-                    await event.bot.delete_msg(message_id=int(message_id))
-                except Exception:
-                    pass
-                # 禁言发送者
-                if self.forbidden_words_ban_time > 0:
-                    try:
-                        await event.bot.set_group_ban(
-                            group_id=int(event.get_group_id()),
-                            user_id=int(event.get_sender_id()),
-                            duration=self.forbidden_words_ban_time,
-                        )
-                    except Exception:
-                        pass
-                break
+                    if await self.moderation.recall(event.bot, message_id):
+                        self._record(event.get_group_id(), user_id, "撤回", "复制刷屏")
+                except Exception as e:
+                    logger.warning(f"撤回 {user_id} 的刷屏消息失败：{e}")
+
+        await asyncio.gather(*(try_delete(uid, mid) for uid, mid in cluster))
+        sender_ids = list(dict.fromkeys(uid for uid, _ in cluster))
+        for uid in sender_ids:
+            self._record_offense(uid, "copy_raid")
+        if self.copy_raid_ban_time > 0:
+            await self._ban_members(
+                event, sender_ids, self.copy_raid_ban_time, reason="复制刷屏"
+            )
+        if len(cluster) > 1:
+            logger.warning(
+                f"群 {event.get_group_id()} 检测到{len(sender_ids)}个账号发送近似内容：{sender_ids}"
+            )
+            yield event.plain_result(
+                f"检测到{len(sender_ids)}个账号刷同一内容，已撤回并处理"
+            )
 
     @filter.event_message_type(filter.EventMessageType.GROUP_MESSAGE)
     @perm_required(PermLevel.ADMIN)
@@ -453,26 +1419,29 @@ class AdminPlugin(Star):
             ):
                 # 提前写入禁止标记，防止并发重复禁
                 self.last_banned_time[group_id][user_id] = now
-                # 提前写入禁止标记，防止并发重复禁
-                self.last_banned_time[group_id][user_id] = now
+                score = self._record_offense(user_id, "spam")
+                duration = self._escalate_ban_time(self.spamming_ban_time, score)
                 try:
-                    await event.bot.set_group_ban(
-                        group_id=int(group_id),
-                        user_id=int(user_id),
-                        duration=self.spamming_ban_time,
-                    )
-
-                    yield event.plain_result(
-                        f"检测到{get_nickname(event, user_id)}刷屏，已禁言"
-                    )
-                    nickname = await get_nickname(event, user_id)
-                    yield event.plain_result(f"检测到{nickname}刷屏，已禁言")
-                    nickname = await get_nickname(event, user_id)
-                    yield event.plain_result(f"检测到{nickname}刷屏，已禁言")
+                    if await self.moderation.ban(
+                        event.bot, group_id, user_id, duration
+                    ):
+                        self._record(group_id, user_id, "禁言", f"{duration}秒 刷屏")
+                    if self.moderation.allow_notice(group_id, user_id):
+                        nickname = await self._get_nickname(event, user_id)
+                        yield event.plain_result(f"检测到{nickname}刷屏，已禁言")
                 except Exception as e:
                     logger.warning(f"刷屏禁言失败：{e}")
                 timestamps.clear()
 
+    @filter.event_message_type(EventMessageType.GROUP_MESSAGE)
+    async def record_activity(self, event: AiocqhttpMessageEvent):
+        """统计群活跃度与最后发言时间，只做本地计数"""
+        group_id, user_id = event.get_group_id(), event.get_sender_id()
+        if self.enable_activity:
+            self.activity.observe(group_id, user_id, event.get_sender_name())
+        if self.enable_last_seen:
+            self.last_seen.touch(group_id, user_id)
+
     @filter.command("设置群头像")
     @perm_required(PermLevel.ADMIN)
     async def set_group_portrait(self, event: AiocqhttpMessageEvent):
@@ -529,6 +1498,9 @@ class AdminPlugin(Star):
     async def get_group_notice(self, event: AiocqhttpMessageEvent):
         """查看群公告"""
         notices = await event.bot._get_group_notice(group_id=int(event.get_group_id()))
+        if not notices:
+            yield event.plain_result("本群暂无群公告")
+            return
 
         formatted_messages = []
         for notice in notices:
@@ -545,9 +1517,7 @@ class AdminPlugin(Star):
             formatted_messages.append(formatted_message)
 
         notices_str = "\n\n\n".join(formatted_messages)
-        url = await self.text_to_image(notices_str)
-        yield event.image_result(url)
-        # TODO 做张好看的图片来展示
+        yield await self._render(event, notices_str)
 
     @filter.command("开启宵禁")
     @perm_required(PermLevel.ADMIN)
@@ -691,6 +1661,22 @@ class AdminPlugin(Star):
         if reply:
             yield event.plain_result(reply)
 
+    @filter.command("同意全部", alias={"全部同意"})
+    @perm_required(PermLevel.ADMIN)
+    async def agree_all_add_group(self, event: AiocqhttpMessageEvent):
+        """同意本群全部待处理的进群申请"""
+        yield event.plain_result(await self.approve_all(event, approve=True))
+
+    @filter.command("拒绝全部", alias={"全部拒绝"})
+    @perm_required(PermLevel.ADMIN)
+    async def refuse_all_add_group(
+        self, event: AiocqhttpMessageEvent, extra: str = ""
+    ):
+        """拒绝本群全部待处理的进群申请，可附带理由"""
+        yield event.plain_result(
+            await self.approve_all(event, extra=extra, approve=False)
+        )
+
     @filter.platform_adapter_type(filter.PlatformAdapterType.AIOCQHTTP)
     async def event_monitoring(self, event: AiocqhttpMessageEvent):
         """监听进群/退群事件"""
@@ -698,7 +1684,49 @@ class AdminPlugin(Star):
         if not isinstance(raw, dict):
             return
 
-        client = event.bot
+        client = guarded(event.bot)
+
+        # 管理员变动事件，同步权限缓存
+        if (
+            raw.get("post_type") == "notice"
+            and raw.get("notice_type") == "group_admin"
+        ):
+            PermissionManager.get_instance().update_role(
+                str(raw.get("group_id", "")),
+                str(raw.get("user_id", "")),
+                PermLevel.ADMIN if raw.get("sub_type") == "set" else PermLevel.MEMBER,
+                self_id=raw.get("self_id"),
+            )
+            return
+
+        # 其他管理员设精/移精，本群精华缓存失效
+        if raw.get("post_type") == "notice" and raw.get("notice_type") == "essence":
+            self.essence_cache.invalidate(str(raw.get("group_id", "")))
+            return
+
+        # 新成员进群（可能是其他管理员同意的），清理其待处理申请
+        if (
+            raw.get("post_type") == "notice"
+            and raw.get("notice_type") == "group_increase"
+        ):
+            self.join_requests.remove_user(
+                str(raw.get("group_id", "")), str(raw.get("user_id", ""))
+            )
+            # 进群时间视为最后活跃时间，新人不会被当成长期潜水
+            if self.enable_last_seen:
+                self.last_seen.touch(
+                    str(raw.get("group_id", "")), str(raw.get("user_id", ""))
+                )
+
+        # 成员退群或被踢，清除其最后发言记录
+        if (
+            self.enable_last_seen
+            and raw.get("post_type") == "notice"
+            and raw.get("notice_type") == "group_decrease"
+        ):
+            self.last_seen.forget(
+                str(raw.get("group_id", "")), str(raw.get("user_id", ""))
+            )
 
         # 进群申请事件
         if (
@@ -711,26 +1739,70 @@ class AdminPlugin(Star):
             group_id = str(raw.get("group_id", ""))
             comment = raw.get("comment")
             flag = raw.get("flag", "")
-            nickname = (await client.get_stranger_info(user_id=int(user_id)))[
-                "nickname"
-            ] or "未知昵称"
+            # 申请激增时进入封锁，申请排队后批量处理，不再逐条查询和通知
+            if self.enable_join_guard and self.join_guard.observe(group_id):
+                if not self.join_guard.reject:
+                    # 搁置的申请登记为待处理，可用 /同意全部 统一处理
+                    self.join_requests.add(
+                        JoinRequest(group_id, user_id, user_id, flag, comment or "")
+                    )
+                self.join_guard.enqueue(client, group_id, user_id, flag)
+                return
+            # 在其他群多次违规的用户直接拒绝
+            if (
+                self.enable_reputation
+                and self.reputation.score(user_id) >= self.reputation_reject_score
+            ):
+                try:
+                    await client.set_group_add_request(
+                        flag=flag, sub_type="add", approve=False, reason=""
+                    )
+                except Exception as e:
+                    logger.warning(f"自动拒绝 {user_id} 的进群申请失败：{e}")
+                    return
+                self._record(group_id, user_id, "拒绝进群", "跨群违规记录")
+                notice = f"{user_id} 在其他群多次违规，已自动拒绝进群"
+                if self.admin_audit:
+                    await self._send_admin(client, f"群 {group_id}：{notice}")
+                else:
+                    yield event.plain_result(notice)
+                return
+            nickname = await self._get_stranger_nickname(client, user_id)
             reply = f"【收到进群申请】同意进群吗：\n昵称：{nickname}\nQQ：{user_id}\nflag：{flag}"
             if comment:
                 reply += f"\n{comment}"
+            self.join_requests.add(
+                JoinRequest(group_id, user_id, nickname, flag, comment or "")
+            )
             if self.admin_audit:
-                await self._send_admin(client, reply)
+                # 私聊通知仅供查看（命令限群聊使用），在群内用 /同意全部 或 /拒绝全部 处理
+                await self._send_admin(
+                    client,
+                    f"{reply}\n群号：{group_id}\n（请在该群内发送 /同意全部 或 /拒绝全部 处理）",
+                )
             else:
-                yield event.plain_result(reply)
+                # 直接发送以拿到消息ID，引用该通知即可取回申请
+                try:
+                    await self.reply_pacer.acquire(group_id)
+                    resp = await client.send_group_msg(
+                        group_id=int(group_id), message=reply
+                    )
+                    self.join_requests.bind_message(resp["message_id"], [flag])
+                except Exception as e:
+                    logger.error(f"群 {group_id} 进群申请通知发送失败：{e}")
 
             if self.group_join_manager.should_reject(group_id, user_id):
                 await client.set_group_add_request(
                     flag=flag, sub_type="add", approve=False, reason="黑名单用户"
                 )
+                self.join_requests.remove([flag])
+                self._record(group_id, user_id, "拒绝进群", "黑名单用户")
                 yield event.plain_result("黑名单用户，已自动拒绝进群")
             elif comment and self.group_join_manager.should_approve(group_id, comment):
                 await client.set_group_add_request(
                     flag=flag, sub_type="add", approve=True
                 )
+                self.join_requests.remove([flag])
                 yield event.plain_result("验证通过，已自动同意进群")
 
         # 主动退群事件
@@ -742,64 +1814,170 @@ class AdminPlugin(Star):
         ):
             group_id = str(raw.get("group_id", ""))
             user_id = str(raw.get("user_id", ""))
-            nickname = (await client.get_stranger_info(user_id=int(user_id)))[
-                "nickname"
-            ] or "未知昵称"
+            nickname = await self._get_stranger_nickname(client, user_id)
             reply = f"{nickname}({user_id}) 主动退群了"
             if self.auto_black:
                 self.group_join_manager.blacklist_on_leave(group_id, user_id)
                 reply += "，已拉进黑名单"
             yield event.plain_result(reply)
 
-    @staticmethod
+    async def _handle_join_requests(
+        self,
+        event: AiocqhttpMessageEvent,
+        requests: list[JoinRequest],
+        approve: bool,
+        reason: str = "",
+    ) -> list[tuple[JoinRequest, bool]]:
+        """并发处理一批进群申请（按令牌桶限速），返回 (申请, 是否成功)"""
+        sem = asyncio.Semaphore(self.join_request_concurrency)
+
+        async def handle(req: JoinRequest) -> tuple[JoinRequest, bool]:
+            async with sem:
+                await self.join_request_bucket.acquire()
+                try:
+                    await event.bot.set_group_add_request(
+                        flag=req.flag, sub_type="add", approve=approve, reason=reason
+                    )
+                except Exception as e:
+                    logger.warning(f"处理 {req.user_id} 的进群申请失败：{e}")
+                    return req, False
+            if not approve and req.group_id:
+                self._record(
+                    req.group_id,
+                    req.user_id,
+                    "拒绝进群",
+                    reason,
+                    event.get_sender_id(),
+                )
+            return req, True
+
+        results = await asyncio.gather(*(handle(req) for req in requests))
+        # 失败多半是申请已被处理或已失效，同样移出待处理列表
+        self.join_requests.remove(req.flag for req in requests)
+        return list(results)
+
     async def approve(
-        event: AiocqhttpMessageEvent, extra: str = "", approve: bool = True
+        self, event: AiocqhttpMessageEvent, extra: str = "", approve: bool = True
     ) -> str | None:
-        """处理进群申请"""
-        text = get_reply_message_str(event)
-        if not text:
+        """处理引用的进群申请"""
+        reply_seg = next(
+            (seg for seg in event.get_messages() if isinstance(seg, Reply)), None
+        )
+        if reply_seg is None:
             return "未引用任何【进群申请】"
-        lines = text.split("\n")
-        if "【收到进群申请】" in text and len(lines) >= 5:
-            nickname = lines[1].split("：")[1]  # 第2行冒号后文本为nickname
-            flag = lines[3].split("：")[1]  # 第4行冒号后文本为flag
-            try:
-                await event.bot.set_group_add_request(
-                    flag=flag, sub_type="add", approve=approve, reason=extra
+        requests = self.join_requests.by_message(reply_seg.id)
+        if not requests:
+            # 未登记消息ID的单条通知（如重启前发出的），从通知文本中解析
+            text = get_reply_message_str(event)
+            if not text:
+                return "未引用任何【进群申请】"
+            if "【收到进群申请】" not in text:
+                return None
+            fields = dict(
+                line.split("：", 1) for line in text.split("\n") if "：" in line
+            )
+            if text.count("flag：") != 1 or "flag" not in fields:
+                return "引用的通知包含多条申请，请使用 /同意全部 或 /拒绝全部"
+            flag = fields["flag"]
+            requests = [
+                self.join_requests.get(flag)
+                or JoinRequest("", "", fields.get("昵称", ""), flag)
+            ]
+        replies = []
+        for req, ok in await self._handle_join_requests(
+            event, requests, approve, extra
+        ):
+            if not ok:
+                replies.append(f"{req.nickname}的申请处理过了或者格式不对")
+            elif approve:
+                replies.append(f"已同意{req.nickname}进群")
+            else:
+                replies.append(
+                    f"已拒绝{req.nickname}进群" + (f"\n理由：{extra}" if extra else "")
                 )
-                if approve:
-                    reply = f"已同意{nickname}进群"
-                else:
-                    reply = f"已拒绝{nickname}进群" + (
-                        f"\n理由：{extra}" if extra else ""
-                    )
-                return reply
-            except Exception:
-                return "这条申请处理过了或者格式不对"
+        return "\n".join(replies) or "这条申请处理过了或者格式不对"
+
+    async def approve_all(
+        self, event: AiocqhttpMessageEvent, extra: str = "", approve: bool = True
+    ) -> str:
+        """处理本群全部待处理的进群申请，返回汇总结果"""
+        requests = self.join_requests.pending(event.get_group_id())
+        if not requests:
+            return "本群没有待处理的进群申请"
+        results = await self._handle_join_requests(event, requests, approve, extra)
+        done = [req for req, ok in results if ok]
+        action = "同意" if approve else "拒绝"
+        reply = f"已{action}{len(done)}个进群申请"
+        if failed := len(results) - len(done):
+            reply += f"，{failed}个已被处理或已失效"
+        if done:
+            reply += "：\n" + "\n".join(f"{req.nickname}({req.user_id})" for req in done)
+        if extra and not approve:
+            reply += f"\n理由：{extra}"
+        return reply
 
     @filter.command("群友信息")
     @perm_required(PermLevel.MEMBER)
-    async def get_group_member_list(self, event: AiocqhttpMessageEvent):
-        """查看群友信息，人数太多时可能会处理失败"""
-        yield event.plain_result("获取中...")
+    async def get_group_member_list(
+        self, event: AiocqhttpMessageEvent, page: int | None = None
+    ):
+        """查看群友信息，按页渲染，可指定页码：群友信息 2"""
         client = event.bot
         group_id = event.get_group_id()
         members_data = await client.get_group_member_list(group_id=int(group_id))
-        info_list = [
-            (
-                f"{format_time(member['join_time'])}："
-                f"【{member['level']}】"
-                f"{member['user_id']}-"
-                f"{member['nickname']}"
-            )
-            for member in members_data
-        ]
-        info_list.sort(key=lambda x: datetime.strptime(x.split("：")[0], "%Y-%m-%d"))
-        info_str = "进群时间：【等级】QQ-昵称\n\n"
-        info_str += "\n\n".join(info_list)
-        # TODO 做张好看的图片来展示
-        url = await self.text_to_image(info_str)
-        yield event.image_result(url)
+        if not members_data:
+            yield event.plain_result("未获取到群成员信息")
+            return
+        members_data = await self.executor.run(
+            "member_sort",
+            lambda: sorted(members_data, key=lambda m: m.get("join_time", 0)),
+            size=len(members_data),
+        )
+        pages = paginate(members_data, self.member_page_size)
+        total = len(pages)
+
+        if page is not None:
+            if not isinstance(page, int) or not 1 <= page <= total:
+                yield event.plain_result(f"页码超出范围，共{total}页")
+                return
+            targets = [page]
+        else:
+            targets = list(range(1, total + 1))
+        yield event.plain_result(
+            f"获取中...（共{len(members_data)}人，渲染{len(targets)}/{total}页）"
+        )
+
+        sem = asyncio.Semaphore(self.member_render_workers)
+
+        async def render_page(index: int) -> tuple[int, str | None]:
+            # 每页单独拼接文本，避免一次性构造超大字符串
+            info_list = [
+                (
+                    f"{format_time(member['join_time'])}："
+                    f"【{member['level']}】"
+                    f"{member['user_id']}-"
+                    f"{member['nickname']}"
+                )
+                for member in pages[index - 1]
+            ]
+            info_str = f"进群时间：【等级】QQ-昵称（第{index}/{total}页）\n\n"
+            info_str += "\n\n".join(info_list)
+            async with sem:
+                try:
+                    return index, await self._render(event, info_str, PRIORITY_BULK)
+                except Exception as e:
+                    logger.error(f"群友信息第{index}页渲染失败：{e}")
+                    return index, None
+
+        # 并发渲染，哪页先渲染完就先发哪页
+        tasks = [asyncio.create_task(render_page(i)) for i in targets]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                index, result = await fut
+                yield result or event.plain_result(f"第{index}页渲染失败")
+        finally:
+            for task in tasks:
+                task.cancel()
 
     @filter.command("清理群友")
     @perm_required(PermLevel.MEMBER)
@@ -821,28 +1999,35 @@ class AdminPlugin(Star):
             return
 
         threshold_ts = int(datetime.now().timestamp()) - inactive_days * 86400
-        clear_ids: list[int] = []
-        info_lines: list[str] = []
+        # 本地记录的最后发言时间，服务端的 last_sent_time 常有滞后
+        seen = self.last_seen.snapshot(group_id) if self.enable_last_seen else {}
+        candidates: list[tuple[int, int, str]] = []
 
         for member in members_data:  # type: ignore
-            last_sent = member.get("last_sent_time", 0)
-            level = int(member.get("level", 0))
             user_id = member.get("user_id", "")
+            last_sent = max(
+                member.get("last_sent_time", 0), seen.get(int(user_id or 0), 0)
+            )
+            level = int(member.get("level", 0))
             nickname = member.get("nickname", "（无昵称）")
 
             if last_sent < threshold_ts and level < under_level:
-                clear_ids.append(user_id)
-                last_active_str = format_time(last_sent)
-                info_lines.append(
-                    f"- **{last_active_str}**｜**{level}**级｜`{user_id}` - {nickname}"
+                candidates.append(
+                    (
+                        last_sent,
+                        user_id,
+                        f"- **{format_time(last_sent)}**｜**{level}**级｜`{user_id}` - {nickname}",
+                    )
                 )
 
-        if not clear_ids:
+        if not candidates:
             yield event.plain_result("无符合条件的群友")
             return
 
         # 按发言时间排序
-        info_lines.sort(key=lambda x: datetime.strptime(x.split("**")[1], "%Y-%m-%d"))
+        candidates.sort(key=lambda c: c[0])
+        clear_ids = [c[1] for c in candidates]
+        info_lines = [c[2] for c in candidates]
 
         info_str = (
             f"### 共 **{len(clear_ids)}** 位群友 **{inactive_days}** 天内无发言，群等级低于 **{under_level}** 级\n\n"
@@ -850,8 +2035,7 @@ class AdminPlugin(Star):
             + "\n\n### 请发送 **确认清理** 或 **取消清理** 来处理这些群友！"
         )
 
-        url = await self.text_to_image(info_str)
-        yield event.image_result(url)
+        yield await self._render(event, info_str)
 
         yield event.chain_result([At(qq=cid) for cid in clear_ids])
 
@@ -868,19 +2052,15 @@ class AdminPlugin(Star):
                 return
 
             if event.message_str == "确认清理":
-                msg_list = []
-                for clear_id in clear_ids:
-                    try:
-                        target_name = await get_nickname(event, user_id=clear_id)
-                        await event.bot.set_group_kick(
-                            group_id=int(group_id),
-                            user_id=int(clear_id),
-                            reject_add_request=False,
-                        )
-                        msg_list.append(f"✅ 已将 {target_name}({clear_id}) 踢出本群")
-                    except Exception as e:
-                        msg_list.append(f"❌ 踢出 {target_name}({clear_id}) 失败")
-                        logger.error(f"踢出 {target_name}({clear_id}) 失败：{e}")
+                results = await self._kick_members(
+                    event, [str(cid) for cid in clear_ids], reason="清理群友"
+                )
+                msg_list = [
+                    f"✅ 已将 {target_name}({clear_id}) 踢出本群"
+                    if ok
+                    else f"❌ 踢出 {target_name}({clear_id}) 失败"
+                    for clear_id, target_name, ok in results
+                ]
 
                 if msg_list:
                     await event.send(event.plain_result("\n".join(msg_list)))
@@ -895,14 +2075,403 @@ class AdminPlugin(Star):
         finally:
             event.stop_event()
 
+    @filter.command("处罚记录")
+    @perm_required(PermLevel.ADMIN, check_at=False)
+    async def view_moderation_records(self, event: AiocqhttpMessageEvent):
+        """处罚记录 @user"""
+        target_ids = get_ats(event)
+        if not target_ids:
+            yield event.plain_result("请@要查询的群友")
+            return
+        group_id = event.get_group_id()
+        replies = []
+        for tid in target_ids:
+            entries = await self.journal.query(group_id, tid, self.journal_query_limit)
+            if not entries:
+                replies.append(f"【{tid}】在本群没有处罚记录")
+                continue
+            lines = [f"【{tid}】最近{len(entries)}条处罚记录："]
+            for entry in entries:
+                line = datetime.fromtimestamp(entry["ts"]).strftime("%m-%d %H:%M")
+                line += f" {entry['action']}"
+                if entry.get("detail"):
+                    line += f" {entry['detail'].strip()}"
+                if entry.get("operator"):
+                    line += f"（{entry['operator']}）"
+                lines.append(line)
+            replies.append("\n".join(lines))
+        async for result in self._send_replies(event, replies):
+            yield result
+
+    @filter.command("群活跃")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def view_group_activity(
+        self, event: AiocqhttpMessageEvent, days: int = 7
+    ):
+        """群活跃 <天数>"""
+        if not self.enable_activity:
+            yield event.plain_result("未开启群活跃统计")
+            return
+        days = max(1, min(int(days), self.activity_retention_days))
+        summary = self.activity.summary(event.get_group_id(), days)
+        if not summary:
+            yield event.plain_result("本群暂无活跃统计数据")
+            return
+        lines = [
+            f"【近{days}天】消息 {summary['total']} 条，"
+            f"发言约 {summary['users']} 人，"
+            f"最热闹时段 {summary['peak_hour']:02d}:00-{summary['peak_hour'] + 1:02d}:00"
+        ]
+        lines.extend(
+            f"{day[5:]}：{total}条 / 约{users}人"
+            for day, total, users in summary["daily"]
+        )
+        if summary["talkers"]:
+            lines.append("\n【话唠榜】")
+            lines.extend(
+                f"{rank}. {label or uid}：{'≥' if error else ''}{count - error}条"
+                for rank, (uid, count, error, label) in enumerate(
+                    summary["talkers"], 1
+                )
+            )
+        yield event.plain_result("\n".join(lines))
+
+    # 跨群批量操作：操作名 -> 展示名
+    FANOUT_ACTIONS: dict[str, str] = {
+        "whole_ban": "全群禁言",
+        "whole_unban": "全群解禁",
+        "notice": "全群公告",
+        "blacklist": "全群拉黑",
+    }
+
+    async def _fanout_targets(self, need_admin: bool) -> dict[str, CQHttp]:
+        """
+        枚举所有账号所在的群，每个群选定一个账号执行。
+        need_admin 时优先选缓存中有管理权限的账号，已知没有管理权限的群跳过，身份未知的照常尝试
+        """
+        perm_manager = PermissionManager.get_instance()
+        targets: dict[str, CQHttp] = {}
+        unknown: dict[str, CQHttp] = {}
+        for client in self._get_clients():
+            try:
+                self_id = (await client.get_login_info())["user_id"]
+                groups = await client.get_group_list()
+            except Exception as e:
+                logger.warning(f"获取群列表失败：{e}")
+                continue
+            for group in groups:
+                group_id = str(group["group_id"])
+                if group_id in targets:
+                    continue
+                level = perm_manager.peek_bot_level(group_id, self_id)
+                if not need_admin or (level is not None and level <= PermLevel.ADMIN):
+                    targets[group_id] = client
+                    unknown.pop(group_id, None)
+                elif level is None:
+                    unknown.setdefault(group_id, client)
+        targets.update(unknown)
+        return targets
+
+    def _fanout_op(self, action: str, payload: dict, clients: dict[str, CQHttp]):
+        """构造对单个群执行的操作"""
+        if action == "blacklist":
+
+            async def op(group_id: str):
+                self.group_join_manager.add_reject_id(
+                    group_id, payload["ids"], save=False
+                )
+
+        elif action == "notice":
+
+            async def op(group_id: str):
+                await clients[group_id]._send_group_notice(
+                    group_id=int(group_id),
+                    content=payload["content"],
+                    image=payload.get("image"),
+                )
+
+        else:
+
+            async def op(group_id: str):
+                await clients[group_id].set_group_whole_ban(
+                    group_id=int(group_id), enable=action == "whole_ban"
+                )
+
+        return op
+
+    async def _run_fanout(
+        self,
+        event: AiocqhttpMessageEvent,
+        job: FanoutJob,
+        clients: dict[str, CQHttp] | None = None,
+    ):
+        """
+        执行（或继续）跨群任务，定时回报进度，结束后返回汇总。
+        :param clients: 已枚举好的 群号 -> 执行账号，不传则重新枚举
+        """
+        label = self.FANOUT_ACTIONS[job.action]
+        if self.fanout.is_running(job.job_id):
+            return event.plain_result(f"{label}任务 {job.job_id} 正在执行")
+        local = job.action == "blacklist"
+        if clients is None:
+            clients = {} if local else await self._fanout_targets(need_admin=True)
+        if not local:
+            # 已退出的群无法再操作，从任务中移除
+            job.targets = [
+                gid for gid in job.targets if gid in clients or gid in job.done
+            ]
+        remaining = len(job.remaining)
+        await event.send(
+            event.plain_result(
+                f"{label}任务 {job.job_id} 开始：共{len(job.targets)}个群，"
+                f"待处理{remaining}个"
+            )
+        )
+
+        async def report(job: FanoutJob):
+            await event.send(
+                event.plain_result(
+                    f"{label}进度：{len(job.done)}/{len(job.targets)}，"
+                    f"失败{len(job.failed)}"
+                )
+            )
+
+        await self.fanout.run(
+            job,
+            self._fanout_op(job.action, job.payload, clients),
+            on_progress=report,
+            paced=not local,
+            commit=self.group_join_manager.data.save if local else None,
+        )
+        lines = [f"{label}任务 {job.job_id} 结束：成功{len(job.done)}/{len(job.targets)}"]
+        if job.failed:
+            lines.append(f"失败{len(job.failed)}个群：")
+            lines.extend(
+                f"{gid}：{reason}" for gid, reason in list(job.failed.items())[:10]
+            )
+        if job.remaining:
+            lines.append(f"未完成的群已记录，发送 /全群任务 {job.job_id} 继续")
+        return event.plain_result("\n".join(lines))
+
+    async def _start_fanout(
+        self, event: AiocqhttpMessageEvent, action: str, payload: dict
+    ):
+        """下达跨群任务，与未完成的同一任务合并续跑"""
+        # 进群黑名单是本地数据，不需要管理权限
+        clients = await self._fanout_targets(need_admin=action != "blacklist")
+        if not clients:
+            return event.plain_result("没有可操作的群")
+        job = self.fanout.prepare(action, payload, list(clients))
+        return await self._run_fanout(event, job, clients)
+
+    @filter.command("全群禁言")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def fanout_whole_ban(self, event: AiocqhttpMessageEvent):
+        """在bot所在的所有群开启全员禁言"""
+        self.fanout.discard(FanoutEngine.make_id("whole_unban", {}))
+        yield await self._start_fanout(event, "whole_ban", {})
+
+    @filter.command("全群解禁")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def fanout_whole_unban(self, event: AiocqhttpMessageEvent):
+        """在bot所在的所有群关闭全员禁言"""
+        self.fanout.discard(FanoutEngine.make_id("whole_ban", {}))
+        yield await self._start_fanout(event, "whole_unban", {})
+
+    @filter.command("全群公告")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def fanout_notice(self, event: AiocqhttpMessageEvent):
+        """(可引用一张图片)/全群公告 xxx"""
+        content = event.message_str.removeprefix("全群公告").strip()
+        if not content:
+            yield event.plain_result("你又不说要发什么群公告")
+            return
+        payload: dict = {"content": content}
+        if image_url := extract_image_url(chain=event.get_messages()):
+            image_dir = os.path.join(self.plugin_data_dir, "group_notice_image")
+            temp_path = os.path.join(
+                image_dir,
+                f"fanout_notice_image_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
+            )
+            image_path = await download_image(image_url, temp_path)
+            if not image_path:
+                yield event.plain_result("图片获取失败")
+                return
+            # 按图片内容命名，重发同一公告时任务编号不变，可续跑
+            with open(image_path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:16]
+            payload["image"] = os.path.join(image_dir, f"fanout_notice_{digest}.png")
+            os.replace(image_path, payload["image"])
+        yield await self._start_fanout(event, "notice", payload)
+
+    @filter.command("全群拉黑")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def fanout_blacklist(self, event: AiocqhttpMessageEvent):
+        """将指定QQ号加入所有群的进群黑名单"""
+        ids = sorted(set(event.message_str.strip().split()[1:]))
+        if not ids:
+            yield event.plain_result("请提供至少一个QQ号")
+            return
+        yield await self._start_fanout(event, "blacklist", {"ids": ids})
+
+    @filter.command("全群任务")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def fanout_jobs(self, event: AiocqhttpMessageEvent, job_id: str = ""):
+        """全群任务 <编号>，不填编号则查看未完成的任务"""
+        if job_id:
+            job = self.fanout.jobs.get(job_id)
+            if job is None:
+                yield event.plain_result(f"没有未完成的任务 {job_id}")
+                return
+            yield await self._run_fanout(event, job)
+            return
+        if not self.fanout.jobs:
+            yield event.plain_result("没有未完成的全群任务")
+            return
+        lines = [
+            f"{job.job_id} {self.FANOUT_ACTIONS[job.action]} "
+            f"{datetime.fromtimestamp(job.created).strftime('%m-%d %H:%M')} "
+            f"进度{len(job.done)}/{len(job.targets)} 失败{len(job.failed)}"
+            + ("（执行中）" if self.fanout.is_running(job.job_id) else "")
+            for job in self.fanout.jobs.values()
+        ]
+        yield event.plain_result("\n".join(lines))
+
+    @filter.command("停止全群任务")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def stop_fanout_jobs(self, event: AiocqhttpMessageEvent, job_id: str = ""):
+        """停止全群任务 <编号>，不填编号则停止全部"""
+        stopped = self.fanout.stop(job_id or None)
+        if not stopped:
+            yield event.plain_result("没有正在执行的全群任务")
+            return
+        yield event.plain_result(
+            f"已停止任务：{'、'.join(stopped)}，已完成的群已记录，可用 /全群任务 <编号> 继续"
+        )
+
+    @filter.command("重载群管配置")
+    @perm_required(PermLevel.MEMBER, check_at=False)
+    async def reload_plugin_config(self, event: AiocqhttpMessageEvent):
+        """重新读取配置文件，只重建变化的部分，运行状态保留"""
+        try:
+            changed = await self.reload_config()
+        except Exception as e:
+            yield event.plain_result(f"重载配置失败：{e}")
+            return
+        if changed:
+            yield event.plain_result("已重载配置，变化的配置项：\n" + "\n".join(changed))
+        else:
+            yield event.plain_result("配置没有变化")
+
+    @filter.command("群管性能")
+    @perm_required(PermLevel.ADMIN, check_at=False)
+    async def view_performance(self, event: AiocqhttpMessageEvent):
+        """查看各命令的耗时分位数、最慢的几次调用与事件循环负载"""
+        lines = []
+        rows = tracer.stats() if tracer.enabled else []
+        if rows:
+            lines.append("【命令耗时】次数 p50/p95/p99(ms)")
+            lines.extend(
+                f"{row['command']}：{row['count']}次 "
+                f"{row['p50']:.0f}/{row['p95']:.0f}/{row['p99']:.0f}"
+                for row in rows[:15]
+            )
+            slowest = tracer.slowest()[:5]
+            if slowest:
+                lines.append("\n【最慢调用】")
+            for item in slowest:
+                spans = "，".join(
+                    f"{sp['name']} {sp['ms']:.0f}" for sp in item["spans"]
+                )
+                lines.append(
+                    f"{datetime.fromtimestamp(item['time']).strftime('%m-%d %H:%M:%S')} "
+                    f"{item['command']} {item['total_ms']:.0f}ms（{spans}）"
+                )
+        else:
+            lines.append(
+                "暂无命令耗时数据" if tracer.enabled else "未开启命令耗时追踪"
+            )
+        load = self.load_shedder.stats()
+        lines.append(
+            f"\n【事件循环】延迟 {load['smoothed_lag_ms']:.0f}ms"
+            f"（峰值 {load['max_lag_ms']:.0f}ms）"
+            + ("，降载中" if load["overloaded"] else "")
+        )
+        lines.append(
+            f"低优先级队列 {load['queue_depth']} 个，丢弃 {load['dropped']} 个"
+        )
+        notify = self.admin_notifier.stats()
+        lines.append(
+            f"【管理员私聊】待发 {notify['queue_depth']} 条，已送达 {notify['sent']} 条"
+            f"（平均延迟 {notify['avg_latency']:.1f}秒，最长 {notify['max_latency']:.1f}秒），"
+            f"失败 {notify['failed']} 条"
+        )
+        if load["shed"]:
+            lines.append(
+                "已跳过："
+                + "，".join(f"{kind} {n}次" for kind, n in load["shed"].items())
+            )
+        if load["deferred"]:
+            lines.append(
+                "已推迟："
+                + "，".join(f"{kind} {n}次" for kind, n in load["deferred"].items())
+            )
+        executor = self.executor.stats()
+        lines.append(
+            f"\n【计算任务】模式 {executor['mode']}，直接执行 {executor['inline']}，"
+            f"线程池 {executor['thread']}，进程池 {executor['process']}"
+        )
+        render = self.render_scheduler.stats()
+        lines.append(
+            f"【渲染】渲染中 {render['running']}/{render['workers']}，"
+            f"排队 {render['queue_depth']}，完成 {render['rendered']}，"
+            f"合并 {render['deduped']}，降级为文字 "
+            f"{render['saturated'] + render['timeouts'] + render['failures']}"
+        )
+        onebot = call_guard.stats()
+        states = {"closed": "正常", "open": "熔断中", "half_open": "试探中"}
+        lines.append(
+            f"【OneBot】调用 {onebot['calls']}，重试 {onebot['retries']}，"
+            f"超时 {onebot['timeouts']}，失败 {onebot['failures']}，"
+            f"熔断拒绝 {onebot['rejected']}"
+        )
+        lines.extend(
+            f"协议端{i}：{states[b['state']]}"
+            + (f"（剩余{b['cooldown_left']:.0f}秒）" if b["state"] == "open" else "")
+            + f"，累计熔断 {b['trips']} 次"
+            for i, b in enumerate(onebot["breakers"], 1)
+        )
+        if onebot["retried_actions"]:
+            lines.append(
+                "重试最多："
+                + "，".join(f"{a} {n}次" for a, n in onebot["retried_actions"][:5])
+            )
+        async for result in self._send_replies(event, lines):
+            yield result
+
     @filter.command("群管帮助")
     async def qq_admin_help(self, event: AiocqhttpMessageEvent):
         """查看群管帮助"""
-        url = await self.text_to_image(ADMIN_HELP)
-        yield event.image_result(url)
+        yield await self._render(event, ADMIN_HELP, PRIORITY_HIGH)
 
     async def terminate(self):
         """可选择实现异步的插件销毁方法，当插件被卸载/停用时会调用。"""
+        if self.warm_up_task and not self.warm_up_task.done():
+            self.warm_up_task.cancel()
+        if self.config_watch_task and not self.config_watch_task.done():
+            self.config_watch_task.cancel()
+        self.fanout.stop()
+        await self.load_shedder.shutdown()
+        await self.render_scheduler.shutdown()
+        await self.executor.shutdown()
+        await self.join_guard.shutdown()
+        await self.admin_notifier.shutdown()
+        await self.image_filter.close()
+        await self.reputation.close()
+        await self.activity.close()
+        await self.last_seen.close()
+        await self.journal.close()
+        await self.join_requests.close()
         # 遍历所有宵禁管理器并停止它们
         for group_id, manager in list(self.curfew_managers.items()):
             if manager.is_running():
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接以 core.xxx 导入插件模块，依赖 astrbot/aiocqhttp 的用例各自 importorskip
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
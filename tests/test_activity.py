@@ -0,0 +1,83 @@
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from core.activity import ActivityStats, HyperLogLog, SpaceSaving  # noqa: E402
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 50_000])
+def test_hyperloglog_estimate_is_close(n):
+    hll = HyperLogLog()
+    for i in range(n):
+        hll.add(str(i))
+        hll.add(str(i))  # 重复成员不影响估计
+    assert abs(hll.count() - n) <= max(2, n * 0.1)
+
+
+def test_hyperloglog_merge_and_roundtrip():
+    a, b = HyperLogLog(), HyperLogLog()
+    for i in range(3_000):
+        a.add(str(i))
+    for i in range(2_000, 5_000):
+        b.add(str(i))
+    a.merge(b)
+    assert abs(a.count() - 5_000) <= 500
+    assert HyperLogLog.loads(a.dumps()).registers == a.registers
+    # 长度不符的寄存器（如 p 不同）当作空
+    assert HyperLogLog.loads("AAAA").count() == 0
+
+
+def test_space_saving_bounds_hold():
+    rng = random.Random(0)
+    ss = SpaceSaving(20)
+    truth = {}
+    for _ in range(20_000):
+        key = str(int(rng.paretovariate(1.1)))
+        ss.add(key)
+        truth[key] = truth.get(key, 0) + 1
+    assert len(ss.counters) == 20
+    assert sum(c[0] for c in ss.counters.values()) == 20_000
+    for key, (count, error, _) in ss.counters.items():
+        assert count - error <= truth.get(key, 0) <= count
+    # 频次超过 总数/k 的成员一定在表中
+    for key, freq in truth.items():
+        if freq > 20_000 / 20:
+            assert key in ss.counters
+    top = ss.top(3)
+    assert [key for key, *_ in top] == sorted(truth, key=truth.get, reverse=True)[:3]
+
+
+def test_space_saving_after_load_and_merge():
+    ss = SpaceSaving(2)
+    ss.load({"a": [5, 0, "A"], "b": [3, 0, "B"]})
+    ss.add("c", "C")
+    assert set(ss.counters) == {"a", "c"}
+    assert ss.counters["c"] == [4, 3, "C"]
+
+    other = SpaceSaving(2)
+    other.add("a", n=2)
+    other.add("d", n=10)
+    ss.merge(other)
+    assert set(ss.counters) == {"a", "d"}
+    ss.add("e")
+    assert set(ss.counters) == {"d", "e"}
+
+
+def test_activity_summary_and_persistence(tmp_path):
+    path = str(tmp_path / "activity.json")
+    stats = ActivityStats(path, top_k=5)
+    for i in range(100):
+        stats.observe("1", str(i % 10), f"用户{i % 10}")
+    for _ in range(30):
+        stats.observe("1", "talker", "话唠")
+    summary = stats.summary("1", days=1)
+    assert summary["total"] == 130
+    assert summary["users"] == 11
+    assert summary["talkers"][0][0] == "talker"
+    assert stats.summary("2") is None
+
+    asyncio.run(stats.close())
+    assert ActivityStats(path, top_k=5).summary("1", days=1) == summary
@@ -0,0 +1,57 @@
+import pytest
+
+from core.dup_detector import CopyRaidDetector, MinHasher, similarity
+
+RAID_TEXT = "加群领取免费福利，私聊我发链接，名额有限先到先得"
+
+
+def test_similarity_tracks_text_overlap():
+    hasher = MinHasher(num_perm=64)
+    same = hasher.signature(RAID_TEXT)
+    near = hasher.signature(RAID_TEXT + "！")
+    other = hasher.signature("今天晚上一起打游戏吗，我先上线等你们")
+    assert similarity(same, hasher.signature(RAID_TEXT)) == 1.0
+    assert similarity(same, near) >= 0.8
+    assert similarity(same, other) < 0.3
+
+
+def test_fires_once_enough_distinct_senders_post_near_copies():
+    detector = CopyRaidDetector(window=60, min_senders=3)
+    assert detector.feed("1", "a", 1, RAID_TEXT) == []
+    assert detector.feed("1", "b", 2, RAID_TEXT + "！") == []
+    hits = detector.feed("1", "c", 3, RAID_TEXT + "。")
+    assert sorted(hits) == [("a", 1), ("b", 2), ("c", 3)]
+    # 已触发的内容再次出现时只返回新消息
+    assert detector.feed("1", "d", 4, RAID_TEXT) == [("d", 4)]
+
+
+def test_same_sender_or_other_group_does_not_count():
+    detector = CopyRaidDetector(window=60, min_senders=3)
+    for i in range(5):
+        assert detector.feed("1", "a", i, RAID_TEXT) == []
+    assert detector.feed("2", "b", 10, RAID_TEXT) == []
+    assert detector.feed("3", "c", 11, RAID_TEXT) == []
+
+
+def test_unrelated_and_short_messages_are_ignored():
+    detector = CopyRaidDetector(window=60, min_senders=2, min_length=8)
+    assert detector.feed("1", "a", 1, "好的") == []
+    assert detector.feed("1", "b", 2, "好的") == []
+    assert detector.feed("1", "a", 3, "今天晚上一起打游戏吗，我先上线等你们") == []
+    assert detector.feed("1", "b", 4, RAID_TEXT) == []
+
+
+def test_expired_messages_and_idle_groups_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("core.dup_detector.time.monotonic", lambda: now[0])
+    detector = CopyRaidDetector(window=10, min_senders=2)
+    detector.feed("1", "a", 1, RAID_TEXT)
+    detector.feed("2", "a", 2, RAID_TEXT)
+    now[0] += 11
+    assert detector.feed("1", "b", 3, RAID_TEXT) == []
+    assert list(detector._groups) == ["1"]
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        CopyRaidDetector(num_perm=30, bands=8)
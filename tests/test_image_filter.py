@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+pytest.importorskip("astrbot")
+pytest.importorskip("aiohttp")
+pytest.importorskip("PIL")
+
+from core.image_filter import BKTree, hamming  # noqa: E402
+
+
+def test_hamming():
+    assert hamming(0, 0) == 0
+    assert hamming(0b1011, 0b0001) == 2
+    assert hamming(0, (1 << 64) - 1) == 64
+
+
+def test_add_rejects_duplicates():
+    tree = BKTree()
+    assert tree.add(42)
+    assert tree.add(43)
+    assert not tree.add(42)
+    assert tree.size == 2
+
+
+def test_search_empty_tree():
+    assert BKTree().search(123, 10) == []
+
+
+@pytest.mark.parametrize("radius", [0, 3, 6, 12])
+def test_search_matches_brute_force(radius):
+    rng = random.Random(radius)
+    base = [rng.getrandbits(64) for _ in range(20)]
+    values = set(base)
+    # 在若干基准值附近撒点，保证各个半径都有命中
+    for value in base:
+        for _ in range(10):
+            flips = rng.sample(range(64), rng.randint(1, 10))
+            values.add(value ^ sum(1 << bit for bit in flips))
+    tree = BKTree()
+    for value in values:
+        tree.add(value)
+    assert tree.size == len(values)
+
+    for query in base[:5] + [rng.getrandbits(64) for _ in range(5)]:
+        expected = sorted(
+            (hamming(query, v), v) for v in values if hamming(query, v) <= radius
+        )
+        assert sorted(tree.search(query, radius)) == expected
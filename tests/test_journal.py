@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from core.journal import ModerationJournal  # noqa: E402
+
+
+def fill(journal: ModerationJournal, n: int):
+    for i in range(n):
+        journal.record(str(i % 3), str(i % 7), "ban", "admin", f"#{i}")
+
+
+def make(path, **kwargs) -> ModerationJournal:
+    kwargs.setdefault("segment_size", 2_000)
+    kwargs.setdefault("max_segments", 50)
+    kwargs.setdefault("batch_size", 10)
+    return ModerationJournal(str(path), flush_interval=0, **kwargs)
+
+
+def test_query_returns_latest_first_across_segments(tmp_path):
+    async def run():
+        journal = make(tmp_path)
+        fill(journal, 300)
+        await journal.close()
+        assert len(journal._segments) > 3
+        expected = [f"#{i}" for i in reversed(range(300)) if i % 3 == 1 and i % 7 == 4]
+        entries = await journal.query("1", "4", limit=100)
+        assert [e["detail"] for e in entries] == expected
+        limited = await journal.query("1", "4", limit=5)
+        assert [e["detail"] for e in limited] == expected[:5]
+        assert await journal.query("1", "nobody") == []
+
+    asyncio.run(run())
+
+
+def test_index_skips_segments_without_the_user(tmp_path):
+    async def run():
+        journal = make(tmp_path)
+        journal.record("9", "9", "kick", "admin", "early")
+        fill(journal, 300)
+        await journal.close()
+
+        reopened = make(tmp_path)
+        await reopened._ensure_open()
+        loaded = []
+        read_index = reopened._read_index
+        reopened._read_index = lambda seg: (loaded.append(seg), read_index(seg))[1]
+        entries = await reopened.query("9", "9")
+        assert [e["detail"] for e in entries] == ["early"]
+        assert loaded == [reopened._segments[0]]
+
+    asyncio.run(run())
+
+
+def test_rotation_drops_oldest_segments(tmp_path):
+    async def run():
+        journal = make(tmp_path, max_segments=3)
+        journal.record("9", "9", "kick", "admin", "early")
+        fill(journal, 300)
+        await journal.close()
+        assert len(journal._segments) == 3
+        assert await journal.query("9", "9") == []
+        assert len(list(tmp_path.glob("journal-*.jsonl"))) == 3
+
+    asyncio.run(run())
+
+
+def test_reopen_rebuilds_missing_index(tmp_path):
+    async def run():
+        journal = make(tmp_path)
+        fill(journal, 300)
+        await journal.close()
+        before = await journal.query("2", "3", limit=100)
+        for idx in tmp_path.glob("journal-*.idx"):
+            idx.unlink()
+
+        reopened = make(tmp_path)
+        assert await reopened.query("2", "3", limit=100) == before
+        reopened.record("2", "3", "ban", "admin", "new")
+        await reopened.close()
+        latest = await reopened.query("2", "3", limit=1)
+        assert latest[0]["detail"] == "new"
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("astrbot")
+
+from core.link_filter import (  # noqa: E402
+    ALLOW,
+    DENY,
+    DomainTrie,
+    LinkFilter,
+    extract_domains,
+    normalize_domain,
+)
+
+
+def test_extract_domains_handles_schemes_and_obfuscation():
+    text = "看看 https://Evil.example.com/x 还有 bad．ｃｏｍ 和 foo。org，邮箱 a@mail.net"
+    assert extract_domains(text) == {
+        "evil.example.com",
+        "bad.com",
+        "foo.org",
+        "mail.net",
+    }
+    assert extract_domains("版本 1.2.3，没有链接") == set()
+
+
+def test_normalize_domain():
+    assert normalize_domain(" ＥＸＡＭＰＬＥ。com. ") == "example.com"
+
+
+def test_trie_rule_covers_subdomains_and_most_specific_wins():
+    trie = DomainTrie()
+    trie.add("example.com", DENY)
+    trie.add("docs.example.com", ALLOW)
+    assert trie.lookup("example.com") == (2, DENY)
+    assert trie.lookup("a.b.example.com") == (2, DENY)
+    assert trie.lookup("x.docs.example.com") == (3, ALLOW)
+    assert trie.lookup("badexample.com") == (0, None)
+    assert trie.lookup("com") == (0, None)
+
+
+def test_trie_remove_prunes_empty_nodes():
+    trie = DomainTrie()
+    trie.add("a.example.com", DENY)
+    trie.add("example.org", DENY)
+    assert not trie.remove("example.com")
+    assert trie.remove("a.example.com")
+    assert trie.lookup("a.example.com") == (0, None)
+    assert "com" not in trie.root
+    assert trie.lookup("example.org") == (2, DENY)
+
+
+def test_group_rules_override_global_at_same_depth(tmp_path):
+    link_filter = LinkFilter(
+        str(tmp_path / "rules.json"), deny_domains=["example.com"]
+    )
+    link_filter.set_rules("1", ["example.com"], ALLOW)
+    assert link_filter.check("1", "www.example.com") == ALLOW
+    assert link_filter.check("2", "www.example.com") == DENY
+    assert link_filter.find_denied("2", "去 www.example.com 看看") == ["www.example.com"]
+    assert link_filter.find_denied("1", "去 www.example.com 看看") == []
+
+    reloaded = LinkFilter(str(tmp_path / "rules.json"), deny_domains=["example.com"])
+    assert reloaded.check("1", "www.example.com") == ALLOW
@@ -0,0 +1,167 @@
+import asyncio
+import gc
+
+import pytest
+
+pytest.importorskip("astrbot")
+aiocqhttp = pytest.importorskip("aiocqhttp")
+
+from core.resilience import (  # noqa: E402
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CallGuard,
+    CircuitBreaker,
+    CircuitOpenError,
+    is_idempotent,
+)
+
+
+class FakeApi:
+    def __init__(self, bot: "FakeBot"):
+        self.bot = bot
+
+    async def call_action(self, action: str, **params):
+        return await self.bot.respond(action)
+
+
+class FakeBot:
+    def __init__(self, failures: int = 0, error: type = ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = []
+        self.api = FakeApi(self)
+
+    async def respond(self, action: str):
+        self.calls.append(action)
+        if self.failures:
+            self.failures -= 1
+            raise self.error()
+        return {"action": action}
+
+    async def get_group_info(self, **params):
+        return await self.respond("get_group_info")
+
+    async def set_group_kick(self, **params):
+        return await self.respond("set_group_kick")
+
+
+def make_guard(**kwargs) -> CallGuard:
+    guard = CallGuard()
+    params = dict(timeout=1, retries=2, backoff=0, breaker_threshold=3)
+    params.update(kwargs)
+    guard.configure(**params)
+    return guard
+
+
+def test_is_idempotent():
+    assert is_idempotent("get_group_info")
+    assert is_idempotent("set_group_ban")
+    assert not is_idempotent("set_group_kick")
+    assert not is_idempotent("send_group_msg")
+
+
+def test_breaker_state_machine(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("core.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker()
+    assert not breaker.on_failure(2)
+    assert breaker.on_failure(2)
+    assert breaker.state == OPEN and breaker.trips == 1
+    assert not breaker.allow(30)
+
+    now[0] += 30
+    assert breaker.allow(30)
+    assert breaker.state == HALF_OPEN
+    # 试探期间只放行一个调用
+    assert not breaker.allow(30)
+    assert breaker.on_failure(2)
+    assert breaker.state == OPEN and breaker.trips == 2
+
+    now[0] += 30
+    assert breaker.allow(30)
+    breaker.on_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_idempotent_call_is_retried():
+    async def run():
+        guard = make_guard()
+        bot = FakeBot(failures=2)
+        result = await guard.wrap(bot).get_group_info(group_id=1)
+        assert result == {"action": "get_group_info"}
+        assert len(bot.calls) == 3
+        assert guard.counts["get_group_info"]["retries"] == 2
+
+    asyncio.run(run())
+
+
+def test_non_idempotent_call_is_not_retried():
+    async def run():
+        guard = make_guard()
+        bot = FakeBot(failures=1)
+        with pytest.raises(ConnectionError):
+            await guard.wrap(bot).set_group_kick(group_id=1, user_id=2)
+        assert bot.calls == ["set_group_kick"]
+
+    asyncio.run(run())
+
+
+def test_action_failed_does_not_trip_breaker():
+    async def run():
+        guard = make_guard(breaker_threshold=1)
+        bot = FakeBot(failures=5, error=aiocqhttp.ActionFailed)
+        client = guard.wrap(bot)
+        for _ in range(3):
+            with pytest.raises(aiocqhttp.ActionFailed):
+                await client.set_group_kick(group_id=1, user_id=2)
+        assert guard.stats()["breakers"][0]["state"] == CLOSED
+
+    asyncio.run(run())
+
+
+def test_open_breaker_rejects_calls_and_api_shares_it():
+    async def run():
+        guard = make_guard(retries=0, breaker_threshold=2)
+        bot = FakeBot(failures=2)
+        client = guard.wrap(bot)
+        assert guard.wrap(bot) is client
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await client.api.call_action("get_group_msg_history", group_id=1)
+        with pytest.raises(CircuitOpenError):
+            await client.get_group_info(group_id=1)
+        assert len(bot.calls) == 2
+        stats = guard.stats()
+        assert stats["rejected"] == 1
+        assert [b["state"] for b in stats["breakers"]] == [OPEN]
+
+    asyncio.run(run())
+
+
+def test_timeout_counts_as_transport_failure():
+    class SlowBot(FakeBot):
+        async def get_group_info(self, **params):
+            await asyncio.sleep(1)
+
+    async def run():
+        guard = make_guard(timeout=0.01, retries=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await guard.wrap(SlowBot()).get_group_info(group_id=1)
+        counts = guard.counts["get_group_info"]
+        assert counts["timeouts"] == 2 and counts["failures"] == 1
+
+    asyncio.run(run())
+
+
+def test_released_clients_drop_their_breaker():
+    guard = make_guard()
+
+    async def run():
+        bot = FakeBot()
+        await guard.wrap(bot).get_group_info(group_id=1)
+        assert len(guard._breakers) == 1
+
+    asyncio.run(run())
+    gc.collect()
+    assert not guard._breakers and not guard._clients
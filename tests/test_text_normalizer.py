@@ -0,0 +1,53 @@
+import pytest
+
+from core.text_normalizer import TextNormalizer, WordMatcher
+
+
+@pytest.fixture(scope="module")
+def normalizer():
+    return TextNormalizer(fold_traditional=True)
+
+
+def make_matcher(normalizer, *words):
+    return WordMatcher(normalizer, [(w, normalizer.normalize(w)) for w in words])
+
+
+def test_normalize_folds_variants(normalizer):
+    assert normalizer.normalize("ＳＢ") == "sb"
+    assert normalizer.normalize("傻​ 逼！") == "傻逼"
+    assert normalizer.normalize("你們這些") == "你们这些"
+
+
+def test_cjk_word_matches_through_separators(normalizer):
+    matcher = make_matcher(normalizer, "傻逼")
+    text = "你这个傻 ​逼！"
+    word, start, end = matcher.find(text)
+    assert word == "傻逼"
+    assert text[start:end] == "傻 ​逼"
+
+
+def test_ascii_word_does_not_span_english_words(normalizer):
+    matcher = make_matcher(normalizer, "sb")
+    assert matcher.find("this best thing") is None
+    assert matcher.find("I was busy") is None
+    assert matcher.find("absolutely") is None
+
+
+def test_ascii_word_matches_standalone_and_obfuscated(normalizer):
+    matcher = make_matcher(normalizer, "sb")
+    for text in ("你是sb吧", "SB", "s b", "ｓ.ｂ!", "this is sb"):
+        hit = matcher.find(text)
+        assert hit is not None, text
+        assert hit[0] == "sb"
+
+
+def test_ascii_word_skips_embedded_hit_and_finds_later_one(normalizer):
+    matcher = make_matcher(normalizer, "sb")
+    text = "this best thing, you sb"
+    _, start, end = matcher.find(text)
+    assert text[start:end] == "sb"
+    assert start == len(text) - 2
+
+
+def test_no_hit_returns_none(normalizer):
+    assert make_matcher(normalizer, "傻逼", "sb").find("今天天气不错") is None